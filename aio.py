@@ -0,0 +1,176 @@
+""""
+Asyncio
+
+Provides AsyncConjugator, the asyncio-native API of the Conjugator: classification and
+conjugation run in an executor, so that big batches never block the event loop.
+
+	async with AsyncConjugator() as conjugator:
+		(verb, verb2) = await conjugator.conjugate("studovat", timeout = 1.0)
+		results = await conjugator.conjugate_batch(words)
+		async for (word, (verb, verb2)) in conjugator.stream(open("data/verbs.txt")):
+			...
+
+The executor is a thread pool sharing a single Conjugator by default. Given a
+concurrent.futures.ProcessPoolExecutor, every worker process builds its own Conjugator
+once, and the conjugated verbs are sent back pickled.
+
+Batches and streams are split into chunks, each its own call of the executor: a cancelled
+or timed out call stops at the end of the chunk being conjugated, the chunks not yet started
+are dropped.
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+
+DEFAULT_CHUNK_SIZE = 256
+
+# the Conjugator of a worker process of a ProcessPoolExecutor, built on its first call
+_process_conjugator = None
+
+def _process_batch(words : list, is_perfective : bool) -> list:
+	"""Conjugate <words> in a worker process."""
+	global _process_conjugator
+	if _process_conjugator is None:
+		from conjugator import Conjugator
+		_process_conjugator = Conjugator()
+	return _process_conjugator.conjugate_batch(words, is_perfective)
+
+def _chunked(words : list, size : int) -> list:
+	return [ words[start:start + size] for start in range(0, len(words), size) ]
+
+class AsyncConjugator:
+	"""
+	Conjugates verbs from coroutines, running the work in an executor.
+
+	Attributes:
+		conjugator : Conjugator --> the shared conjugator of a thread executor (None with a process executor)
+		executor : concurrent.futures.Executor --> where the words are conjugated
+		chunk_size : int --> most words conjugated by a single call of the executor
+
+	Methods:
+		conjugate(self, word : str, is_perfective : bool = False, timeout : float = None) -> tuple
+			conjugate a single word
+		conjugate_batch(self, words : list, is_perfective : bool = False, timeout : float = None) -> list
+			conjugate a list of words
+		stream(self, words, is_perfective : bool = False, timeout : float = None)
+			conjugate an iterable or async iterable of words, yielding the results as they are ready
+		close(self)
+			shut down an executor created by the AsyncConjugator
+	"""
+	def __init__(self, conjugator = None, executor : concurrent.futures.Executor = None, max_workers : int = None,
+				 chunk_size : int = DEFAULT_CHUNK_SIZE):
+		"""
+		Construct an AsyncConjugator.
+
+		Parameters:
+			conjugator : Conjugator --> shared by the threads of a thread executor (default a new Conjugator)
+			executor : concurrent.futures.Executor --> a ThreadPoolExecutor or ProcessPoolExecutor
+													   (default a new ThreadPoolExecutor of <max_workers>)
+			chunk_size : int --> most words conjugated by a single call of the executor
+		"""
+		self._owns_executor = executor is None
+		self.executor = executor if executor is not None else concurrent.futures.ThreadPoolExecutor(max_workers)
+		self.chunk_size = chunk_size
+		if isinstance(self.executor, concurrent.futures.ProcessPoolExecutor):
+			self.conjugator = None
+			self._batch = _process_batch
+		else:
+			if conjugator is None:
+				from conjugator import Conjugator
+				conjugator = Conjugator()
+			self.conjugator = conjugator
+			self._batch = conjugator.conjugate_batch
+
+	async def __aenter__(self):
+		return self
+
+	async def __aexit__(self, *exc_info):
+		self.close()
+
+	def close(self):
+		"""Shut down the executor, if the AsyncConjugator created it."""
+		if self._owns_executor:
+			self.executor.shutdown(wait = False)
+
+	def _submit(self, words : list, is_perfective : bool) -> asyncio.Future:
+		"""Start conjugating <words> in the executor."""
+		return asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(self._batch, words, is_perfective))
+
+	async def conjugate(self, word : str, is_perfective : bool = False, timeout : float = None) -> tuple:
+		"""
+		Classify, construct and conjugate <word> in the executor.
+
+		Return:
+			tuple[v.Verb, v.Verb] --> same as Conjugator.conjugate().
+		Raises:
+			asyncio.TimeoutError --> <timeout> seconds passed first.
+		"""
+		(result,) = await asyncio.wait_for(self._submit([word], is_perfective), timeout)
+		return result
+
+	async def conjugate_batch(self, words : list, is_perfective : bool = False, timeout : float = None) -> list:
+		"""
+		Conjugate every word in <words> in the executor, chunk by chunk (in parallel with a process executor).
+
+		Return:
+			list[tuple[v.Verb, v.Verb]] --> same as Conjugator.conjugate_batch().
+		Raises:
+			asyncio.TimeoutError --> <timeout> seconds passed first, the chunks not yet started are dropped.
+		"""
+		chunks = _chunked(list(words), self.chunk_size)
+		results = await asyncio.wait_for(asyncio.gather(*[ self._submit(chunk, is_perfective) for chunk in chunks ]), timeout)
+		return [ result for chunk in results for result in chunk ]
+
+	async def stream(self, words, is_perfective : bool = False, timeout : float = None):
+		"""
+		Conjugate the words of iterable or async iterable <words> (such as the lines of a file), chunk by chunk.
+
+		Surrounding whitespace is stripped and blank words are skipped, as in Conjugator.conjugate_stream().
+		The next chunk is conjugated while the results of the last one are being consumed.
+
+		Parameters:
+			timeout : float --> most seconds to wait for the results of each chunk (None: no limit)
+		Yield:
+			tuple[str, tuple[v.Verb, v.Verb]] --> the (stripped) word and its conjugation, in input order.
+		Raises:
+			asyncio.TimeoutError --> a chunk took more than <timeout> seconds, the chunks not yet started are dropped.
+		"""
+		(pending, submitted) = (None, None)
+		try:
+			async for chunk in self._read_chunks(words):
+				submitted = (chunk, self._submit(chunk, is_perfective))
+				if pending is not None:
+					for item in zip(pending[0], await asyncio.wait_for(pending[1], timeout)):
+						yield item
+				(pending, submitted) = (submitted, None)
+			if pending is not None:
+				for item in zip(pending[0], await asyncio.wait_for(pending[1], timeout)):
+					yield item
+				pending = None
+		finally:
+			for waiting in (pending, submitted): # abandoned, cancelled or timed out: drop the chunks not yet started
+				if waiting is not None:
+					waiting[1].cancel()
+
+	async def _read_chunks(self, words):
+		"""Yield the stripped, non-blank words of (async) iterable <words> in chunks of chunk_size."""
+		chunk = []
+		async for word in _aiter(words):
+			word = word.strip()
+			if word:
+				chunk.append(word)
+				if len(chunk) == self.chunk_size:
+					yield chunk
+					chunk = []
+		if chunk:
+			yield chunk
+
+async def _aiter(words):
+	"""Iterate over iterable or async iterable <words> asynchronously."""
+	if hasattr(words, "__aiter__"):
+		async for word in words:
+			yield word
+	else:
+		for word in words:
+			yield word
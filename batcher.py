@@ -0,0 +1,160 @@
+""""
+Micro-batcher
+
+Provides MicroBatcher, which gathers single items submitted from many threads into
+micro-batches: a batch is started by the first queued item and closed when it holds
+max_batch items or once <window> seconds have passed, then handed to the batch function
+by a single worker thread. Every submitter waits for the result of its own item.
+Under load, items queue up while a batch is being processed, so batches fill up even
+without a window; a window only trades the latency of a quiet service for larger batches.
+
+The queue of waiting items is bounded: once max_queue items are waiting, submit() raises
+Overloaded at once instead of queueing work that could only be answered late.
+
+	batcher = MicroBatcher(lambda words: conjugator.conjugate_batch(words), max_batch = 64)
+	(verb, verb2) = batcher.submit("studovat")
+"""
+
+import queue
+import threading
+import time
+
+DEFAULT_MAX_BATCH = 64
+DEFAULT_WINDOW = 0.0 # seconds: take the items that queued up while the last batch ran, without waiting for more
+DEFAULT_MAX_QUEUE = 1024
+
+class Overloaded(Exception):
+	"""Raised by MicroBatcher.submit() when its queue is full."""
+
+class _Pending:
+	"""A submitted item: its submitter waits on <done> for its result or error."""
+	__slots__ = ("item", "done", "result", "error")
+
+	def __init__(self, item):
+		self.item = item
+		self.done = threading.Event()
+		self.result = None
+		self.error = None
+
+class MicroBatcher:
+	"""
+	Gathers submitted items into micro-batches for a batch function.
+
+	Attributes:
+		function : callable --> called with a list of items, returns the list of their results in the same order
+		max_batch : int --> largest batch handed to <function>
+		window : float --> longest time (in seconds) a batch waits for more items
+		max_queue : int --> most items waiting for a batch
+		batches : int --> batches handed to <function>
+		batched : int --> items handed to <function>
+		rejected : int --> items refused as Overloaded
+
+	Methods:
+		submit(self, item)
+			wait for the result of <item>, computed as part of a batch
+		depth(self) -> int
+			number of items waiting for a batch
+		close(self)
+			stop the worker once the queued items are done
+	"""
+	def __init__(self, function, max_batch : int = DEFAULT_MAX_BATCH, window : float = DEFAULT_WINDOW,
+				 max_queue : int = DEFAULT_MAX_QUEUE):
+		"""Construct a batcher of <function>, starting its worker thread."""
+		self.function = function
+		self.max_batch = max_batch
+		self.window = window
+		self.max_queue = max_queue
+		self.batches = 0
+		self.batched = 0
+		self.rejected = 0
+		self._closed = False
+		self._lock = threading.Lock()
+		self._queue = queue.Queue(max_queue)
+		self._worker = threading.Thread(target = self._run, name = "micro-batcher", daemon = True)
+		self._worker.start()
+
+	def submit(self, item):
+		"""
+		Return the result of <item>, once the batch it was gathered in is done.
+
+		Raises:
+			Overloaded --> max_queue items are already waiting.
+			RuntimeError --> the batcher is closed, or the batch function did not return a result per item.
+			whatever the batch function raised, in every submitter of the batch.
+		"""
+		pending = _Pending(item)
+		with self._lock: # close() cannot queue its sentinel between the check and the put
+			if self._closed:
+				raise RuntimeError("the batcher is closed")
+			try:
+				self._queue.put_nowait(pending)
+			except queue.Full:
+				self.rejected += 1
+				raise Overloaded("more than " + str(self.max_queue) + " items waiting") from None
+		pending.done.wait()
+		if pending.error is not None:
+			raise pending.error
+		return pending.result
+
+	def depth(self) -> int:
+		"""Return the number of items waiting for a batch."""
+		return self._queue.qsize()
+
+	def close(self):
+		"""Stop the worker thread once every item already queued is done."""
+		with self._lock:
+			if self._closed:
+				return
+			self._closed = True
+			self._queue.put(None)
+		self._worker.join()
+
+	def _gather(self, first : _Pending) -> tuple:
+		"""
+		Gather the batch started by <first>: up to max_batch items, waiting at most <window> seconds for them.
+
+		Return:
+			tuple[list[_Pending], bool] --> the batch and whether the batcher was closed meanwhile.
+		"""
+		batch = [first]
+		deadline = time.monotonic() + self.window
+		while len(batch) < self.max_batch:
+			try:
+				remaining = deadline - time.monotonic()
+				pending = self._queue.get(timeout = remaining) if remaining > 0 else self._queue.get_nowait()
+			except queue.Empty:
+				break
+			if pending is None:
+				return (batch, True)
+			batch.append(pending)
+		return (batch, False)
+
+	def _run(self):
+		"""Hand batches to the batch function until closed, then fail any item left in the queue."""
+		closed = False
+		while not closed:
+			first = self._queue.get()
+			if first is None:
+				break
+			(batch, closed) = self._gather(first)
+			self.batches += 1
+			self.batched += len(batch)
+			try:
+				results = list(self.function([ pending.item for pending in batch ]))
+				if len(results) != len(batch):
+					raise RuntimeError("the batch function returned " + str(len(results)) + " results for " + str(len(batch)) + " items")
+				for (pending, result) in zip(batch, results):
+					pending.result = result
+			except BaseException as error:
+				for pending in batch:
+					pending.error = error
+			for pending in batch:
+				pending.done.set()
+		while True:
+			try:
+				pending = self._queue.get_nowait()
+			except queue.Empty:
+				return
+			if pending is not None:
+				pending.error = RuntimeError("the batcher is closed")
+				pending.done.set()
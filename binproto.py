@@ -0,0 +1,324 @@
+""""
+Binary protocol
+
+Provides a length-prefixed binary request/response protocol for high-rate local clients, as an
+alternative to JSON over HTTP (see service): a request carries a batch of words, the response
+every conjugation table of them, all strings as UTF-8 with an offset table, so that neither side
+parses or escapes anything.
+
+Every message is a frame: its payload length (uint32), then the payload. All integers are little-endian.
+	request payload : version (uint8), flags (uint8, bit 0: perfective), word count n (uint16),
+					  the strings of the n words (see below)
+	response payload : version (uint8), status (uint8), word count n (uint16),
+					   n conjugation counts (uint8 each: 0 without a match, 2 for stát),
+					   the strings of every conjugation of every word: its kind, then its 30 cells
+					   (tense major, as in Verb.get_table()); or, with any status but OK, an error message
+	strings : string count m (uint32), m + 1 offsets (uint32) into the UTF-8 data that follows,
+			  string i being data[offsets[i]:offsets[i + 1]]
+
+	python3 binproto.py [--host HOST] [--port PORT]
+serves the protocol; Client is its Python client, pooling connections:
+
+	client = Client("127.0.0.1", DEFAULT_PORT)
+	records = client.conjugate_batch(["studovat", "být"]) # as formatters.to_record
+"""
+
+import verbs as v
+import argparse
+import queue
+import socket
+import socketserver
+import struct
+import sys
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8081
+VERSION = 1
+MAX_FRAME = 64 * 1024 * 1024 # bytes, larger frames are refused
+MAX_WORDS = 0xFFFF
+
+# response status
+OK = 0
+BAD_REQUEST = 1
+SERVER_ERROR = 2
+
+FLAG_PERFECTIVE = 1
+
+_LENGTH = struct.Struct("<I")
+_HEADER = struct.Struct("<BBH")
+_CELLS = len(v.Tense) * len(v.Person)
+_ROWS = tuple(slice(tense * len(v.Person), (tense + 1) * len(v.Person)) for tense in range(len(v.Tense)))
+
+class ProtocolError(Exception):
+	"""Raised on malformed frames, and by the client on error responses."""
+
+
+def pack_strings(strings : list) -> bytes:
+	"""Pack <strings> as their count, offset table and UTF-8 data."""
+	data = [ string.encode("utf-8") for string in strings ]
+	offsets = [0]
+	for encoded in data:
+		offsets.append(offsets[-1] + len(encoded))
+	return struct.pack("<I%dI" % len(offsets), len(strings), *offsets) + b"".join(data)
+
+def unpack_strings(payload : bytes, start : int) -> list:
+	"""
+	Unpack the strings packed by pack_strings() at <start> of <payload>.
+
+	Raises:
+		ProtocolError --> the strings do not fit in <payload>, or are not UTF-8.
+	"""
+	try:
+		(count,) = _LENGTH.unpack_from(payload, start)
+		offsets = struct.unpack_from("<%dI" % (count + 1), payload, start + _LENGTH.size)
+		data = payload[start + _LENGTH.size * (count + 2):]
+		if offsets[-1] != len(data):
+			raise ProtocolError("bad offset table")
+		return [ str(data[offsets[i]:offsets[i + 1]], "utf-8") for i in range(count) ]
+	except (struct.error, UnicodeDecodeError) as error:
+		raise ProtocolError("bad strings: " + str(error)) from error
+
+def encode_request(words : list, is_perfective : bool = False) -> bytes:
+	"""Return the payload of a request for <words>."""
+	if len(words) > MAX_WORDS:
+		raise ValueError("at most " + str(MAX_WORDS) + " words per request")
+	return _HEADER.pack(VERSION, FLAG_PERFECTIVE if is_perfective else 0, len(words)) + pack_strings(words)
+
+def decode_request(payload : bytes) -> tuple:
+	"""
+	Decode a request <payload>.
+
+	Return:
+		tuple[list[str], bool] --> the words and whether to conjugate them as perfective.
+	Raises:
+		ProtocolError --> the payload is malformed.
+	"""
+	if len(payload) < _HEADER.size:
+		raise ProtocolError("truncated request")
+	(version, flags, count) = _HEADER.unpack_from(payload)
+	if version != VERSION:
+		raise ProtocolError("unsupported version " + str(version))
+	words = unpack_strings(payload, _HEADER.size)
+	if len(words) != count:
+		raise ProtocolError("word count mismatch")
+	return (words, bool(flags & FLAG_PERFECTIVE))
+
+def encode_response(results : list) -> bytes:
+	"""Return the payload of the response with the conjugations (verb, verb2) of <results>."""
+	counts = []
+	strings = []
+	for result in results:
+		verbs = [ verb for verb in result if verb ]
+		counts.append(len(verbs))
+		for verb in verbs:
+			strings.append(verb.kind())
+			for row in verb.get_table():
+				strings += row
+	return _HEADER.pack(VERSION, OK, len(results)) + bytes(counts) + pack_strings(strings)
+
+def encode_error(status : int, message : str) -> bytes:
+	"""Return the payload of an error response."""
+	return _HEADER.pack(VERSION, status, 0) + pack_strings([message])
+
+def decode_response(payload : bytes, words : list) -> list:
+	"""
+	Decode the response <payload> to a request for <words>.
+
+	Return:
+		list[dict] --> the record of every word, {"word": str, "verbs": [{"kind": str, "table": list}]}.
+	Raises:
+		ProtocolError --> the payload is malformed, or is an error response (its message).
+	"""
+	if len(payload) < _HEADER.size:
+		raise ProtocolError("truncated response")
+	(version, status, count) = _HEADER.unpack_from(payload)
+	if version != VERSION:
+		raise ProtocolError("unsupported version " + str(version))
+	if status != OK:
+		raise ProtocolError("status " + str(status) + ": " + " ".join(unpack_strings(payload, _HEADER.size)))
+	if count != len(words):
+		raise ProtocolError("word count mismatch")
+	counts = payload[_HEADER.size:_HEADER.size + count]
+	strings = unpack_strings(payload, _HEADER.size + count)
+	if len(strings) != sum(counts) * (1 + _CELLS):
+		raise ProtocolError("string count mismatch")
+	records = []
+	position = 0
+	for (word, conjugations) in zip(words, counts):
+		verbs = []
+		for i in range(conjugations):
+			cells = strings[position + 1:position + 1 + _CELLS]
+			verbs.append({"kind" : strings[position], "table" : [ cells[row] for row in _ROWS ]})
+			position += 1 + _CELLS
+		records.append({"word" : word, "verbs" : verbs})
+	return records
+
+
+def _receive_exactly(sock : socket.socket, size : int) -> bytes:
+	"""Receive exactly <size> bytes, b"" if the connection was closed before the first one."""
+	chunks = []
+	while size:
+		chunk = sock.recv(min(size, 1 << 20))
+		if not chunk:
+			if chunks:
+				raise ProtocolError("connection closed within a frame")
+			return b""
+		chunks.append(chunk)
+		size -= len(chunk)
+	return b"".join(chunks)
+
+def read_frame(sock : socket.socket) -> bytes:
+	"""
+	Read a frame from <sock>, returning its payload (None if the connection was closed between frames).
+
+	Raises:
+		ProtocolError --> the frame is larger than MAX_FRAME, or was cut short.
+	"""
+	header = _receive_exactly(sock, _LENGTH.size)
+	if not header:
+		return None
+	(length,) = _LENGTH.unpack(header)
+	if length > MAX_FRAME:
+		raise ProtocolError("frame of " + str(length) + " bytes is too large")
+	payload = _receive_exactly(sock, length)
+	if len(payload) != length:
+		raise ProtocolError("connection closed within a frame")
+	return payload
+
+def write_frame(sock : socket.socket, payload : bytes):
+	"""Write <payload> as a frame to <sock>."""
+	sock.sendall(_LENGTH.pack(len(payload)) + payload)
+
+
+class RequestHandler(socketserver.BaseRequestHandler):
+	"""Answers the frames of a connection until it is closed, conjugating with the server's <conjugator>."""
+	def setup(self):
+		self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+	def handle(self):
+		conjugator = self.server.conjugator
+		while True:
+			try:
+				payload = read_frame(self.request)
+			except (ProtocolError, OSError):
+				return # a connection out of step cannot be answered anymore
+			if payload is None:
+				return
+			try:
+				(words, is_perfective) = decode_request(payload)
+			except ProtocolError as error:
+				write_frame(self.request, encode_error(BAD_REQUEST, str(error)))
+				continue
+			try:
+				response = encode_response(conjugator.conjugate_batch(words, is_perfective))
+			except Exception as error:
+				response = encode_error(SERVER_ERROR, type(error).__name__ + ": " + str(error))
+			write_frame(self.request, response)
+
+class Server(socketserver.ThreadingTCPServer):
+	"""Serves the binary protocol, a thread per connection."""
+	daemon_threads = True
+	allow_reuse_address = True
+
+def make_server(host : str = DEFAULT_HOST, port : int = DEFAULT_PORT, conjugator = None) -> Server:
+	"""Construct (and bind) the server at <host>:<port>, conjugating with <conjugator> (default a new Conjugator)."""
+	if conjugator is None:
+		from conjugator import Conjugator
+		conjugator = Conjugator()
+	server = Server((host, port), RequestHandler)
+	server.conjugator = conjugator
+	return server
+
+
+class Client:
+	"""
+	Client of the binary protocol, safe to share between threads: every call borrows a connection
+	from a pool (opening one if none is idle) and gives it back afterwards.
+
+	Attributes:
+		host, port --> address of the server
+		pool_size : int --> most idle connections kept open
+		timeout : float --> socket timeout in seconds
+
+	Methods:
+		conjugate_batch(self, words : list, is_perfective : bool = False) -> list
+			get the records of <words>
+		close(self)
+			close the idle connections
+	"""
+	def __init__(self, host : str = DEFAULT_HOST, port : int = DEFAULT_PORT, pool_size : int = 8, timeout : float = 30.0):
+		self.host = host
+		self.port = port
+		self.pool_size = pool_size
+		self.timeout = timeout
+		self._idle = queue.LifoQueue(pool_size)
+
+	def _connect(self) -> socket.socket:
+		sock = socket.create_connection((self.host, self.port), self.timeout)
+		sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+		return sock
+
+	def _release(self, sock : socket.socket):
+		"""Give <sock> back to the pool, closing it if the pool is full."""
+		try:
+			self._idle.put_nowait(sock)
+		except queue.Full:
+			sock.close()
+
+	def conjugate_batch(self, words : list, is_perfective : bool = False) -> list:
+		"""
+		Return the record of every word of <words>, {"word": str, "verbs": [{"kind": str, "table": list}]},
+		as formatters.to_record. An idle connection closed by the server is replaced once.
+
+		Raises:
+			ProtocolError --> the server answered with an error, or out of protocol.
+			OSError --> the server cannot be reached.
+		"""
+		request = encode_request(words, is_perfective)
+		for attempt in (0, 1):
+			try:
+				(sock, reused) = (self._idle.get_nowait(), True)
+			except queue.Empty:
+				(sock, reused) = (self._connect(), False)
+			try:
+				write_frame(sock, request)
+				payload = read_frame(sock)
+				if payload is None:
+					raise ConnectionResetError("connection closed by the server")
+			except OSError:
+				sock.close()
+				if reused and attempt == 0:
+					continue # stale pooled connection, the request is safe to repeat
+				raise
+			except ProtocolError:
+				sock.close()
+				raise
+			self._release(sock)
+			return decode_response(payload, words)
+
+	def close(self):
+		"""Close every idle connection."""
+		while True:
+			try:
+				self._idle.get_nowait().close()
+			except queue.Empty:
+				return
+
+
+def main(argv : list = None):
+	parser = argparse.ArgumentParser(description = "Serve conjugations over the binary protocol.")
+	parser.add_argument("--host", default = DEFAULT_HOST)
+	parser.add_argument("--port", type = int, default = DEFAULT_PORT)
+	args = parser.parse_args(argv)
+
+	server = make_server(args.host, args.port)
+	print("serving on " + args.host + ":" + str(server.server_address[1]), file = sys.stderr)
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		server.server_close()
+
+if __name__ == "__main__":
+	main()
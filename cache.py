@@ -0,0 +1,300 @@
+""""
+Caches
+
+Provides the bounded, thread-safe caches used to keep classifications and
+conjugations of already seen words:
+	1. LRUCache : least recently used eviction
+	2. TinyLFUCache : least recently used eviction behind a frequency-based admission
+	   policy, so that one-off scans (such as streaming verbs.txt) do not evict the hot words
+
+Every cache counts its hits, misses and evictions (see CacheStats).
+To compare the policies on recorded traffic (one word per line):
+	python3 cache.py <trace> [maxsize]
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+
+class CacheStats:
+	"""
+	Hit/miss/eviction/rejection counters of a cache.
+
+	Attributes:
+		hits : int --> lookups that found their key
+		misses : int --> lookups that did not
+		evictions : int --> entries dropped to make room for others
+		rejections : int --> new entries the admission policy refused to keep (TinyLFUCache only)
+	"""
+	def __init__(self):
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+		self.rejections = 0
+
+	def hit_ratio(self) -> float:
+		"""Return the share of lookups that were hits (0.0 without any lookups)."""
+		lookups = self.hits + self.misses
+		return self.hits / lookups if lookups else 0.0
+
+	def as_dict(self) -> dict:
+		"""Return the counters (and hit ratio) as a dictionary."""
+		return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "rejections": self.rejections,
+				"hit_ratio": self.hit_ratio()}
+
+
+class LRUCache:
+	"""
+	Bounded mapping evicting the least recently used entry once full.
+
+	Attributes:
+		maxsize : int --> maximum number of entries (0 disables caching)
+		stats : CacheStats --> hit/miss/eviction counters
+
+	Methods:
+		get(self, key, default = None)
+			look up <key>, counting a hit or a miss
+		put(self, key, value)
+			insert/overwrite <key>, evicting if needed
+		discard(self, key)
+			remove <key> if present
+		clear(self)
+			remove every entry
+		items(self) -> list
+			(key, value) pairs from least to most recently used
+	"""
+	def __init__(self, maxsize : int = 4096):
+		"""Construct an empty cache holding at most <maxsize> entries."""
+		self.maxsize = maxsize
+		self.stats = CacheStats()
+		self._entries = OrderedDict()
+		self._lock = threading.Lock()
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+	def __contains__(self, key) -> bool:
+		return key in self._entries
+
+	def get(self, key, default = None):
+		"""Return the value of <key> (marking it as recently used), or <default>."""
+		with self._lock:
+			try:
+				value = self._entries[key]
+			except KeyError:
+				self.stats.misses += 1
+				return default
+			self._entries.move_to_end(key)
+			self.stats.hits += 1
+			return value
+
+	def put(self, key, value):
+		"""Insert <value> at <key>, evicting the least recently used entries if the cache is full."""
+		if self.maxsize <= 0:
+			return
+		with self._lock:
+			self._entries[key] = value
+			self._entries.move_to_end(key)
+			while len(self._entries) > self.maxsize:
+				self._entries.popitem(last = False)
+				self.stats.evictions += 1
+
+	def discard(self, key):
+		"""Remove <key> from the cache if present."""
+		with self._lock:
+			self._entries.pop(key, None)
+
+	def clear(self):
+		"""Remove every entry. The counters are kept."""
+		with self._lock:
+			self._entries.clear()
+
+	def keys(self) -> list:
+		"""Return a list of the cached keys."""
+		with self._lock:
+			return list(self._entries)
+
+	def items(self) -> list:
+		"""Return the (key, value) pairs, from least to most recently used."""
+		with self._lock:
+			return list(self._entries.items())
+
+
+class FrequencySketch:
+	"""
+	Approximate access counts (count-min sketch of 4-bit counters), aged by halving.
+
+	Once as many accesses as 10 times the capacity have been counted, every counter
+	is halved, so that the estimates follow the recent popularity of keys.
+
+	Methods:
+		increment(self, key)
+			count an access of <key>
+		estimate(self, key) -> int
+			estimate the accesses of <key> (0-15)
+	"""
+	_ROWS = 4
+	_MAX_COUNT = 15
+
+	def __init__(self, capacity : int):
+		"""Construct a sketch sized for a cache of <capacity> entries."""
+		width = 1 << max(4, (16 * capacity).bit_length())
+		self._mask = width - 1
+		self._rows = [ bytearray(width) for row in range(self._ROWS) ]
+		self._sample_size = 10 * max(capacity, 1)
+		self._additions = 0
+
+	def _indexes(self, key) -> list:
+		"""Return the counter index of <key> in every row (double hashing)."""
+		digest = hash(key) & 0xFFFFFFFFFFFFFFFF
+		(low, high) = (digest & 0xFFFFFFFF, (digest >> 32) | 1)
+		return [ (low + row * high) & self._mask for row in range(self._ROWS) ]
+
+	def increment(self, key):
+		"""Count an access of <key>, only raising its smallest counters (conservative update)."""
+		indexes = self._indexes(key)
+		counts = [ row[idx] for (row, idx) in zip(self._rows, indexes) ]
+		smallest = min(counts)
+		if smallest < self._MAX_COUNT:
+			for (row, idx, count) in zip(self._rows, indexes, counts):
+				if count == smallest:
+					row[idx] = count + 1
+		self._additions += 1
+		if self._additions >= self._sample_size:
+			self._age()
+
+	def _age(self):
+		"""Halve every counter."""
+		self._rows = [ bytearray(count >> 1 for count in row) for row in self._rows ]
+		self._additions //= 2
+
+	def estimate(self, key) -> int:
+		"""Estimate the (recent) accesses of <key>."""
+		return min(row[idx] for (row, idx) in zip(self._rows, self._indexes(key)))
+
+
+class TinyLFUCache:
+	"""
+	Bounded mapping with a frequency-based admission policy (W-TinyLFU).
+
+	New entries go into a small LRU window. An entry leaving the window only enters
+	the main LRU area if the main area has room, or if it was accessed more often
+	(see FrequencySketch) than the main area's least recently used entry, which it then evicts.
+	Words looked up once, as in a scan, are thus dropped instead of evicting the hot words.
+
+	Same interface as LRUCache.
+
+	Attributes:
+		maxsize : int --> maximum number of entries (0 disables caching)
+		stats : CacheStats --> hit/miss/eviction/rejection counters
+		sketch : FrequencySketch --> access counts of recently looked up keys
+	"""
+	def __init__(self, maxsize : int = 4096, window_ratio : float = 0.01):
+		"""Construct an empty cache holding at most <maxsize> entries, <window_ratio> of them in the window."""
+		self.maxsize = maxsize
+		self.stats = CacheStats()
+		self.sketch = FrequencySketch(maxsize)
+		self._window_size = min(max(1, int(maxsize * window_ratio)), max(maxsize, 0))
+		self._main_size = maxsize - self._window_size
+		self._window = OrderedDict()
+		self._main = OrderedDict()
+		self._lock = threading.Lock()
+
+	def __len__(self) -> int:
+		return len(self._window) + len(self._main)
+
+	def __contains__(self, key) -> bool:
+		return key in self._window or key in self._main
+
+	def get(self, key, default = None):
+		"""Return the value of <key> (marking it as recently used), or <default>. Every lookup is counted by the sketch."""
+		with self._lock:
+			self.sketch.increment(key)
+			for area in (self._main, self._window):
+				if key in area:
+					area.move_to_end(key)
+					self.stats.hits += 1
+					return area[key]
+			self.stats.misses += 1
+			return default
+
+	def put(self, key, value):
+		"""Insert <value> at <key> into the window, admitting the entry leaving the window to the main area (or not)."""
+		if self.maxsize <= 0:
+			return
+		with self._lock:
+			if key in self._main:
+				self._main[key] = value
+				self._main.move_to_end(key)
+				return
+			self._window[key] = value
+			self._window.move_to_end(key)
+			if len(self._window) > self._window_size:
+				self._admit(*self._window.popitem(last = False))
+
+	def _admit(self, key, value):
+		"""Decide if <key> leaving the window enters the main area."""
+		if len(self._main) < self._main_size:
+			self._main[key] = value
+			return
+		victim = next(iter(self._main), None)
+		if victim is not None and self.sketch.estimate(key) > self.sketch.estimate(victim):
+			del self._main[victim]
+			self._main[key] = value
+			self.stats.evictions += 1
+		else: # the victim stays, <key> is dropped instead
+			self.stats.rejections += 1
+
+	def discard(self, key):
+		"""Remove <key> from the cache if present."""
+		with self._lock:
+			self._window.pop(key, None)
+			self._main.pop(key, None)
+
+	def clear(self):
+		"""Remove every entry. The counters and the sketch are kept."""
+		with self._lock:
+			self._window.clear()
+			self._main.clear()
+
+	def keys(self) -> list:
+		"""Return a list of the cached keys."""
+		with self._lock:
+			return list(self._main) + list(self._window)
+
+	def items(self) -> list:
+		"""Return the (key, value) pairs, the main area from least to most recently used, then the window."""
+		with self._lock:
+			return list(self._main.items()) + list(self._window.items())
+
+
+# cache policy name -> cache class
+POLICIES = {"lru" : LRUCache, "tinylfu" : TinyLFUCache}
+
+def make_cache(policy : str, maxsize : int):
+	"""
+	Construct an empty cache of <policy> (one of POLICIES) holding at most <maxsize> entries.
+
+	Raises:
+		ValueError --> <policy> is not one of POLICIES.
+	"""
+	if policy not in POLICIES:
+		raise ValueError("unknown cache policy: " + policy + " (one of " + ", ".join(POLICIES) + ")")
+	return POLICIES[policy](maxsize)
+
+def replay(cache, keys) -> CacheStats:
+	"""Replay the lookups of <keys> against <cache>, inserting every missed key, and return its counters."""
+	for key in keys:
+		if cache.get(key) is None:
+			cache.put(key, True)
+	return cache.stats
+
+
+if __name__ == "__main__":
+	file = open(sys.argv[1], "r", encoding = "utf-8")
+	trace = [ line.strip() for line in file if line.strip() ]
+	file.close()
+	maxsize = int(sys.argv[2]) if len(sys.argv) > 2 else 4096
+	for policy in POLICIES:
+		stats = replay(make_cache(policy, maxsize), trace)
+		print(policy + ": " + ", ".join(name + " " + str(round(value, 4)) for (name, value) in stats.as_dict().items()))
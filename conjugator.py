@@ -1,34 +1,270 @@
+""""
+Conjugator
+
+Provides the Conjugator, the entry point for conjugating verbs as a library:
+
+	conjugator = Conjugator()
+	(verb, verb2) = conjugator.conjugate("studovat")
+
+A Conjugator owns the loaded data, its indexes and caches (see engine.EngineState),
+so that all of the expensive setup happens once instead of for every word.
+It is safe to construct once per process and share between threads.
+
+Every conjugation has a status (see conjutils.ConjugationResult): ok, ambiguous (stát, conjugated
+two ways), or rejected as no-match or error, with a reason code. Nothing is printed for rejected words:
+they are counted in Conjugator.rejections, and a word raising an exception never fails a batch.
+
+Run as a script, prompts for infinitives and displays their conjugations, or
+conjugates every verb of the given word lists (see formatters for the output formats),
+across N worker processes with --jobs (see parallel). With --rejects, the rejected words
+are written to a separate file (word, status and reason, tab separated):
+	python3 conjugator.py [--format table|jsonl|csv|tsv] [--perfective] [--jobs N [--ordered]] [--rejects FILE] [word list ...]
+"""
+
 import conjugator_utils as conjutils
+import engine
+import formatters
+import instrumentation
+import argparse
+import sys
+import threading
+
+class Conjugator:
+	"""
+	Conjugates verbs using a shared, fully initialized engine.
+
+	Attributes:
+		state : engine.EngineState --> loaded data, indexes and the classification cache
+		stats : instrumentation.PipelineStats --> where the stage timings are recorded (when enabled)
+		rejections : dict --> (status, reason) -> number of rejected words (see conjutils.REJECTED)
+
+	Methods:
+		conjugate(self, word : str, is_perfective : bool = False) -> tuple
+			conjugate a single word
+		conjugate_result(self, word : str, is_perfective : bool = False) -> conjutils.ConjugationResult
+			conjugate a single word, getting its status
+		conjugate_batch(self, words : list, is_perfective : bool = False) -> list
+			conjugate a list of words, isolating the words that raise
+		conjugate_stream(self, words, is_perfective : bool = False, rejects = None)
+			conjugate words lazily, as they arrive
+		rejection_counts(self) -> dict
+			get a copy of the rejection counters
+		conjugate_form(self, word : str, tense : int, person : int, is_perfective : bool = False) -> str
+			conjugate a single form of a single word
+		pipeline(self, format_name : str = None) -> pipeline.Pipeline
+			get the conjugation flow as a pipeline of batch stages, sharing the state
+		with_overlay(self, overlay : overlay.Overlay) -> Conjugator
+			get a conjugator of a tenant's overlay on top of the shared state
+		add_entries(self, irregular_verbs : list = (), prefix_patterns : list = (), concrete_verbs : list = (), lexicon = None) -> set
+			add data at runtime, updating the indexes, cache and a paradigm lexicon incrementally
+	"""
+	def __init__(self, state : engine.EngineState = None, stats : instrumentation.PipelineStats = None):
+		"""Construct a Conjugator from <state> (default: a freshly built engine.EngineState)."""
+		self.state = state if state is not None else engine.EngineState()
+		self.stats = stats if stats is not None else instrumentation.stats
+		self.rejections = {}
+		self._lock = threading.Lock()
+
+	@classmethod
+	def from_snapshot(cls, path : str, stats : instrumentation.PipelineStats = None):
+		"""Construct a Conjugator from the engine snapshot at <path>, or from scratch if it is invalid or missing."""
+		return cls(engine.EngineState.warm_start(path), stats)
+
+	def conjugate(self, word : str, is_perfective : bool = False) -> tuple:
+		"""
+		Classify, construct and conjugate <word>.
+
+		Return:
+			tuple[v.Verb, v.Verb] --> [0]: the conjugated verb, None if no verb class pattern corresponds with <word>.
+									  [1]: the second conjugation (only for stát), otherwise None.
+		"""
+		timer = self.stats.timer(word)
+		classification = self.state.classify(word, timer)
+		return conjutils.conjugate_classification(word, classification, is_perfective, timer)
+
+	def conjugate_result(self, word : str, is_perfective : bool = False) -> conjutils.ConjugationResult:
+		"""
+		Classify, construct and conjugate <word>, never raising: an exception makes a result of status error.
+
+		Rejected words (no-match or error) are counted in <rejections>.
+		"""
+		try:
+			(verb, verb2) = self.conjugate(word, is_perfective)
+			result = conjutils.conjugation_result(word, verb, verb2)
+		except Exception as error:
+			result = conjutils.error_result(word, error)
+		if result.status in conjutils.REJECTED:
+			with self._lock:
+				self.rejections[(result.status, result.reason)] = self.rejections.get((result.status, result.reason), 0) + 1
+		return result
+
+	def rejection_counts(self) -> dict:
+		"""Return a copy of <rejections>, (status, reason) -> number of rejected words."""
+		with self._lock:
+			return dict(self.rejections)
+
+	def conjugate_batch(self, words : list, is_perfective : bool = False) -> list:
+		"""
+		Conjugate every word in <words>, returning a list of (verb, verb2) tuples in the same order.
+
+		Every distinct word is conjugated once: repeated words share the same (verb, verb2).
+		A word raising an exception is isolated: it gets (None, None) and is counted as rejected (see conjugate_result).
+		"""
+		results = {}
+		for word in words:
+			if word not in results:
+				result = self.conjugate_result(word, is_perfective)
+				results[word] = (result.verb, result.verb2)
+		return [ results[word] for word in words ]
+
+	def conjugate_stream(self, words, is_perfective : bool = False, rejects = None):
+		"""
+		Lazily conjugate the words of iterable <words> (such as the lines of a file).
+
+		Surrounding whitespace is stripped and blank words are skipped. A word raising an exception
+		is isolated as in conjugate_batch().
+
+		Parameters:
+			rejects : callable --> called with the conjutils.ConjugationResult of every rejected word
+		Yield:
+			tuple[str, tuple[v.Verb, v.Verb]] --> the (stripped) word and its conjugation.
+		"""
+		for word in words:
+			word = word.strip()
+			if word:
+				result = self.conjugate_result(word, is_perfective)
+				if rejects is not None and result.status in conjutils.REJECTED:
+					rejects(result)
+				yield (word, (result.verb, result.verb2))
+
+	def conjugate_form(self, word : str, tense : int, person : int, is_perfective : bool = False) -> str:
+		"""
+		Conjugate only the form of <word> at <tense> and <person>.
+
+		Only the stem <tense> needs is worked out and the conjugation table is never filled,
+		which is much cheaper than conjugate() when a single form is wanted.
+		For stát, the form of the first conjugation is returned.
+
+		Parameters:
+			word : str --> the infinitive to conjugate
+			tense : int --> any one of the integer constants defined in IntEnum Tense
+			person : int --> any one of the integer constants defined in IntEnum Person
+		Return:
+			str --> the conjugated form ("" for forms that do not exist, such as the 1st person singular imperative),
+					None if no verb class pattern corresponds with <word>.
+		"""
+		timer = self.stats.timer(word)
+		classification = self.state.classify(word, timer)
+		timer.mark()
+		verb = conjutils.build_verb(word, classification.spec, classification.is_concrete, is_perfective) \
+				if classification.spec else None
+		timer.lap("construct")
+		form = verb.conjugate_at(tense, person) if verb else None
+		timer.lap("conjugate")
+		timer.finish(verb)
+		return form
+
+	def pipeline(self, format_name : str = None):
+		"""
+		Return the conjugation flow as a pipeline.Pipeline of batch stages on the same state (and classification cache),
+		with the stage formatting the verbs as <format_name> if given (see pipeline.default_pipeline).
+		"""
+		import pipeline
+		return pipeline.default_pipeline(self.state, format_name)
+
+	def with_overlay(self, overlay, cache_size : int = None):
+		"""
+		Return a Conjugator consulting <overlay> (an overlay.Overlay) before the data of this one, sharing its
+		indexes and cache (see overlay.LayeredState). It is cheap enough to construct per request.
+		"""
+		import overlay as layers
+		state = layers.LayeredState(self.state, overlay, cache_size if cache_size is not None else layers.DEFAULT_CACHE_SIZE)
+		return Conjugator(state, self.stats)
+
+	def add_entries(self, irregular_verbs : list = (), prefix_patterns : list = (), concrete_verbs : list = (), lexicon = None) -> set:
+		"""
+		Add irregular verbs, prefix patterns and concrete verbs at runtime (see engine.EngineState.add_entries).
+
+		With a precomputed paradigm.ParadigmLexicon <lexicon>, its entries the additions can change are
+		conjugated again, and the infinitives of the irregular verbs are added to it.
+
+		Return:
+			set[str] --> the words whose cached classification or lexicon entry was invalidated and rebuilt.
+		Raises:
+			ValueError --> an irregular verb or prefix pattern is malformed (nothing is added then).
+			TypeError --> the state is an overlay.LayeredState, whose entries are those of its Overlay.
+		"""
+		if not hasattr(self.state, "add_entries"):
+			raise TypeError("cannot add entries to a " + type(self.state).__name__ + ", build a new overlay.Overlay with them instead")
+		irregular_verbs = [ conjutils.parse_irregular(row) for row in irregular_verbs ]
+		(prefix_patterns, concrete_verbs) = (list(prefix_patterns), list(concrete_verbs))
+		affected = self.state.add_entries(irregular_verbs, prefix_patterns, concrete_verbs)
+		if lexicon is not None:
+			words = engine.affected_words(list(lexicon.entries), irregular_verbs, prefix_patterns, concrete_verbs)
+			words.update(verb[conjutils.IrregularIdx.RGX_INFINITIVE] for verb in irregular_verbs)
+			for word in words:
+				lexicon.add(word, self.conjugate(word))
+			affected |= words
+		return affected
+
 
 ############## MAIN PROGRAM ####################
 
-irregular_verbs = conjutils.get_irregular_verbs()
-concrete_verbs = conjutils.get_concrete_verbs()
-prefixes = conjutils.get_prefixes()
-
-while(1):
-	word = input("enter a verb infinitive (or 'q' to quit): ")
-	if word == "q":
-		break
-
-	matches = conjutils.find_verb_matches(word, irregular_verbs)
-	(not_root, root) = conjutils.get_prefix(word, prefixes)
-	is_concrete = conjutils.is_concrete_verb(word, concrete_verbs)
-
-	# TODO: determine if perfective
-	is_perfective = False
-
-	verb = None
-	verb2 = None
-	if matches != []:
-		(verb, verb2) = conjutils.disambiguate_verb(matches, word, root, is_concrete, is_perfective)
-	if not verb:
-		verb = conjutils.determine_verb_class(word, root, is_concrete, is_perfective)
-	if verb:
-		verb.conjugate()
-		# TODO: display the conjugation (prettily)
-		print(verb.get_table())
-
-		if verb2 is not None:
-			verb2.conjugate()
-			print(verb2.get_table())
+def job_count(text : str) -> int:
+	"""Parse the --jobs argument: a number of worker processes, 0 for one per core."""
+	try:
+		jobs = int(text)
+	except ValueError:
+		jobs = -1
+	if jobs < 0:
+		raise argparse.ArgumentTypeError("expected a number of worker processes (0: one per core), got " + repr(text))
+	return jobs
+
+def main(argv : list = None):
+	parser = argparse.ArgumentParser(description = "Conjugate Czech verbs interactively, or every verb of word lists.")
+	parser.add_argument("files", nargs = "*", help = "word lists to conjugate, one infinitive per line ('-' for stdin)")
+	parser.add_argument("--format", default = "table", choices = list(formatters.WRITERS), help = "output format (default table)")
+	parser.add_argument("--perfective", action = "store_true", help = "conjugate the verbs as perfective")
+	parser.add_argument("--jobs", type = job_count, default = 1, help = "worker processes for word lists (0: one per core)")
+	parser.add_argument("--ordered", action = "store_true",
+						help = "with --jobs, keep the input order (otherwise words are written as they complete)")
+	parser.add_argument("--rejects", help = "file to write the rejected words of word lists to (word, status, reason)")
+	args = parser.parse_args(argv)
+
+	rejects = open(args.rejects, "w", encoding = "utf-8") if args.rejects and args.files else None
+	try:
+		if args.files and args.jobs != 1:
+			import parallel
+			parallel.conjugate_files(args.files, sys.stdout, args.format, args.perfective, args.jobs, args.ordered, rejects = rejects)
+			return
+		if args.files:
+			conjugator = Conjugator()
+			writer = formatters.get_writer(args.format, sys.stdout)
+			write_reject = (lambda result: rejects.write(formatters.reject_line(result))) if rejects else None
+			for name in args.files:
+				file = sys.stdin if name == "-" else open(name, "r", encoding = "utf-8")
+				writer.write_all(conjugator.conjugate_stream(file, args.perfective, write_reject))
+				if file is not sys.stdin:
+					file.close()
+			writer.flush()
+			return
+	finally:
+		if rejects is not None:
+			rejects.close()
+
+	conjugator = Conjugator()
+	writer = formatters.get_writer(args.format, sys.stdout)
+
+	while(1):
+		word = input("enter a verb infinitive (or 'q' to quit): ")
+		if word == "q":
+			break
+
+		# TODO: determine if perfective
+		is_perfective = args.perfective
+
+		writer.write(word, conjugator.conjugate(word, is_perfective))
+		writer.flush()
+
+if __name__ == "__main__":
+	main()
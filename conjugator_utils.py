@@ -10,6 +10,8 @@ proper Verb class as well as other other class-agnostic features, which affect t
 import re
 import verbs as v
 import verb_utils as vutils
+import instrumentation
+from collections import namedtuple
 from enum import IntEnum
 import os
 
@@ -22,11 +24,58 @@ class IrregularIdx(IntEnum):
 	#PASSIVE_STEM = 5
 	#TRANSGRESSIVE_STEM = 6
 
+# recipe for constructing a Verb: which class to use, its ending, and the irregular stems (if any)
+VerbSpec = namedtuple("VerbSpec", ["verb_class", "ending", "stems"])
+
+# everything needed to construct a word's Verb(s): its VerbSpec, the VerbSpec of the 2nd conjugation (stát) and concreteness
+Classification = namedtuple("Classification", ["spec", "spec2", "is_concrete"])
+
+# status of a conjugated word (see ConjugationResult)
+STATUS_OK = "ok"
+STATUS_AMBIGUOUS = "ambiguous" # conjugated two ways (stát), verb2 is set
+STATUS_NO_MATCH = "no-match" # rejected: not conjugated
+STATUS_ERROR = "error" # rejected: conjugating the word raised, the reason is the exception's type
+REJECTED = (STATUS_NO_MATCH, STATUS_ERROR)
+
+# reason codes of the statuses but STATUS_ERROR
+REASON_EMPTY = "empty" # blank word
+REASON_NOT_INFINITIVE = "not-infinitive" # does not end in -t like every infinitive
+REASON_NO_VERB_CLASS = "no-verb-class" # no verb class pattern corresponds with the word
+REASON_TWO_CONJUGATIONS = "two-conjugations" # two verbs share the infinitive (stát)
+
+# the conjugation of a word with its status: reason is None if the status is STATUS_OK, error is set with STATUS_ERROR
+ConjugationResult = namedtuple("ConjugationResult", ["word", "status", "reason", "verb", "verb2", "error"])
+
+def conjugation_result(word : str, verb : v.Verb, verb2 : v.Verb) -> ConjugationResult:
+	"""Return the ConjugationResult of <word> conjugated as (<verb>, <verb2>)."""
+	if verb2 is not None:
+		return ConjugationResult(word, STATUS_AMBIGUOUS, REASON_TWO_CONJUGATIONS, verb, verb2, None)
+	if verb:
+		return ConjugationResult(word, STATUS_OK, None, verb, None, None)
+	if not word.strip():
+		reason = REASON_EMPTY
+	elif not word.rstrip().endswith("t"):
+		reason = REASON_NOT_INFINITIVE
+	else:
+		reason = REASON_NO_VERB_CLASS
+	return ConjugationResult(word, STATUS_NO_MATCH, reason, None, None, None)
+
+def error_result(word : str, error : Exception) -> ConjugationResult:
+	"""Return the ConjugationResult of <word> whose conjugation raised <error>."""
+	return ConjugationResult(word, STATUS_ERROR, type(error).__name__, None, None, error)
+
+# data files shipped alongside this module, used whenever VERB_DATA_DIR is not exported
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
 # dictionaries
 int_to_verb_class = { 1 : v.Class1, 2 : v.Class2, 3: v.Class3, 4: v.Class4 }
 consonant_to_class= {"c" : v.Class4_ct, "s" : v.Class4_st, "z" : v.Class4_zt }
 
-def get_irregular_verbs() -> list:
+def get_data_dir() -> str:
+	"""Return the directory holding the data files: VERB_DATA_DIR if exported, otherwise DEFAULT_DATA_DIR."""
+	return os.environ.get("VERB_DATA_DIR", DEFAULT_DATA_DIR)
+
+def get_irregular_verbs(data_dir : str = None) -> list:
 	"""
 	Retrieve the irregular verb constructions from the file and store them as a list of tuples.
 	
@@ -37,10 +86,12 @@ def get_irregular_verbs() -> list:
 	3 (IrregularIdx.PAST_STEM): The irregular verb's past participle stem for past tense and conditional mood conjugations.
 	4 (IrregularIdx.IMPERATIVE_STEM): The irregular verb's imperative stem for imperative mood conjugations.
 
+	Parameters:
+		data_dir (default get_data_dir()) : str --> directory containing irregular.txt
 	Return:
 		list[tuple[str, int, str, str, str]]
 	"""
-	file = open(os.environ["VERB_DATA_DIR"] + "/" + "irregular.txt", "r")
+	file = open((data_dir or get_data_dir()) + "/" + "irregular.txt", "r", encoding = "utf-8")
 	lines = file.readlines()
 	file.close()
 
@@ -52,20 +103,57 @@ def get_irregular_verbs() -> list:
 		verbs.append(verb)
 	return verbs
 
-def get_concrete_verbs() -> list:
+def parse_irregular(row) -> tuple:
+	"""
+	Return the irregular verb-tuple of <row>: a line of irregular.txt ("infinitive,class,present,past,imperative")
+	or a sequence of its five fields.
+
+	Raises:
+		ValueError --> <row> does not have the five fields of IrregularIdx, or an unknown conjugation class.
+	"""
+	fields = row.rstrip("\n").split(",") if isinstance(row, str) else list(row)
+	if len(fields) != len(IrregularIdx):
+		raise ValueError("an irregular verb has " + str(len(IrregularIdx)) + " fields: " + repr(row))
+	try:
+		fields[IrregularIdx.CONJUGATION_CLASS] = int(fields[IrregularIdx.CONJUGATION_CLASS])
+	except ValueError:
+		raise ValueError("the conjugation class is not a number: " + repr(row)) from None
+	if fields[IrregularIdx.CONJUGATION_CLASS] not in int_to_verb_class:
+		raise ValueError("unknown conjugation class: " + repr(row))
+	if not fields[IrregularIdx.RGX_INFINITIVE]:
+		raise ValueError("an irregular verb needs an infinitive: " + repr(row))
+	return tuple(fields)
+
+def get_concrete_verbs(data_dir : str = None) -> list:
 	"""
 	Retrieve the concrete* verbs from file, store as list.
 	*concrete verbs being imperfective verbs with irregular future forms, taking prefix po- or its variant pů-
 
+	Parameters:
+		data_dir (default get_data_dir()) : str --> directory containing concrete.txt
 	Return:
 		list[str]
 	"""
-	file = open(os.environ["VERB_DATA_DIR"] + "/" + "concrete.txt", "r")
+	file = open((data_dir or get_data_dir()) + "/" + "concrete.txt", "r", encoding = "utf-8")
 	lines = file.readlines()
 	file.close()
 	verbs = [ line.rstrip("\n") for line in lines ]
 	return verbs
 
+def get_verbs(data_dir : str = None) -> list:
+	"""
+	Retrieve the lexicon of verb infinitives (verbs.txt) from file, store as list.
+
+	Parameters:
+		data_dir (default get_data_dir()) : str --> directory containing verbs.txt
+	Return:
+		list[str]
+	"""
+	file = open((data_dir or get_data_dir()) + "/" + "verbs.txt", "r", encoding = "utf-8")
+	lines = file.readlines()
+	file.close()
+	return [ line.strip() for line in lines if line.strip() ]
+
 def find_verb_matches(word : str, verbs : list) -> list:
 	"""
 	Return all verb-tuples that end with <word>.
@@ -79,9 +167,62 @@ def find_verb_matches(word : str, verbs : list) -> list:
 		Return:
 			list[tuple[str, int, str, str, str]] --> list of irregular verb-tuples that match the word-ending regex pattern.
 	"""
+	if hasattr(verbs, "find_verb_matches"): # an IrregularIndex, or any index with the same lookup (see overlay)
+		return verbs.find_verb_matches(word)
 	matches = [verb for verb in verbs if re.findall("(" + verb[IrregularIdx.RGX_INFINITIVE] + ")" + "$", word) != []]
 	return matches
 
+class IrregularIndex:
+	"""
+	Suffix index of the irregular verb-tuples, used instead of matching every infinitive regex against a word.
+
+	Infinitives that are plain strings are bucketed by their final letter and compared with str.endswith().
+	Infinitives containing regex syntax are always matched with their regex.
+	Matches are returned in the same order as find_verb_matches(word, verbs) would.
+
+	Attributes:
+		verbs : list[tuple[str, int, str, str, str]] --> the indexed irregular verb-tuples
+
+	Methods:
+		find_verb_matches(self, word : str) -> list
+			same as find_verb_matches(word, verbs)
+		add(self, verb : tuple)
+			index another verb-tuple, after all the others
+	"""
+	_regex_syntax = set("\\.^$*+?{}[]|()")
+
+	def __init__(self, verbs : list):
+		"""Construct the index of irregular verb-tuples <verbs>."""
+		self.verbs = list(verbs)
+		self._buckets = {} # final letter : list of (position, infinitive, verb-tuple)
+		self._patterns = [] # list of (position, compiled regex, verb-tuple)
+		for (position, verb) in enumerate(self.verbs):
+			self._add(position, verb)
+
+	def add(self, verb : tuple):
+		"""Index <verb> after every indexed verb-tuple, as if it were appended to the verb list."""
+		self.verbs.append(verb)
+		self._add(len(self.verbs) - 1, verb)
+
+	def _add(self, position : int, verb : tuple):
+		"""Index <verb> found at <position> in the verb list."""
+		infinitive = verb[IrregularIdx.RGX_INFINITIVE]
+		if infinitive == "" or self._regex_syntax.intersection(infinitive):
+			self._patterns.append((position, re.compile("(" + infinitive + ")" + "$"), verb))
+		else:
+			self._buckets.setdefault(infinitive[-1], []).append((position, infinitive, verb))
+
+	def find_verb_matches(self, word : str) -> list:
+		"""Return all verb-tuples that end with <word>. See find_verb_matches()."""
+		if word[-1:] == "\n": # like $, the regex would have ignored a trailing newline
+			word = word[:-1]
+		matches = [ (position, verb) for (position, infinitive, verb) in self._buckets.get(word[-1:], ())
+												if word.endswith(infinitive) ]
+		if self._patterns:
+			matches += [ (position, verb) for (position, pattern, verb) in self._patterns if pattern.search(word) ]
+			matches.sort(key = lambda match: match[0])
+		return [ verb for (position, verb) in matches ]
+
 def is_concrete_verb(word : str, verbs : list) -> bool:
 	"""Determines if given word is concrete by checking list membership"""
 	non_negative_verb = word[2:] if word[:2] == "ne" else word
@@ -89,25 +230,51 @@ def is_concrete_verb(word : str, verbs : list) -> bool:
 
 def verb_class(word : str, match : tuple, is_concrete : bool = False, is_perfective : bool = False) -> v.Verb:
 	"""Return corresponding base class Verb (Class 1-4 ONLY) from provided <class_num>"""
-	return vutils.get_val_from_dict(int_to_verb_class,
-								 	match[IrregularIdx.CONJUGATION_CLASS])(infinitive = word, stems = match, is_concrete = is_concrete, is_perfective = is_perfective)
+	return build_verb(word, irregular_spec(match), is_concrete, is_perfective)
 
 def construct_verb(word : str, match : tuple, is_concrete : bool = False, is_perfective : bool = False) -> v.Verb:
 	"""Construct a Verb object manually by overwriting stem values from __init__()."""
 	verb = verb_class(word, match, is_concrete, is_perfective)
 	return verb
 
+def irregular_spec(match : tuple) -> VerbSpec:
+	"""Return the VerbSpec of irregular verb-tuple <match> (Class 1-4 ONLY)."""
+	return VerbSpec(vutils.get_val_from_dict(int_to_verb_class, match[IrregularIdx.CONJUGATION_CLASS]), "", match)
+
+def build_verb(word : str, spec : VerbSpec, is_concrete : bool = False, is_perfective : bool = False) -> v.Verb:
+	"""Construct the Verb described by <spec> for <word>."""
+	if spec.stems:
+		return spec.verb_class(infinitive = word, stems = spec.stems, is_concrete = is_concrete, is_perfective = is_perfective)
+	return spec.verb_class(word, spec.ending, is_concrete = is_concrete, is_perfective = is_perfective)
+
 # removes ambiguities in irregular matches and constructs from the correct match
 def disambiguate_verb(match : list , word : str, root : str, is_concrete : bool = False, is_perfective : bool = False) -> tuple:
 	"""
 	Disambiguates between an irregular verb match and a regular verb, constructing the irregular verb.
 	Returns tuple since stát can have 2 conjugations.
 	"""
-	verb = v.Verb()
-	verb2 = None
+	(spec, spec2) = disambiguate_matches(match, word, root)
+	verb = build_verb(word, spec, is_concrete, is_perfective) if spec else None
+	verb2 = build_verb(word, spec2, is_concrete, is_perfective) if spec2 else None
+	return (verb, verb2)
+
+def disambiguate_matches(match : list, word : str, root : str) -> tuple:
+	"""
+	Disambiguates between an irregular verb match and a regular verb without constructing anything.
+
+	Parameters:
+		match : list[tuple[str, int, str, str, str]] --> irregular verb-tuples matching <word> (non-empty).
+		word : str --> the infinitive being conjugated.
+		root : str --> <word> with its prefixes removed.
+	Return:
+		tuple[VerbSpec, VerbSpec] --> [0]: the irregular verb to construct, None if <word> is to be classified as regular.
+									  [1]: the second conjugation (only for stát), otherwise None.
+	"""
+	spec = None
+	spec2 = None
 	m = match[0][IrregularIdx.RGX_INFINITIVE]
 	if m == "být" and word == "být" or word == "nebýt":
-		verb = v.Byt(infinitive = word, is_concrete = is_concrete, is_perfective = is_perfective)
+		spec = VerbSpec(v.Byt, "", ())
 	
 	# cases where the prefix removal got overzealous and they took too much off so there's now a bad root
 	elif ((m == "zát" or m == "zábst") and re.findall("((zát)|(zábst))$", word)) or \
@@ -120,20 +287,20 @@ def disambiguate_verb(match : list , word : str, root : str, is_concrete : bool
 		 ((m == "stat") and ("tat" == root or re.findall("(zůstat)$", word))) or \
 		 ((m == "skákat") and ("kákat" == root or re.findall("(skákat)$", word))) or \
 	     ((m == "vzít") and ("ít" == root or re.findall("(vzít)$", word))):
-		 verb = construct_verb(word, match[0], is_concrete, is_perfective)
+		 spec = irregular_spec(match[0])
 
 	# stát has multiple matches
 	elif ((m == "stat" or re.findall("(((při)|(v))st[aá]t)$", word)) and (root == "tat" or root == "tát")):
 		# construct 1st
-		verb = construct_verb(word, match[0], is_concrete, is_perfective)
+		spec = irregular_spec(match[0])
 	elif m == "stát":
 		if word == "stát" or word == "nestát":
 			# construct both matches
-			verb2 = construct_verb(word, match[1], is_concrete, is_perfective)
-			verb = construct_verb(word, match[0], is_concrete, is_perfective)
+			spec2 = irregular_spec(match[1])
+			spec = irregular_spec(match[0])
 		else:
 			# construct the 2ND match
-			verb = construct_verb(word, match[1], is_concrete, is_perfective)
+			spec = irregular_spec(match[1])
 
 	# regular verbs that have either irregular verb or verb of different class as a substring
 	# (vice versa as well)
@@ -141,81 +308,221 @@ def disambiguate_verb(match : list , word : str, root : str, is_concrete : bool
 	elif(m == "dít" and re.findall("((bz)|[bzr](dít))$", word)) or \
 		(m == "pět") and re.findall("(úpět)$", word) or \
 		(m == "klít") and re.findall("(sklít)$", word):
-	 	verb = None
+	 	spec = None
 	elif (m != root ): # non-exact matches are considered regular and are to be classified.
-		verb = None
+		spec = None
 	else:
-		verb = construct_verb(word, match[0], is_concrete, is_perfective)
-	return (verb, verb2)
+		spec = irregular_spec(match[0])
+	return (spec, spec2)
 
 def determine_verb_class(word : str, root : str, is_concrete : bool = False, is_perfective : bool = False) -> v.Verb:
 	"""Construct the proper Verb class based on the ending of <root> formed from <word>."""
-	verb  = None
+	spec = classify_verb(word, root)
+	return build_verb(word, spec, is_concrete, is_perfective) if spec else None
+
+def classify_verb(word : str, root : str) -> VerbSpec:
+	"""Determine the proper (regular) Verb class and ending of <word> based on the ending of <root>."""
+	spec = None
 
 	# NOTE: all the matches have the [0] subscription to access item in Match object/array
 	# 1. check for -at/-át ending
 	if at_match := re.search("([aá]t)$", word):
 		if (ovat_match := re.search("(ovat)$", word)) and not re.search("chovat$", word):
-			verb = v.Class2_ovat(word, ovat_match[0], is_concrete = is_concrete, is_perfective = is_perfective)
+			spec = VerbSpec(v.Class2_ovat, ovat_match[0], ())
 		elif (apat_match := re.search("([aá][bpmz]at)$", word)) and not re.search("(papat|chlámat)", word):
-			verb = v.Class4_apat(word, apat_match[0], is_concrete = is_concrete, is_perfective = is_perfective)
+			spec = VerbSpec(v.Class4_apat, apat_match[0], ())
 		elif (cluster_at_match := re.search("((" + vutils.consonant + ")+[pvrlhž][áa]t)$", word)) \
 			and not re.search("(hr[áa]t)|([pv]l[aá]t)$", word):
-			verb = v.Class4_cluster(word, cluster_at_match[0], is_concrete = is_concrete, is_perfective = is_perfective)
+			spec = VerbSpec(v.Class4_cluster, cluster_at_match[0], ())
 		elif (long_at_match := re.search("([ltkvsmrř]át)$", word)) and  \
 			 (not re.findall("([tl]kát)|([p]tát)$", word)) and \
 			 (vutils.Syllables(root).is_monosyllabic() == True):
-			verb = v.Class2_at(word, long_at_match[0], is_concrete = is_concrete, is_perfective = is_perfective)
+			spec = VerbSpec(v.Class2_at, long_at_match[0], ())
 		else:
-			verb = v.Class1_at(word, at_match[0], is_concrete = is_concrete, is_perfective = is_perfective)
+			spec = VerbSpec(v.Class1_at, at_match[0], ())
 	
 	# 2. check for -ít/-ýt ending
 	elif ityt_match := re.search("([íý]t)$", word):
 		if (rit_match := re.search("(řít)$", word)) and not re.search("(zřít)$", word):
-			verb = v.Class4_rit(word, rit_match[0], is_concrete = is_concrete, is_perfective = is_perfective)
+			spec = VerbSpec(v.Class4_rit, rit_match[0], ())
 		elif (cluster_match := re.search("((" + vutils.consonant + "){2,}ít)$", root)) \
 			and not re.search("((blít)|(hnít))$", word):
-			verb = v.Class3_cluster(word, cluster_match[0], is_concrete = is_concrete, is_perfective = is_perfective)
+			spec = VerbSpec(v.Class3_cluster, cluster_match[0], ())
 		elif (cluster_match := re.search("((zdít)(znít)|(snít))$", word)):
-			verb = v.Class3_cluster(word, cluster_match[0], is_concrete = is_concrete, is_perfective = is_perfective)
+			spec = VerbSpec(v.Class3_cluster, cluster_match[0], ())
 		else:
-			verb = v.Class2_ityt(word, ityt_match[0], is_concrete = is_concrete, is_perfective = is_perfective)
+			spec = VerbSpec(v.Class2_ityt, ityt_match[0], ())
 	
 	# 3. check for -out ending
 	elif out_match := re.search("(out)$", word):
 		if nout_match := re.search("(nout)$", word):
-			verb = v.Class4_nout(word, nout_match[0], is_concrete = is_concrete, is_perfective = is_perfective)
+			spec = VerbSpec(v.Class4_nout, nout_match[0], ())
 		else:
-			verb = v.Class2_out(word, out_match[0], is_concrete = is_concrete, is_perfective = is_perfective)
+			spec = VerbSpec(v.Class2_out, out_match[0], ())
 	
 	# 4. check for -it/-et/-ět ending
 	elif itet_match := re.search("([ieě]t)$", word):
-		verb = v.Class3_itet(word, itet_match[0], is_concrete = is_concrete, is_perfective = is_perfective)
+		spec = VerbSpec(v.Class3_itet, itet_match[0], ())
 	
 	# 5. check for -ct/-st/-zt endings
 	elif szct_match := re.search("((" + vutils.long_vowel + ")[csz]t)$", word):
 		thematic_consonant = szct_match[0][-2] # get the consonant before the -t
-		verb = (vutils.get_val_from_dict(consonant_to_class, thematic_consonant))(word, szct_match[0], is_concrete = is_concrete, is_perfective = is_perfective)
+		spec = VerbSpec(vutils.get_val_from_dict(consonant_to_class, thematic_consonant), szct_match[0], ())
 	
-	# 6. no match has been found...
+	# 6. no match has been found (see conjugation_result for the reason)...
 	else:
-		print("No verb class pattern corresponding with given verb.")
-		verb = None
-	return verb
+		spec = None
+	return spec
 
-def get_prefixes() -> str:
-	"""Retrieve the prefixes from the file as a single regex expression."""
-	file = open(os.environ["VERB_DATA_DIR"] + "/" + "prefix.txt", "r")
+def get_prefix_patterns(data_dir : str = None) -> list:
+	"""Retrieve the prefix patterns (one regex per line) from the file as a list."""
+	file = open((data_dir or get_data_dir()) + "/" + "prefix.txt", "r", encoding = "utf-8")
 	lines = file.readlines()
 	file.close()
+	return [ line.rstrip("\n") for line in lines ]
 
-	# append each line (excluding the new line) within an OR capture
+def get_prefixes(data_dir : str = None) -> str:
+	"""Retrieve the prefixes from the file as a single regex expression."""
+	return prefixes_expression(get_prefix_patterns(data_dir))
+
+def prefixes_expression(patterns : list) -> str:
+	"""Join the prefix <patterns> into a single regex expression."""
+	# append each pattern within an OR capture
 	prefixes = "^("
-	for line in lines:
-		prefixes += "(" + line[:-1] + ")|"
+	for pattern in patterns:
+		prefixes += "(" + pattern + ")|"
 	prefixes =  prefixes[:-1] + ")" # remove last/redundant "|"
 	return prefixes
 
+def expand_prefix_pattern(pattern : str) -> list:
+	"""
+	Expand a prefix regex <pattern> into every literal prefix it matches.
+
+	Only the subset of regex used by prefix.txt is supported: literal letters,
+	character classes ([oů]) and optional atoms (?). The expansions are listed
+	in the order the regex engine prefers them (greedy optional atoms first).
+
+	Raises:
+		ValueError --> <pattern> uses unsupported regex syntax.
+	"""
+	atoms = [] # list of (choices, optional)
+	idx = 0
+	while idx < len(pattern):
+		letter = pattern[idx]
+		if letter == "[":
+			end = pattern.find("]", idx)
+			choices = list(pattern[idx + 1:end])
+			if end == -1 or choices == [] or choices[0] == "^" or "-" in choices or "\\" in choices:
+				raise ValueError("unsupported character class in prefix pattern: " + pattern)
+			idx = end + 1
+		elif letter in "\\.*+?{}()|^$]":
+			raise ValueError("unsupported regex syntax in prefix pattern: " + pattern)
+		else:
+			choices = [letter]
+			idx += 1
+		optional = idx < len(pattern) and pattern[idx] == "?"
+		if optional:
+			idx += 1
+		atoms.append((choices, optional))
+
+	expansions = [""]
+	for (choices, optional) in atoms:
+		expansions = [expansion + choice for expansion in expansions for choice in choices + ([""] if optional else [])]
+	return [ expansion for expansion in expansions if expansion != "" ]
+
+class PrefixAutomaton:
+	"""
+	Trie of every literal prefix, used instead of the prefix regex expression.
+
+	Each literal is stored with its rank: the position of its pattern in prefix.txt and
+	its regex preference within that pattern. Where several literals match, the
+	lowest rank wins, exactly like the first matching alternative of the regex.
+
+	Attributes:
+		patterns : list[str] --> the prefix patterns the automaton was built from
+		trie : dict --> nested {letter: node} dictionaries, rank stored under the key ""
+
+	Methods:
+		get_prefix(self, word : str) -> tuple
+			same as get_prefix(word, prefixes_expr)
+		add_pattern(self, pattern : str)
+			add the literals of another pattern, ranked after all the others
+	"""
+	def __init__(self, patterns : list, trie : dict = None):
+		"""Construct the automaton from <patterns>, or adopt a prebuilt <trie> of these <patterns>."""
+		self.patterns = list(patterns)
+		self.trie = trie if trie is not None else self._build_trie(self.patterns)
+
+	def add_pattern(self, pattern : str):
+		"""
+		Add the literals of <pattern>, ranked after every literal already in the trie, as if it were appended to <patterns>.
+
+		Raises:
+			ValueError --> <pattern> uses unsupported regex syntax (see expand_prefix_pattern).
+		"""
+		literals = expand_prefix_pattern(pattern)
+		rank = self._max_rank(self.trie) + 1
+		for literal in literals:
+			node = self.trie
+			for letter in literal:
+				node = node.setdefault(letter, {})
+			node.setdefault("", rank)
+			rank += 1
+		self.patterns.append(pattern)
+
+	@staticmethod
+	def _max_rank(trie : dict) -> int:
+		"""Return the highest rank in <trie> (-1 if it is empty)."""
+		highest = -1
+		nodes = [trie]
+		while nodes:
+			node = nodes.pop()
+			for (letter, child) in node.items():
+				if letter == "":
+					highest = max(highest, child)
+				else:
+					nodes.append(child)
+		return highest
+
+	@staticmethod
+	def _build_trie(patterns : list) -> dict:
+		"""Build the trie of all expansions of <patterns>, ranked in regex preference order."""
+		trie = {}
+		rank = 0
+		for pattern in patterns:
+			for literal in expand_prefix_pattern(pattern):
+				node = trie
+				for letter in literal:
+					node = node.setdefault(letter, {})
+				node.setdefault("", rank) # an earlier (better ranked) literal always wins
+				rank += 1
+		return trie
+
+	def _match(self, word : str, start : int) -> int:
+		"""Return the end index of the best ranked prefix at <start> of <word>, or <start> if there is none."""
+		node = self.trie
+		best_rank = None
+		best_end = start
+		idx = start
+		while True:
+			rank = node.get("")
+			if rank is not None and (best_rank is None or rank < best_rank):
+				(best_rank, best_end) = (rank, idx)
+			if idx == len(word):
+				break
+			node = node.get(word[idx])
+			if node is None:
+				break
+			idx += 1
+		return best_end
+
+	def get_prefix(self, word : str) -> tuple:
+		"""Return (prefixes, root) of <word>. See get_prefix()."""
+		start = 0
+		while (end := self._match(word, start)) != start:
+			start = end
+		return (word[:start], word[start:])
+
 
 def get_last_prefix(matches : tuple):
 	"""Return the last non-empty element in tuple <matches>."""
@@ -238,11 +545,14 @@ def get_prefix(word : str, prefixes_expr: str) -> tuple:
 
 	Parameters:
 		word : str --> word to extract the prefixes from.
-		prefixes_expr : str -->  regex expression containing all valid verbal prefixes.
+		prefixes_expr : str -->  regex expression containing all valid verbal prefixes (or their PrefixAutomaton).
 	Return:
 		tuple[str, str] --> [0]: The resulting string from appending all of the consecutively found prefixes in <word>.
 							[1]: The resulting string from removing the found prefixes from <word> within <word> (the root).
 	"""
+	if isinstance(prefixes_expr, PrefixAutomaton):
+		return prefixes_expr.get_prefix(word)
+
 	prefixes = ""
 	prefix = ""
 	root = ""
@@ -256,4 +566,81 @@ def get_prefix(word : str, prefixes_expr: str) -> tuple:
 		prefix = get_last_prefix(found_prefixes)
 		prefixes += prefix
 	root = word
-	return (prefixes, root)
\ No newline at end of file
+	return (prefixes, root)
+
+def conjugate_verb(word : str, irregular_verbs : list, prefixes : str, concrete_verbs : list,
+				   is_perfective : bool = False, stats : instrumentation.PipelineStats = None) -> tuple:
+	"""
+	Classify, construct and conjugate <word> from start to finish.
+
+	Runs the stages in order: find_verb_matches, get_prefix, disambiguate_verb (only with irregular matches),
+	determine_verb_class (only if still unclassified), construction and conjugate, timing each stage
+	with <stats> whenever it is enabled.
+
+	Parameters:
+		word : str --> infinitive to conjugate.
+		irregular_verbs : list[tuple[str, int, str, str, str]] --> irregular verb information.
+		prefixes : str --> regex expression containing all valid verbal prefixes.
+		concrete_verbs : list[str] --> concrete verbs.
+		is_perfective (default False) : bool --> indicator if a verb is perfective
+		stats (default instrumentation.stats) : instrumentation.PipelineStats --> where to record stage timings.
+	Return:
+		tuple[v.Verb, v.Verb] --> [0]: the conjugated verb, None if no verb class pattern corresponds with <word>.
+								  [1]: the second conjugation (only for stát), otherwise None.
+	"""
+	timer = (stats or instrumentation.stats).timer(word)
+	classification = classify_word(word, irregular_verbs, prefixes, concrete_verbs, timer)
+	return conjugate_classification(word, classification, is_perfective, timer)
+
+def classify_word(word : str, irregular_verbs : list, prefixes : str, concrete_verbs : list,
+				  timer : instrumentation.StageTimer = instrumentation.NULL_TIMER) -> Classification:
+	"""
+	Classify <word> without constructing or conjugating anything.
+
+	Runs the stages find_verb_matches, get_prefix, disambiguate_verb (only with irregular matches)
+	and determine_verb_class (only if still unclassified), each timed with <timer>.
+	The parameters are the same as conjugate_verb()'s.
+
+	Return:
+		Classification --> spec is None if no verb class pattern corresponds with <word>.
+	"""
+	matches = find_verb_matches(word, irregular_verbs)
+	timer.lap("find_verb_matches")
+	(not_root, root) = get_prefix(word, prefixes)
+	timer.lap("get_prefix")
+	is_concrete = is_concrete_verb(word, concrete_verbs)
+
+	(spec, spec2) = (None, None)
+	timer.mark()
+	if matches != []:
+		(spec, spec2) = disambiguate_matches(matches, word, root)
+		timer.lap("disambiguate_verb")
+	if not spec:
+		spec = classify_verb(word, root)
+		timer.lap("determine_verb_class")
+	elif timer.tracing: # the verb-tuple used is in the stems (not matches[0] for the 2nd stát), být has none
+		timer.annotate(irregular = (spec.stems or matches[0])[IrregularIdx.RGX_INFINITIVE])
+	if timer.tracing:
+		timer.annotate(root = root, cached = False)
+	return Classification(spec, spec2, is_concrete)
+
+def conjugate_classification(word : str, classification : Classification, is_perfective : bool = False,
+							 timer : instrumentation.StageTimer = instrumentation.NULL_TIMER) -> tuple:
+	"""
+	Construct and conjugate the Verb(s) of <word> from its <classification>, timing both stages with <timer>.
+
+	Return:
+		tuple[v.Verb, v.Verb] --> same as conjugate_verb().
+	"""
+	(spec, spec2, is_concrete) = classification
+	timer.mark()
+	verb = build_verb(word, spec, is_concrete, is_perfective) if spec else None
+	verb2 = build_verb(word, spec2, is_concrete, is_perfective) if spec2 else None
+	timer.lap("construct")
+	if verb:
+		verb.conjugate()
+		if verb2 is not None:
+			verb2.conjugate()
+	timer.lap("conjugate")
+	timer.finish(verb)
+	return (verb, verb2)
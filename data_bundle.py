@@ -0,0 +1,149 @@
+""""
+Data bundle
+
+Provides a packed, checksummed bundle of all the data files (irregular.txt,
+concrete.txt and prefix.txt), already parsed:
+	1. the irregular verb-tuples
+	2. the concrete verbs as a set
+	3. the prefix regex expression and its prefix automaton (trie)
+
+The bundle is loaded with a single read instead of parsing every text file.
+It is shipped in the data directory and is rebuilt with:
+	python3 data_bundle.py [data directory]
+
+Which data is loaded is resolved in this order:
+	1. VERB_DATA_BUNDLE, a path to a custom bundle
+	2. VERB_DATA_DIR, if it points anywhere but the shipped data directory: its text files
+	3. the shipped bundle, unless the shipped text files were edited since it was built
+	4. the shipped text files (if the shipped bundle is missing, corrupt or out of date, with a warning then)
+"""
+
+import conjugator_utils as conjutils
+import hashlib
+import marshal
+import os
+import struct
+import sys
+import warnings
+from collections import namedtuple
+
+BUNDLE_NAME = "verbs.bundle"
+DEFAULT_BUNDLE = os.path.join(conjutils.DEFAULT_DATA_DIR, BUNDLE_NAME)
+SOURCE_FILES = ("irregular.txt", "concrete.txt", "prefix.txt")
+
+# header: magic, format version, sha256 of the payload
+_MAGIC = b"CZVB"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sH32s")
+
+class BundleError(Exception):
+	"""Raised when a bundle cannot be read: wrong magic, format version or checksum."""
+	pass
+
+# everything the conjugator needs from the data files
+VerbData = namedtuple("VerbData", ["irregular_verbs", "concrete_verbs", "prefixes", "prefix_automaton", "checksum"])
+
+
+def source_checksum(data_dir : str) -> str:
+	"""Return the sha256 hex digest of the text data files in <data_dir>."""
+	digest = hashlib.sha256()
+	for name in SOURCE_FILES:
+		file = open(data_dir + "/" + name, "rb")
+		digest.update(name.encode() + b"\0" + file.read() + b"\0")
+		file.close()
+	return digest.hexdigest()
+
+def load_text(data_dir : str) -> VerbData:
+	"""Parse the text data files in <data_dir>."""
+	patterns = conjutils.get_prefix_patterns(data_dir)
+	try:
+		automaton = conjutils.PrefixAutomaton(patterns)
+	except ValueError: # custom prefixes the automaton cannot express keep using the regex
+		automaton = None
+	return VerbData(conjutils.get_irregular_verbs(data_dir), frozenset(conjutils.get_concrete_verbs(data_dir)),
+					conjutils.prefixes_expression(patterns), automaton, source_checksum(data_dir))
+
+def pack(data : VerbData) -> bytes:
+	"""Pack <data> into bundle bytes."""
+	automaton = data.prefix_automaton
+	payload = marshal.dumps({
+		"irregular_verbs" : [ tuple(verb) for verb in data.irregular_verbs ],
+		"concrete_verbs" : sorted(data.concrete_verbs),
+		"prefixes" : data.prefixes,
+		"prefix_patterns" : automaton.patterns if automaton else None,
+		"prefix_trie" : automaton.trie if automaton else None,
+		"checksum" : data.checksum,
+	}, 4) # marshal format 4 is readable by every supported python version
+	return _HEADER.pack(_MAGIC, FORMAT_VERSION, hashlib.sha256(payload).digest()) + payload
+
+def unpack(raw : bytes) -> VerbData:
+	"""
+	Unpack bundle bytes <raw>, verifying its header and checksum.
+
+	Raises:
+		BundleError --> <raw> is not a valid bundle.
+	"""
+	if len(raw) < _HEADER.size:
+		raise BundleError("truncated data bundle")
+	(magic, version, digest) = _HEADER.unpack_from(raw)
+	if magic != _MAGIC or version != FORMAT_VERSION:
+		raise BundleError("not a data bundle of format version " + str(FORMAT_VERSION))
+	payload = raw[_HEADER.size:]
+	if hashlib.sha256(payload).digest() != digest:
+		raise BundleError("data bundle checksum mismatch")
+	data = marshal.loads(payload)
+	automaton = None
+	if data["prefix_trie"] is not None:
+		automaton = conjutils.PrefixAutomaton(data["prefix_patterns"], data["prefix_trie"])
+	return VerbData(data["irregular_verbs"], frozenset(data["concrete_verbs"]), data["prefixes"], automaton, data["checksum"])
+
+def read_bundle(path : str) -> VerbData:
+	"""Read the bundle at <path> (a single read)."""
+	file = open(path, "rb")
+	raw = file.read()
+	file.close()
+	return unpack(raw)
+
+def write_bundle(data : VerbData, path : str):
+	"""Write <data> as a bundle to <path>, atomically replacing any existing file."""
+	tmp_path = path + ".tmp"
+	file = open(tmp_path, "wb")
+	file.write(pack(data))
+	file.close()
+	os.replace(tmp_path, path)
+
+def build_bundle(data_dir : str = conjutils.DEFAULT_DATA_DIR, path : str = None) -> VerbData:
+	"""Parse the text files of <data_dir> and write them as a bundle to <path> (default: <data_dir>/verbs.bundle)."""
+	data = load_text(data_dir)
+	write_bundle(data, path or os.path.join(data_dir, BUNDLE_NAME))
+	return data
+
+def _is_default_data_dir(data_dir : str) -> bool:
+	"""Determine if <data_dir> is the shipped data directory."""
+	return os.path.realpath(data_dir) == os.path.realpath(conjutils.DEFAULT_DATA_DIR)
+
+def load_data() -> VerbData:
+	"""Load the data, resolved as described in the module docstring."""
+	if "VERB_DATA_BUNDLE" in os.environ:
+		return read_bundle(os.environ["VERB_DATA_BUNDLE"])
+	data_dir = os.environ.get("VERB_DATA_DIR")
+	if data_dir and not _is_default_data_dir(data_dir):
+		return load_text(data_dir)
+	try:
+		data = read_bundle(DEFAULT_BUNDLE)
+	except (OSError, BundleError):
+		return load_text(conjutils.DEFAULT_DATA_DIR)
+	try:
+		checksum = source_checksum(conjutils.DEFAULT_DATA_DIR)
+	except OSError: # only the bundle is shipped
+		return data
+	if data.checksum != checksum:
+		warnings.warn(DEFAULT_BUNDLE + " is out of date with the text files, which are loaded instead (rebuild it: python3 data_bundle.py)")
+		return load_text(conjutils.DEFAULT_DATA_DIR)
+	return data
+
+
+if __name__ == "__main__":
+	data_dir = sys.argv[1] if len(sys.argv) > 1 else conjutils.DEFAULT_DATA_DIR
+	data = build_bundle(data_dir)
+	print("wrote " + os.path.join(data_dir, BUNDLE_NAME) + " (" + data.checksum + ")")
@@ -0,0 +1,316 @@
+""""
+Engine
+
+Provides EngineState: everything that is expensive to set up before the first
+word can be conjugated, built once and shared:
+	1. the loaded data (see data_bundle)
+	2. the built indexes: the irregular suffix index and the prefix automaton
+	3. the classification cache (word -> conjutils.Classification), by default behind a
+	   frequency-based admission policy so that scans do not evict the hot words (see cache.TinyLFUCache)
+
+Irregular verbs, prefix patterns and concrete verbs can be added at runtime (see EngineState.add_entries):
+the indexes are updated in place and only the cached classifications of the words the additions
+can change are invalidated (see affected_words). Additions are kept by snapshots, not written to the data files.
+
+An EngineState can be saved to a snapshot file and restored from it, so that
+a fresh process starts with warm indexes and caches. A snapshot is rejected
+(SnapshotError) if it was made from different data or a different version of the code.
+Snapshots are pickles: only restore snapshots you wrote yourself.
+"""
+
+import conjugator_utils as conjutils
+import data_bundle
+import instrumentation
+import copy
+import hashlib
+import os
+import pickle
+import threading
+import cache
+
+DEFAULT_CACHE_SIZE = 8192
+DEFAULT_CACHE_POLICY = "tinylfu" # see cache.POLICIES
+
+# modules whose source determines the classifications, and thus whether a snapshot is still valid
+CODE_MODULES = ("verbs.py", "verb_utils.py", "conjugator_utils.py", "engine.py")
+_MAGIC = b"CZVS"
+_PICKLE_PROTOCOL = 4
+
+class SnapshotError(Exception):
+	"""Raised when a snapshot cannot be restored: not a snapshot, or made from other data/code."""
+	pass
+
+_code_version = None
+def code_version() -> str:
+	"""Return the sha256 hex digest of the source of CODE_MODULES."""
+	global _code_version
+	if _code_version is None:
+		digest = hashlib.sha256()
+		for name in CODE_MODULES:
+			file = open(os.path.join(os.path.dirname(os.path.abspath(__file__)), name), "rb")
+			digest.update(file.read())
+			file.close()
+		_code_version = digest.hexdigest()
+	return _code_version
+
+
+def affected_words(words, irregular_verbs : list = (), prefix_patterns : list = (), concrete_verbs = ()) -> set:
+	"""
+	Determine which of <words> may classify differently once the given irregular verbs, prefix patterns
+	or concrete verbs are added (or removed).
+
+	The result is conservative: it contains every word whose classification changes,
+	and possibly some whose classification does not.
+		1. irregular verb-tuples : the words ending in their infinitive (same suffix matching as find_verb_matches)
+		2. prefix patterns : the words containing any literal they expand to (get_prefix splits on these)
+		3. concrete verbs : the verbs and their negations
+
+	Raises:
+		ValueError --> a prefix pattern uses unsupported regex syntax (see conjutils.expand_prefix_pattern).
+	"""
+	affected = set()
+	if irregular_verbs:
+		index = conjutils.IrregularIndex(irregular_verbs)
+		affected.update(word for word in words if index.find_verb_matches(word))
+	if prefix_patterns:
+		literals = set()
+		for pattern in prefix_patterns:
+			literals.update(conjutils.expand_prefix_pattern(pattern))
+		affected.update(word for word in words if any(literal in word for literal in literals))
+	if concrete_verbs:
+		affected.update(word for word in words if conjutils.is_concrete_verb(word, concrete_verbs))
+	return affected
+
+
+class EngineState:
+	"""
+	Loaded data, built indexes and the classification cache of the conjugator.
+
+	Attributes:
+		data : data_bundle.VerbData --> the loaded data
+		irregular_index : conjutils.IrregularIndex --> suffix index of the irregular verb-tuples
+		prefixes : conjutils.PrefixAutomaton --> prefix automaton (the regex expression if the prefixes cannot be expressed as one)
+		concrete_verbs : set[str] --> the concrete verbs
+		classifications : cache.TinyLFUCache/cache.LRUCache --> word -> conjutils.Classification
+		cache_policy : str --> the policy of the classification cache (see cache.POLICIES)
+		generation : int --> incremented by add_entries(), classifications started before are not cached
+		additions : list[tuple[list, list, list]] --> the (irregular_verbs, prefix_patterns, concrete_verbs) of every add_entries()
+
+	Methods:
+		classify(self, word : str, timer = instrumentation.NULL_TIMER) -> conjutils.Classification
+			classify a word, using the cache
+		put_classification(self, word : str, classification : conjutils.Classification, generation : int) -> bool
+			cache a classification, unless entries were added since it was started
+		warm(self, words : list)
+			classify every word in advance
+		add_entries(self, irregular_verbs : list = (), prefix_patterns : list = (), concrete_verbs : list = ()) -> set
+			add data at runtime, invalidating the affected cached classifications
+		hand_over(self, successor : EngineState)
+			add the additions to the state replacing this one, and forward the later ones to it
+		cache_stats(self) -> dict
+			get the counters and hit ratio of the classification cache
+		save_snapshot(self, path : str, include_cache : bool = True)
+			write the state to a snapshot file
+		load_snapshot(path : str, data : data_bundle.VerbData = None) -> EngineState
+			restore a state from a snapshot file
+		warm_start(path : str, data : data_bundle.VerbData = None) -> EngineState
+			restore from a snapshot file if possible, otherwise build the state from scratch
+	"""
+	def __init__(self, data : data_bundle.VerbData = None, cache_size : int = DEFAULT_CACHE_SIZE,
+				 cache_policy : str = DEFAULT_CACHE_POLICY):
+		"""Build the indexes of <data> (default data_bundle.load_data()) and an empty <cache_policy> cache of <cache_size> entries."""
+		self.data = data if data is not None else data_bundle.load_data()
+		self.irregular_index = conjutils.IrregularIndex(self.data.irregular_verbs)
+		automaton = self.data.prefix_automaton
+		# own copies of the automaton and concrete verbs, as add_entries() changes them in place
+		self.prefixes = conjutils.PrefixAutomaton(automaton.patterns, copy.deepcopy(automaton.trie)) if automaton else self.data.prefixes
+		self.concrete_verbs = set(self.data.concrete_verbs)
+		self.cache_policy = cache_policy
+		self.classifications = cache.make_cache(cache_policy, cache_size)
+		self.generation = 0
+		self.additions = []
+		self._successor = None # set by hand_over()
+		self._lock = threading.Lock()
+
+	def classify(self, word : str, timer : instrumentation.StageTimer = instrumentation.NULL_TIMER) -> conjutils.Classification:
+		"""Return the classification of <word>, classifying it (with the stages timed by <timer>) on a cache miss."""
+		classification = self.classifications.get(word)
+		if classification is None:
+			generation = self.generation
+			classification = conjutils.classify_word(word, self.irregular_index, self.prefixes, self.concrete_verbs, timer)
+			self.put_classification(word, classification, generation)
+		elif timer.tracing:
+			timer.annotate(cached = True)
+		return classification
+
+	def put_classification(self, word : str, classification : conjutils.Classification, generation : int) -> bool:
+		"""
+		Cache <classification> of <word>, started at <generation>, unless entries were added meanwhile (it may be stale then).
+
+		Return:
+			bool --> whether it was cached.
+		"""
+		with self._lock: # add_entries() cannot land between the check and the put
+			if generation != self.generation:
+				return False
+			self.classifications.put(word, classification)
+			return True
+
+	def warm(self, words : list):
+		"""Classify every word in <words> ahead of time, filling the classification cache."""
+		for word in words:
+			self.classify(word)
+
+	def add_entries(self, irregular_verbs : list = (), prefix_patterns : list = (), concrete_verbs : list = ()) -> set:
+		"""
+		Add data at runtime, as if it were appended to the data files, updating the indexes in place.
+
+		Only the cached classifications of the words the additions can change are invalidated (see affected_words).
+		Words being classified meanwhile are classified with or without the additions, but never cached stale.
+		Once the state was handed over (see hand_over), the additions go to its successor.
+
+		Parameters:
+			irregular_verbs : list --> irregular verb-tuples or lines of irregular.txt (see conjutils.parse_irregular),
+									   matched after those already indexed
+			prefix_patterns : list[str] --> prefix patterns (lines of prefix.txt), ranked after those already known
+			concrete_verbs : list[str] --> concrete verbs
+		Return:
+			set[str] --> the words whose cached classification was invalidated.
+		Raises:
+			ValueError --> an irregular verb is malformed, or a prefix pattern uses unsupported regex syntax
+						   (nothing is added then).
+		"""
+		irregular_verbs = [ conjutils.parse_irregular(row) for row in irregular_verbs ]
+		prefix_patterns = list(prefix_patterns)
+		for pattern in prefix_patterns:
+			conjutils.expand_prefix_pattern(pattern) # validate all of them before adding any
+		with self._lock:
+			successor = self._successor
+			if successor is None:
+				return self._add_entries(irregular_verbs, prefix_patterns, list(concrete_verbs))
+		return successor.add_entries(irregular_verbs, prefix_patterns, concrete_verbs)
+
+	def _add_entries(self, irregular_verbs : list, prefix_patterns : list, concrete_verbs : list) -> set:
+		"""Add the (validated) entries, holding the lock."""
+		for verb in irregular_verbs:
+			self.irregular_index.add(verb)
+		for pattern in prefix_patterns:
+			if isinstance(self.prefixes, conjutils.PrefixAutomaton):
+				self.prefixes.add_pattern(pattern)
+			else:
+				self.prefixes = self.prefixes[:-1] + "|(" + pattern + "))"
+		self.concrete_verbs.update(concrete_verbs)
+		self.additions.append((irregular_verbs, prefix_patterns, concrete_verbs))
+		self.generation += 1
+		affected = affected_words([ word for (word, classification) in self.classifications.items() ],
+								  irregular_verbs, prefix_patterns, concrete_verbs)
+		for word in affected:
+			self.classifications.discard(word)
+		return affected
+
+	def hand_over(self, successor):
+		"""
+		Add every addition of this state to <successor>, the state about to replace it (such as on a reload, see reload.Reloader),
+		then forward the later add_entries() to it, so that none is lost between the two.
+		Entries <successor> already has (such as those since written to the data files) are not added twice.
+		"""
+		with self._lock:
+			for (irregular_verbs, prefix_patterns, concrete_verbs) in self.additions:
+				(known_verbs, known_patterns) = (set(successor.irregular_index.verbs), set(getattr(successor.prefixes, "patterns", ())))
+				successor.add_entries([ verb for verb in irregular_verbs if verb not in known_verbs ],
+									  [ pattern for pattern in prefix_patterns if pattern not in known_patterns ], concrete_verbs)
+			self._successor = successor
+
+	def cache_stats(self) -> dict:
+		"""Return the counters and hit ratio of the classification cache (see cache.CacheStats.as_dict)."""
+		return self.classifications.stats.as_dict()
+
+	def save_snapshot(self, path : str, include_cache : bool = True):
+		"""
+		Write the state to the snapshot file <path>, atomically replacing any existing file.
+
+		Parameters:
+			path : str --> where to write the snapshot
+			include_cache (default True) : bool --> whether the cached classifications are saved too
+		"""
+		header = {"code_version" : code_version(), "data_checksum" : self.data.checksum}
+		state = {
+			"data" : self.data,
+			"irregular_index" : self.irregular_index,
+			"prefixes" : self.prefixes,
+			"concrete_verbs" : self.concrete_verbs,
+			"additions" : self.additions,
+			"cache_size" : self.classifications.maxsize,
+			"cache_policy" : self.cache_policy,
+			"classifications" : self.classifications.items() if include_cache else [],
+		}
+		tmp_path = path + ".tmp"
+		file = open(tmp_path, "wb")
+		file.write(_MAGIC)
+		pickle.dump(header, file, _PICKLE_PROTOCOL)
+		pickle.dump(state, file, _PICKLE_PROTOCOL)
+		file.close()
+		os.replace(tmp_path, path)
+
+	@classmethod
+	def load_snapshot(cls, path : str, data : data_bundle.VerbData = None):
+		"""
+		Restore a state from the snapshot file <path>.
+
+		Parameters:
+			path : str --> the snapshot file
+			data (default data_bundle.load_data()) : data_bundle.VerbData --> the data the snapshot must have been made from
+		Raises:
+			SnapshotError --> <path> is not a snapshot, or was made from other data or code
+		"""
+		file = open(path, "rb")
+		try:
+			if file.read(len(_MAGIC)) != _MAGIC:
+				raise SnapshotError(path + " is not an engine snapshot")
+			header = pickle.load(file)
+			if header["code_version"] != code_version():
+				raise SnapshotError(path + " was made by a different version of the code")
+			checksum = (data if data is not None else data_bundle.load_data()).checksum
+			if header["data_checksum"] != checksum:
+				raise SnapshotError(path + " was made from different data")
+			state = pickle.load(file)
+		except (pickle.UnpicklingError, EOFError, KeyError) as error:
+			raise SnapshotError(path + " is corrupt: " + str(error))
+		finally:
+			file.close()
+
+		engine = cls.__new__(cls)
+		engine.data = state["data"]
+		engine.irregular_index = state["irregular_index"]
+		engine.prefixes = state["prefixes"]
+		engine.concrete_verbs = state["concrete_verbs"]
+		engine.cache_policy = state["cache_policy"]
+		engine.classifications = cache.make_cache(engine.cache_policy, state["cache_size"])
+		engine.generation = 0
+		engine.additions = state["additions"]
+		engine._successor = None
+		engine._lock = threading.Lock()
+		for (word, classification) in state["classifications"]:
+			engine.classifications.put(word, classification)
+		return engine
+
+	@classmethod
+	def warm_start(cls, path : str, data : data_bundle.VerbData = None):
+		"""Restore a state from the snapshot file <path>, or build it from <data> if there is no valid snapshot."""
+		data = data if data is not None else data_bundle.load_data()
+		try:
+			return cls.load_snapshot(path, data)
+		except (OSError, SnapshotError):
+			return cls(data)
+
+
+if __name__ == "__main__":
+	# usage: python3 engine.py <snapshot path> [word list to warm the cache with]...
+	import sys
+	engine = EngineState()
+	for name in sys.argv[2:]:
+		file = open(name, "r", encoding = "utf-8")
+		engine.warm([ line.strip() for line in file if line.strip() ])
+		file.close()
+	engine.save_snapshot(sys.argv[1])
+	print("wrote " + sys.argv[1] + " (" + str(len(engine.classifications)) + " cached classifications)")
@@ -0,0 +1,161 @@
+""""
+Formatters
+
+Provides streaming writers for conjugations, (verb, verb2) as returned by
+Conjugator.conjugate(), in the following formats:
+	1. jsonl : one JSON object per word, the same records as the golden corpus (see golden.record)
+	2. csv : one row per word, conjugation and tense, with a column per person
+	3. tsv : same as csv, tab separated
+	4. table : an aligned, human-readable table per conjugation
+	5. paradigm : the compact paradigm wire format, each paradigm's templates once and
+	   only the paradigm id and stems per conjugation (see wire for the format and its decoder)
+
+Every word is written to the file object as soon as it is given, nothing is
+collected in memory. The header texts are built once, when this module is imported.
+"""
+
+import verbs as v
+import paradigm
+import csv
+import json
+
+# header texts
+TENSE_NAMES = tuple(tense.name.lower() for tense in v.Tense)
+PERSON_NAMES = ("1sg", "2sg", "3sg", "1pl", "2pl", "3pl")
+COLUMNS = ("word", "kind", "tense") + PERSON_NAMES
+_NO_MATCH_ROW = ("",) * (len(COLUMNS) - 1)
+_NO_MATCH_TEXT = ": no verb class pattern corresponding with given verb\n\n"
+
+def to_record(word : str, verbs) -> dict:
+	"""Return the JSON record of <word> conjugated as <verbs> (verb, verb2), None entries are left out."""
+	return {"word" : word, "verbs" : [ {"kind" : verb.kind(), "table" : verb.get_table()} for verb in verbs if verb ]}
+
+class Writer:
+	"""
+	Base class of the streaming writers.
+
+	Attributes:
+		file : file object --> where the conjugations are written (text mode)
+		count : int --> number of words written
+
+	Methods:
+		write(self, word : str, result : tuple)
+			write the conjugation (verb, verb2) of a word
+		write_all(self, results) -> int
+			write every (word, (verb, verb2)) of an iterable, such as Conjugator.conjugate_stream()
+		flush(self)
+			flush the file object
+	"""
+	def __init__(self, file, header : bool = True):
+		"""Construct a writer to text file object <file>, writing the header (if the format has one and <header> is set)."""
+		self.file = file
+		self.count = 0
+
+	def write(self, word : str, result : tuple):
+		"""Write <result>, the conjugation (verb, verb2) of <word>."""
+		self._write(word, [ verb for verb in result if verb ])
+		self.count += 1
+
+	def _write(self, word : str, verbs : list):
+		"""Write the conjugated <verbs> of <word> (empty without a match). Implemented by every format."""
+		raise NotImplementedError
+
+	def write_all(self, results) -> int:
+		"""Write every (word, (verb, verb2)) of iterable <results>, returning the number of words written."""
+		write = self.write
+		for (word, result) in results:
+			write(word, result)
+		return self.count
+
+	def flush(self):
+		"""Flush the file object."""
+		self.file.flush()
+
+class JsonlWriter(Writer):
+	"""Writes one JSON object per word: {"word": str, "verbs": [{"kind": str, "table": list}]}."""
+	def _write(self, word : str, verbs : list):
+		self.file.write(json.dumps(to_record(word, verbs), ensure_ascii = False) + "\n")
+
+class CsvWriter(Writer):
+	"""Writes a row per word, conjugation and tense: word, kind, tense and a column per person (see COLUMNS)."""
+	dialect = "excel"
+
+	def __init__(self, file, header : bool = True):
+		super().__init__(file, header)
+		self._writer = csv.writer(file, self.dialect, lineterminator = "\n")
+		if header:
+			self._writer.writerow(COLUMNS)
+
+	def _write(self, word : str, verbs : list):
+		if not verbs:
+			self._writer.writerow((word,) + _NO_MATCH_ROW)
+			return
+		self._writer.writerows((word, verb.kind(), tense_name) + tuple(row)
+							   for verb in verbs for (tense_name, row) in zip(TENSE_NAMES, verb.get_table()))
+
+class TsvWriter(CsvWriter):
+	"""Same as CsvWriter, tab separated."""
+	dialect = "excel-tab"
+
+class TableWriter(Writer):
+	"""
+	Writes an aligned table per conjugation: a row per person and a column per tense,
+	under a "word (kind)" title line.
+	"""
+	def _write(self, word : str, verbs : list):
+		if not verbs:
+			self.file.write(word + _NO_MATCH_TEXT)
+			return
+		lines = []
+		for verb in verbs:
+			table = verb.get_table()
+			widths = [ max(len(TENSE_NAMES[tense]), *map(len, row)) for (tense, row) in enumerate(table) ]
+			lines.append(word + " (" + verb.kind() + ")")
+			lines.append("    " + "  ".join(name.ljust(width) for (name, width) in zip(TENSE_NAMES, widths)).rstrip())
+			for person in range(len(PERSON_NAMES)):
+				cells = "  ".join(row[person].ljust(width) for (row, width) in zip(table, widths))
+				lines.append(PERSON_NAMES[person] + " " + cells.rstrip())
+			lines.append("")
+		self.file.write("\n".join(lines) + "\n")
+
+class ParadigmWriter(Writer):
+	"""
+	Writes the paradigm wire format (see wire): a ["p", id, kind, templates] line before the first
+	conjugation of every paradigm, then ["w", word, [id, stem, stem, stem, stem], ...] per word.
+
+	Attributes:
+		table : paradigm.ParadigmTable --> the paradigms written so far, numbered by id
+	"""
+	def __init__(self, file, header : bool = True):
+		super().__init__(file, header)
+		self.table = paradigm.ParadigmTable()
+
+	def _write(self, word : str, verbs : list):
+		defined = len(self.table)
+		conjugations = [ self.table.compress(verb) for verb in verbs ]
+		lines = [ _compact_json(["p", paradigm_id, self.table.kind(paradigm_id), self.table.paradigms[paradigm_id].templates])
+				  for paradigm_id in range(defined, len(self.table)) ]
+		lines.append(_compact_json(["w", word] + [ [paradigm_id, *stems] for (paradigm_id, stems) in conjugations ]))
+		self.file.write("\n".join(lines) + "\n")
+
+def _compact_json(value) -> str:
+	"""Encode <value> as JSON without any insignificant whitespace."""
+	return json.dumps(value, ensure_ascii = False, separators = (",", ":"))
+
+def reject_line(result) -> str:
+	"""Return the line of a rejected word (see conjutils.ConjugationResult): its word, status and reason, tab separated."""
+	return result.word + "\t" + result.status + "\t" + result.reason + "\n"
+
+# output format -> writer class
+WRITERS = {"jsonl" : JsonlWriter, "csv" : CsvWriter, "tsv" : TsvWriter, "table" : TableWriter, "paradigm" : ParadigmWriter}
+
+def get_writer(format_name : str, file, header : bool = True) -> Writer:
+	"""
+	Construct the writer of <format_name> to text file object <file>, writing the header unless <header> is unset.
+
+	Raises:
+		ValueError --> <format_name> is not one of WRITERS.
+	"""
+	if format_name not in WRITERS:
+		raise ValueError("unknown output format: " + format_name + " (one of " + ", ".join(WRITERS) + ")")
+	return WRITERS[format_name](file, header)
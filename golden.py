@@ -0,0 +1,156 @@
+""""
+Golden corpus
+
+Provides a frozen snapshot ("golden corpus") of the conjugator's output for every verb
+in verbs.txt and every infinitive in irregular.txt: the kind() and full table of
+each conjugation (both of them for stát), and a differential checker comparing any
+candidate engine against it, in parallel across all cores.
+
+A candidate engine is given as "module:callable": calling it must return an object
+with a conjugate(word) method returning (verb, verb2) like conjugator.Conjugator.
+
+	python3 golden.py check [--engine module:callable] [--jobs N] [--golden path]
+	python3 golden.py freeze [--engine module:callable] [--golden path]
+
+Only freeze after a change of output has been reviewed: the corpus is the evidence
+that optimizations of the engine do not change any conjugation.
+"""
+
+import conjugator_utils as conjutils
+import argparse
+import contextlib
+import gzip
+import importlib
+import io
+import json
+import multiprocessing
+import os
+import sys
+from collections import namedtuple
+
+DEFAULT_GOLDEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test", "golden.jsonl.gz")
+DEFAULT_ENGINE = "conjugator:Conjugator"
+_CHUNK_SIZE = 64
+
+# a single differing cell (tense/person are None if the kind or number of conjugations differ)
+Mismatch = namedtuple("Mismatch", ["word", "verb_idx", "tense", "person", "expected", "actual"])
+
+def golden_words(data_dir : str = conjutils.DEFAULT_DATA_DIR) -> list:
+	"""Return every verb of verbs.txt followed by every infinitive of irregular.txt, without duplicates."""
+	words = conjutils.get_verbs(data_dir)
+	words += [ verb[conjutils.IrregularIdx.RGX_INFINITIVE] for verb in conjutils.get_irregular_verbs(data_dir) ]
+	return list(dict.fromkeys(words))
+
+def load_engine(spec : str):
+	"""Construct the engine named by "module:callable" <spec>."""
+	(module_name, _, attribute) = spec.partition(":")
+	factory = importlib.import_module(module_name)
+	for name in attribute.split("."):
+		factory = getattr(factory, name)
+	return factory()
+
+def record(word : str, result : tuple) -> dict:
+	"""Return the golden record of <word> from its conjugation <result>: (verb, verb2)."""
+	return {"word" : word, "verbs" : [ {"kind" : verb.kind(), "table" : verb.get_table()} for verb in result if verb ]}
+
+def conjugate_records(engine, words : list) -> list:
+	"""Return the golden records of <words> conjugated by <engine>, silencing anything it prints."""
+	with contextlib.redirect_stdout(io.StringIO()):
+		return [ record(word, engine.conjugate(word)) for word in words ]
+
+def write_golden(records : list, path : str = DEFAULT_GOLDEN):
+	"""Write <records> (one JSON object per line, gzipped) to <path>."""
+	file = gzip.open(path, "wt", encoding = "utf-8")
+	for entry in records:
+		file.write(json.dumps(entry, ensure_ascii = False) + "\n")
+	file.close()
+
+def read_golden(path : str = DEFAULT_GOLDEN) -> list:
+	"""Read the records of the golden corpus at <path>."""
+	file = gzip.open(path, "rt", encoding = "utf-8")
+	records = [ json.loads(line) for line in file ]
+	file.close()
+	return records
+
+def freeze(engine_spec : str = DEFAULT_ENGINE, path : str = DEFAULT_GOLDEN) -> int:
+	"""Conjugate every golden word with the engine named by <engine_spec> and write the corpus to <path>."""
+	records = conjugate_records(load_engine(engine_spec), golden_words())
+	write_golden(records, path)
+	return len(records)
+
+def compare(expected : dict, actual : dict) -> list:
+	"""Return the Mismatches between the <expected> and <actual> record of the same word."""
+	word = expected["word"]
+	mismatches = []
+	if len(expected["verbs"]) != len(actual["verbs"]):
+		return [ Mismatch(word, None, None, None, len(expected["verbs"]), len(actual["verbs"])) ]
+	for (idx, (expected_verb, actual_verb)) in enumerate(zip(expected["verbs"], actual["verbs"])):
+		if expected_verb["kind"] != actual_verb["kind"]:
+			mismatches.append(Mismatch(word, idx, None, None, expected_verb["kind"], actual_verb["kind"]))
+		for (tense, (expected_row, actual_row)) in enumerate(zip(expected_verb["table"], actual_verb["table"])):
+			for (person, (expected_cell, actual_cell)) in enumerate(zip(expected_row, actual_row)):
+				if expected_cell != actual_cell:
+					mismatches.append(Mismatch(word, idx, tense, person, expected_cell, actual_cell))
+	return mismatches
+
+# per worker process engine, see _init_worker
+_worker_engine = None
+
+def _init_worker(engine_spec : str):
+	global _worker_engine
+	_worker_engine = load_engine(engine_spec)
+
+def _check_chunk(expected : list) -> list:
+	"""Conjugate the words of the <expected> records with the worker's engine and compare them."""
+	actual = conjugate_records(_worker_engine, [ entry["word"] for entry in expected ])
+	mismatches = []
+	for (expected_entry, actual_entry) in zip(expected, actual):
+		mismatches += compare(expected_entry, actual_entry)
+	return mismatches
+
+def check(engine_spec : str = DEFAULT_ENGINE, path : str = DEFAULT_GOLDEN, jobs : int = None) -> list:
+	"""
+	Compare the engine named by <engine_spec> against the golden corpus at <path>.
+
+	Parameters:
+		engine_spec (default DEFAULT_ENGINE) : str --> "module:callable" constructing the candidate engine
+		path (default DEFAULT_GOLDEN) : str --> the golden corpus
+		jobs (default os.cpu_count()) : int --> number of worker processes (1 checks in this process)
+	Return:
+		list[Mismatch] --> every differing cell, empty if the engine is equivalent.
+	"""
+	records = read_golden(path)
+	chunks = [ records[idx:idx + _CHUNK_SIZE] for idx in range(0, len(records), _CHUNK_SIZE) ]
+	jobs = jobs or os.cpu_count() or 1
+	if jobs == 1:
+		_init_worker(engine_spec)
+		results = map(_check_chunk, chunks)
+		return [ mismatch for result in results for mismatch in result ]
+	pool = multiprocessing.Pool(jobs, _init_worker, (engine_spec,))
+	try:
+		results = pool.map(_check_chunk, chunks)
+	finally:
+		pool.close()
+		pool.join()
+	return [ mismatch for result in results for mismatch in result ]
+
+
+def main(argv : list = None) -> int:
+	parser = argparse.ArgumentParser(description = "Freeze or check the golden corpus of conjugations.")
+	parser.add_argument("command", choices = ["check", "freeze"])
+	parser.add_argument("--engine", default = DEFAULT_ENGINE, help = "candidate engine as module:callable")
+	parser.add_argument("--golden", default = DEFAULT_GOLDEN, help = "path of the golden corpus")
+	parser.add_argument("--jobs", type = int, default = None, help = "worker processes (default: all cores)")
+	args = parser.parse_args(argv)
+
+	if args.command == "freeze":
+		print("froze " + str(freeze(args.engine, args.golden)) + " words to " + args.golden)
+		return 0
+	mismatches = check(args.engine, args.golden, args.jobs)
+	for mismatch in mismatches:
+		print("\t".join(str(field) for field in mismatch))
+	print(str(len(mismatches)) + " mismatching cells", file = sys.stderr)
+	return 1 if mismatches else 0
+
+if __name__ == "__main__":
+	sys.exit(main())
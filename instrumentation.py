@@ -0,0 +1,311 @@
+""""
+Instrumentation
+
+Provides opt-in counters and timers for the conjugation pipeline
+(see conjugator_utils.conjugate_verb). Every stage of a conjugated word is timed
+with time.perf_counter_ns() and the results are grouped by the resulting Verb.kind():
+	1. per stage call counts, total and maximum latency
+	2. per class latency histograms (per stage and for the word as a whole)
+
+Tracing hooks (see PipelineStats.add_hook) are handed a span per stage once a word is finished:
+	hook(stage, start_ns, end_ns, attributes)
+where attributes hold the word and, as far as they were worked out, its root, matched irregular
+verb, resulting kind and whether its classification was cached. Hooks are called whether or not
+the counters are enabled, from the thread that conjugated the word.
+
+Instrumentation is disabled and no hook is registered by default. Then the pipeline is handed
+a shared do-nothing timer, so the only cost is a few attribute checks per word.
+"""
+
+import heapq
+import threading
+import time
+
+# pipeline stages, in the order they are run
+STAGES = ("find_verb_matches", "get_prefix", "disambiguate_verb", "determine_verb_class", "construct", "conjugate")
+TOTAL = "total" # pseudo-stage covering the whole word
+NO_MATCH = "None" # kind recorded for words without a verb class pattern
+
+# histogram buckets: bucket i holds latencies below 2^(i + _MIN_BUCKET_BITS) ns (~1 µs up to ~8.6 s), the last is unbounded.
+_MIN_BUCKET_BITS = 10
+HISTOGRAM_BUCKETS = 24
+BUCKET_BOUNDS = tuple(2 ** (i + _MIN_BUCKET_BITS) for i in range(HISTOGRAM_BUCKETS - 1)) + (float("inf"),)
+
+def bucket_index(ns : int) -> int:
+	"""Return the histogram bucket index for a latency of <ns> nanoseconds."""
+	return min(max(ns.bit_length() - _MIN_BUCKET_BITS, 0), HISTOGRAM_BUCKETS - 1)
+
+
+class _NullTimer:
+	"""Timer handed out while instrumentation is disabled and no hook is registered. Every method is a no-op."""
+	tracing = False
+
+	def mark(self):
+		pass
+
+	def annotate(self, **attributes):
+		pass
+
+	def lap(self, stage : str):
+		pass
+
+	def finish(self, verb):
+		pass
+
+NULL_TIMER = _NullTimer()
+
+
+class StageTimer:
+	"""
+	Times the stages of a single word.
+
+	Attributes:
+		tracing : bool --> whether tracing hooks are registered, so that attributes are worth working out
+		attributes : dict --> attributes of the word's spans (only collected while tracing)
+
+	Methods:
+		mark(self)
+			restart the clock without recording anything
+		lap(self, stage : str)
+			record the time since the last mark/lap as <stage>
+		annotate(self, **attributes)
+			add attributes to the word's spans
+		finish(self, verb)
+			hand the recorded stages over to the PipelineStats, grouped by <verb>'s kind, and to the tracing hooks
+	"""
+	def __init__(self, stats, word : str = None):
+		"""Start timing <word> for PipelineStats <stats>."""
+		self._stats = stats
+		self._laps = []
+		self.tracing = bool(stats.hooks)
+		self.attributes = {"word" : word} if self.tracing else None
+		self._spans = [] if self.tracing else None
+		self._start = time.perf_counter_ns()
+		self._last = self._start
+
+	def mark(self):
+		"""Restart the clock, so that any work since the last lap is not attributed to the next stage."""
+		self._last = time.perf_counter_ns()
+
+	def lap(self, stage : str):
+		"""Record the time since the last mark/lap as spent in <stage>."""
+		now = time.perf_counter_ns()
+		self._laps.append((stage, now - self._last))
+		if self.tracing:
+			self._spans.append((stage, self._last, now))
+		self._last = now
+
+	def annotate(self, **attributes):
+		"""Add <attributes> to the word's spans (ignored unless tracing)."""
+		if self.tracing:
+			self.attributes.update(attributes)
+
+	def finish(self, verb):
+		"""Record the word's stages under <verb>'s kind (NO_MATCH if <verb> is None) and trace them."""
+		kind = verb.kind() if verb else NO_MATCH
+		if self._stats.enabled:
+			self._stats.record(kind, self._laps, self._last - self._start)
+		if self.tracing:
+			self.attributes["kind"] = kind
+			self._spans.append((TOTAL, self._start, self._last))
+			self._stats.trace(self._spans, self.attributes)
+
+
+class _StageStats:
+	"""Counter, total, maximum and histogram of a single (kind, stage) pair."""
+	__slots__ = ("count", "total_ns", "max_ns", "buckets")
+
+	def __init__(self):
+		self.count = 0
+		self.total_ns = 0
+		self.max_ns = 0
+		self.buckets = [0] * HISTOGRAM_BUCKETS
+
+	def add(self, ns : int):
+		self.count += 1
+		self.total_ns += ns
+		if ns > self.max_ns:
+			self.max_ns = ns
+		self.buckets[bucket_index(ns)] += 1
+
+
+class PipelineStats:
+	"""
+	Collects per stage counters and timers of the conjugation pipeline, grouped by Verb.kind().
+
+	Attributes:
+		enabled : bool --> whether timings are being recorded
+		hooks : tuple --> registered tracing hooks
+		hook_errors : int --> exceptions raised by tracing hooks (and swallowed)
+
+	Methods:
+		enable(self)
+			start recording
+		disable(self)
+			stop recording (collected data is kept)
+		reset(self)
+			drop all collected data
+		add_hook(self, hook)
+			register a tracing hook
+		remove_hook(self, hook)
+			unregister a tracing hook
+		timer(self, word : str = None) -> StageTimer
+			get a timer for a single word
+		record(self, kind : str, laps : list, total_ns : int)
+			record the stage timings of a single word
+		snapshot(self) -> dict
+			get a copy of all counters and timers
+		histogram(self, kind : str, stage : str = TOTAL) -> list
+			get a latency histogram
+	"""
+	def __init__(self, enabled : bool = False):
+		"""Construct an (by default disabled) PipelineStats."""
+		self.enabled = enabled
+		self.hooks = ()
+		self.hook_errors = 0
+		self._active = enabled
+		self._lock = threading.Lock()
+		self._kinds = {}
+
+	def enable(self):
+		"""Start recording stage timings."""
+		self.enabled = True
+		self._active = True
+
+	def disable(self):
+		"""Stop recording stage timings. Already collected data is kept."""
+		self.enabled = False
+		self._active = bool(self.hooks)
+
+	def add_hook(self, hook):
+		"""
+		Register tracing <hook>, called as hook(stage, start_ns, end_ns, attributes) for every stage of every word
+		(and for TOTAL), once the word is finished. Timestamps are time.perf_counter_ns() values.
+		"""
+		with self._lock:
+			self.hooks = self.hooks + (hook,)
+			self._active = True
+
+	def remove_hook(self, hook):
+		"""Unregister tracing <hook> (ValueError if it is not registered)."""
+		with self._lock:
+			hooks = list(self.hooks)
+			hooks.remove(hook)
+			self.hooks = tuple(hooks)
+			self._active = self.enabled or bool(self.hooks)
+
+	def reset(self):
+		"""Drop all collected counters and timers."""
+		with self._lock:
+			self._kinds = {}
+
+	def timer(self, word : str = None):
+		"""Return a StageTimer for <word>, or a do-nothing timer while disabled without hooks."""
+		return StageTimer(self, word) if self._active else NULL_TIMER
+
+	def trace(self, spans : list, attributes : dict):
+		"""
+		Hand the <spans>, (stage, start_ns, end_ns), of a word with <attributes> to every tracing hook.
+
+		A failing hook does not fail the conjugation: its exception is counted in hook_errors.
+		"""
+		for hook in self.hooks:
+			for (stage, start_ns, end_ns) in spans:
+				try:
+					hook(stage, start_ns, end_ns, attributes)
+				except Exception:
+					with self._lock:
+						self.hook_errors += 1
+
+	def record(self, kind : str, laps : list, total_ns : int):
+		"""
+		Record the stage timings of a single word.
+
+		Parameters:
+			kind : str --> the resulting Verb.kind() (or NO_MATCH)
+			laps : list[tuple[str, int]] --> (stage, nanoseconds) of every stage that was run
+			total_ns : int --> nanoseconds spent on the whole word
+		"""
+		with self._lock:
+			stages = self._kinds.setdefault(kind, {})
+			for (stage, ns) in laps:
+				if stage not in stages:
+					stages[stage] = _StageStats()
+				stages[stage].add(ns)
+			if TOTAL not in stages:
+				stages[TOTAL] = _StageStats()
+			stages[TOTAL].add(total_ns)
+
+	def snapshot(self) -> dict:
+		"""
+		Return a copy of all collected counters and timers.
+
+		Return:
+			dict --> {"enabled": bool, "words": int,
+					  "kinds": {kind: {stage: {"count": int, "total_ns": int, "max_ns": int, "mean_ns": float}}}}
+					  where the stage TOTAL covers the word as a whole.
+		"""
+		with self._lock:
+			kinds = {}
+			for (kind, stages) in self._kinds.items():
+				kinds[kind] = {stage: {"count": s.count, "total_ns": s.total_ns, "max_ns": s.max_ns,
+									   "mean_ns": s.total_ns / s.count} for (stage, s) in stages.items()}
+		words = sum(stages[TOTAL]["count"] for stages in kinds.values())
+		return {"enabled": self.enabled, "words": words, "kinds": kinds}
+
+	def histogram(self, kind : str, stage : str = TOTAL) -> list:
+		"""
+		Return the latency histogram of <stage> for verbs of <kind>.
+
+		Return:
+			list[tuple[float, int]] --> (upper bound in ns, count) of every bucket, not cumulative.
+		"""
+		with self._lock:
+			stats = self._kinds.get(kind, {}).get(stage)
+			buckets = list(stats.buckets) if stats else [0] * HISTOGRAM_BUCKETS
+		return list(zip(BUCKET_BOUNDS, buckets))
+
+	def histograms(self) -> dict:
+		"""Return the TOTAL latency histogram of every recorded kind."""
+		with self._lock:
+			kinds = list(self._kinds)
+		return {kind: self.histogram(kind) for kind in kinds}
+
+
+class SlowestWords:
+	"""
+	Tracing hook keeping the <size> slowest words (by TOTAL span), to find pathological words in production.
+
+		slowest = SlowestWords(10)
+		stats.add_hook(slowest)
+
+	Methods:
+		words(self) -> list
+			get (total nanoseconds, attributes) of the slowest words, slowest first
+	"""
+	def __init__(self, size : int = 10):
+		"""Construct a hook keeping the <size> slowest words."""
+		self.size = size
+		self._lock = threading.Lock()
+		self._heap = []
+		self._seen = 0
+
+	def __call__(self, stage : str, start_ns : int, end_ns : int, attributes : dict):
+		if stage != TOTAL:
+			return
+		with self._lock:
+			self._seen += 1
+			entry = (end_ns - start_ns, self._seen, attributes) # _seen breaks ties, attributes are not comparable
+			if len(self._heap) < self.size:
+				heapq.heappush(self._heap, entry)
+			elif entry[0] > self._heap[0][0]:
+				heapq.heapreplace(self._heap, entry)
+
+	def words(self) -> list:
+		"""Return (total nanoseconds, attributes) of the slowest words, slowest first."""
+		with self._lock:
+			return [ (ns, attributes) for (ns, seen, attributes) in sorted(self._heap, reverse = True) ]
+
+
+# process-wide default, used by conjugator_utils.conjugate_verb
+stats = PipelineStats()
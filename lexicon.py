@@ -0,0 +1,203 @@
+""""
+Lexicon
+
+Provides the precomputed lexicon: the conjugation of every verb in verbs.txt and every
+infinitive in irregular.txt, kept as a versioned artifact file.
+
+When the data files change, only the entries depending on what changed are rebuilt:
+	1. an irregular row: the words it matches (same suffix matching as find_verb_matches)
+	2. a prefix pattern: the words containing any literal it expands to (get_prefix splits on these)
+	3. a concrete verb: the verb and its negation
+	4. verbs.txt: the added words (removed words are dropped)
+Any change of the code (see engine.code_version) rebuilds every entry.
+Every update that changes the lexicon produces a new artifact version.
+
+	python3 lexicon.py <artifact> [data directory]
+"""
+
+import conjugator_utils as conjutils
+import data_bundle
+import engine
+import golden
+import hashlib
+import marshal
+import os
+import struct
+import sys
+from conjugator import Conjugator
+from interning import Interner
+
+# header: magic, format version, sha256 of the payload
+_MAGIC = b"CZVL"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sH32s")
+
+class LexiconError(Exception):
+	"""Raised when a lexicon artifact cannot be read: wrong magic, format version or checksum."""
+	pass
+
+
+def lexicon_words(verbs : list, data : data_bundle.VerbData) -> list:
+	"""Return the words of the lexicon: <verbs> followed by the irregular infinitives of <data>, without duplicates."""
+	words = list(verbs) + [ verb[conjutils.IrregularIdx.RGX_INFINITIVE] for verb in data.irregular_verbs ]
+	return list(dict.fromkeys(words))
+
+def _changed_rows(old : list, new : list) -> list:
+	"""Return the rows that were added to, removed from or moved within list <old> to make list <new>."""
+	(old_set, new_set) = (set(old), set(new))
+	changed = old_set.symmetric_difference(new_set)
+	# matches are disambiguated in file order, so reordered rows matter too
+	if [ row for row in old if row in new_set ] != [ row for row in new if row in old_set ]:
+		changed |= old_set & new_set
+	return list(changed)
+
+def _prefix_patterns(data : data_bundle.VerbData) -> list:
+	"""Return the prefix patterns of <data>, None if it only has the regex expression."""
+	return data.prefix_automaton.patterns if data.prefix_automaton else None
+
+def affected_words(words : list, old : data_bundle.VerbData, new : data_bundle.VerbData) -> set:
+	"""
+	Determine which of <words> may conjugate differently with data <new> than with data <old>.
+
+	The result is conservative: it contains every word whose conjugation changed,
+	and possibly some whose conjugation did not.
+
+	Parameters:
+		words : list[str] --> the words of the lexicon
+		old : data_bundle.VerbData --> the data the lexicon was built from
+		new : data_bundle.VerbData --> the changed data
+	Return:
+		set[str] --> the words to rebuild.
+	"""
+	rows = _changed_rows(old.irregular_verbs, new.irregular_verbs)
+	concrete = old.concrete_verbs.symmetric_difference(new.concrete_verbs)
+	(old_patterns, new_patterns) = (_prefix_patterns(old), _prefix_patterns(new))
+	if old_patterns is None or new_patterns is None:
+		if old.prefixes != new.prefixes:
+			return set(words)
+		patterns = []
+	else:
+		patterns = _changed_rows(old_patterns, new_patterns)
+	try:
+		return engine.affected_words(words, rows, patterns, concrete)
+	except ValueError:
+		return set(words)
+
+
+class Lexicon:
+	"""
+	Precomputed conjugations of every word, with what they were built from.
+
+	Attributes:
+		version : int --> artifact version, incremented by every update that changes the lexicon
+		entries : dict --> word -> golden record ({"word", "verbs" : [{"kind", "table"}]}, see golden.record)
+		data : data_bundle.VerbData --> the data the entries were built from
+		code_version : str --> engine.code_version() of the code the entries were built with
+		interner : interning.Interner --> pool sharing the equal strings of all entries (rebuilt by update, holding no others)
+
+	Methods:
+		build(words : list, data : data_bundle.VerbData) -> Lexicon
+			conjugate every word from scratch
+		update(self, verbs : list, data : data_bundle.VerbData) -> set
+			rebuild only the entries affected by new data
+		save(self, path : str)
+			write the lexicon artifact
+		load(path : str) -> Lexicon
+			read a lexicon artifact
+	"""
+	def __init__(self, version : int, entries : dict, data : data_bundle.VerbData, code_version : str):
+		self.version = version
+		self.interner = Interner()
+		self.entries = { word : self.interner.intern_record(entry) for (word, entry) in entries.items() }
+		self.data = data
+		self.code_version = code_version
+
+	@staticmethod
+	def _conjugate(words, data : data_bundle.VerbData) -> dict:
+		"""Return the golden records of <words> conjugated with <data>."""
+		conjugator = Conjugator(engine.EngineState(data, cache_size = 0))
+		return { entry["word"] : entry for entry in golden.conjugate_records(conjugator, list(words)) }
+
+	@classmethod
+	def build(cls, words : list, data : data_bundle.VerbData):
+		"""Conjugate every word in <words> with <data>, as lexicon version 1."""
+		return cls(1, cls._conjugate(words, data), data, engine.code_version())
+
+	def update(self, verbs : list, data : data_bundle.VerbData) -> set:
+		"""
+		Bring the lexicon up to date with the verbs of verbs.txt <verbs> and <data>, rebuilding only the affected entries.
+
+		Return:
+			set[str] --> the (re)built words. If any word was rebuilt or dropped, the version is incremented.
+		"""
+		words = lexicon_words(verbs, data)
+		if self.code_version != engine.code_version():
+			rebuild = set(words)
+		else:
+			rebuild = affected_words(words, self.data, data)
+			rebuild.update(word for word in words if word not in self.entries)
+		dropped = set(self.entries).difference(words)
+
+		entries = self._conjugate([ word for word in words if word in rebuild ], data)
+		for word in words:
+			if word not in entries:
+				entries[word] = self.entries[word]
+		changed = bool(dropped) or any(entries[word] != self.entries.get(word) for word in rebuild)
+		if rebuild or dropped: # a new pool of the surviving entries only, the strings of replaced or dropped ones are released
+			self.interner = Interner()
+			entries = { word : self.interner.intern_record(entry) for (word, entry) in entries.items() }
+		(self.entries, self.data, self.code_version) = (entries, data, engine.code_version())
+		if changed:
+			self.version += 1
+		return rebuild
+
+	def save(self, path : str):
+		"""Write the lexicon artifact to <path>, atomically replacing any existing file."""
+		payload = marshal.dumps({
+			"version" : self.version,
+			"code_version" : self.code_version,
+			"entries" : list(self.entries.values()),
+			"data" : data_bundle.pack(self.data),
+		}, 4)
+		tmp_path = path + ".tmp"
+		file = open(tmp_path, "wb")
+		file.write(_HEADER.pack(_MAGIC, FORMAT_VERSION, hashlib.sha256(payload).digest()) + payload)
+		file.close()
+		os.replace(tmp_path, path)
+
+	@classmethod
+	def load(cls, path : str):
+		"""
+		Read the lexicon artifact at <path>.
+
+		Raises:
+			LexiconError --> <path> is not a valid lexicon artifact.
+		"""
+		file = open(path, "rb")
+		raw = file.read()
+		file.close()
+		if len(raw) < _HEADER.size:
+			raise LexiconError("truncated lexicon")
+		(magic, version, digest) = _HEADER.unpack_from(raw)
+		if magic != _MAGIC or version != FORMAT_VERSION:
+			raise LexiconError("not a lexicon of format version " + str(FORMAT_VERSION))
+		payload = raw[_HEADER.size:]
+		if hashlib.sha256(payload).digest() != digest:
+			raise LexiconError("lexicon checksum mismatch")
+		lexicon = marshal.loads(payload)
+		entries = { entry["word"] : entry for entry in lexicon["entries"] }
+		return cls(lexicon["version"], entries, data_bundle.unpack(lexicon["data"]), lexicon["code_version"])
+
+
+if __name__ == "__main__":
+	path = sys.argv[1]
+	data_dir = sys.argv[2] if len(sys.argv) > 2 else conjutils.DEFAULT_DATA_DIR
+	(verbs, data) = (conjutils.get_verbs(data_dir), data_bundle.load_text(data_dir))
+	try:
+		lexicon = Lexicon.load(path)
+		rebuilt = len(lexicon.update(verbs, data))
+	except (OSError, LexiconError):
+		lexicon = Lexicon.build(lexicon_words(verbs, data), data)
+		rebuilt = len(lexicon.entries)
+	lexicon.save(path)
+	print(path + ": version " + str(lexicon.version) + ", rebuilt " + str(rebuilt) + " of " + str(len(lexicon.entries)) + " entries")
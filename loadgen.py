@@ -0,0 +1,225 @@
+""""
+Load generator
+
+Replays a skewed workload against the conjugator to size hardware for it: words of verbs.txt
+drawn from a Zipf distribution (the word of rank r is drawn with a weight of 1 / r^s), mixed with
+a share of unknown infinitives and of inputs that are not verbs at all, as real traffic is.
+The workload drives either the in-process API or a running service, from several threads,
+and the sustained throughput and tail latency are reported per interval, live while the
+workload runs, and overall once it is done.
+
+	python3 loadgen.py [--url http://127.0.0.1:8080] [--requests N] [--zipf S] [--unknown SHARE]
+					   [--nonverbs SHARE] [--concurrency N] [--interval SECONDS] [--seed N]
+
+Without --url, the words are conjugated in-process by a single shared Conjugator. With it, the
+words are requested from <path of the URL>/conjugate (so a service behind a path prefix can be reached).
+"""
+
+import conjugator_utils as conjutils
+import argparse
+import http.client
+import itertools
+import random
+import threading
+import time
+from urllib.parse import quote, urlsplit
+
+DEFAULT_REQUESTS = 100000
+DEFAULT_ZIPF = 1.0
+DEFAULT_UNKNOWN = 0.05
+DEFAULT_NONVERBS = 0.05
+DEFAULT_INTERVAL = 1.0
+
+# pieces of the generated inputs: unknown infinitives end as verbs do, non-verbs do not
+_SYLLABLES = ("bra", "dlu", "gre", "hmo", "kvi", "lpa", "mšo", "nře", "pťu", "rzo", "skl", "tvě", "vžu", "zdy")
+_INFINITIVE_ENDINGS = ("at", "it", "et", "ovat", "nout", "ít")
+_OTHER_ENDINGS = ("a", "ek", "ost", "ní", "ový", "ka", "o")
+
+def _generated(rng : random.Random, endings : tuple) -> str:
+	"""Return a word of 1-3 random syllables and one of <endings>."""
+	return "".join(rng.choice(_SYLLABLES) for i in range(rng.randint(1, 3))) + rng.choice(endings)
+
+def make_workload(words : list, count : int, exponent : float = DEFAULT_ZIPF, unknown : float = DEFAULT_UNKNOWN,
+				  nonverbs : float = DEFAULT_NONVERBS, seed : int = 0) -> list:
+	"""
+	Return a workload of <count> inputs.
+
+	Parameters:
+		words : list[str] --> the known words, ranked in a random order (fixed by <seed>)
+		count : int --> number of inputs
+		exponent : float --> the Zipf exponent s, 0 draws every word alike
+		unknown : float --> share of generated infinitives that are not in <words>
+		nonverbs : float --> share of generated inputs that are not infinitives
+		seed : int --> seed of the random generator, the same seed gives the same workload
+	"""
+	rng = random.Random(seed)
+	ranked = list(words)
+	rng.shuffle(ranked)
+	cum_weights = list(itertools.accumulate(1 / rank ** exponent for rank in range(1, len(ranked) + 1)))
+	known = set(ranked)
+	workload = []
+	for draw in rng.choices(ranked, cum_weights = cum_weights, k = count):
+		roll = rng.random()
+		if roll < unknown:
+			draw = _generated(rng, _INFINITIVE_ENDINGS)
+			while draw in known:
+				draw = _generated(rng, _INFINITIVE_ENDINGS)
+		elif roll < unknown + nonverbs:
+			draw = _generated(rng, _OTHER_ENDINGS)
+		workload.append(draw)
+	return workload
+
+
+class InProcessTarget:
+	"""Conjugates every input with a shared Conjugator (default a new one)."""
+	def __init__(self, conjugator = None):
+		if conjugator is None:
+			from conjugator import Conjugator
+			conjugator = Conjugator()
+		self.conjugator = conjugator
+
+	def __call__(self, word : str):
+		self.conjugator.conjugate(word)
+
+class HttpTarget:
+	"""
+	Requests every input from the service at <url>, over a persistent connection per thread.
+
+	The endpoint is the path of <url>, followed by /conjugate unless it already ends with it.
+	"""
+	def __init__(self, url : str):
+		parts = urlsplit(url)
+		(self.host, self.port) = (parts.hostname, parts.port or 80)
+		path = parts.path.rstrip("/")
+		self.path = path if path.endswith("/conjugate") else path + "/conjugate"
+		self._local = threading.local()
+
+	def __call__(self, word : str):
+		connection = getattr(self._local, "connection", None)
+		if connection is None:
+			connection = self._local.connection = http.client.HTTPConnection(self.host, self.port)
+		connection.request("GET", self.path + "?word=" + quote(word))
+		response = connection.getresponse()
+		response.read()
+		if response.status != 200:
+			raise RuntimeError("HTTP " + str(response.status) + " for " + word)
+
+
+def run(target, workload : list, concurrency : int = 1, interval : float = DEFAULT_INTERVAL, progress = None) -> tuple:
+	"""
+	Send every input of <workload> to <target> from <concurrency> threads, each as soon as the last returned.
+
+	Parameters:
+		interval : float --> seconds between calls of <progress>
+		progress : callable --> called with the summary (see summarize) of the inputs completed in every
+								interval, with its start "t" in seconds, while the workload runs
+	Return:
+		tuple[int, list[tuple[int, int]], int] --> the start (time.perf_counter_ns()),
+			(end, latency in ns) of every input in order of completion, and the number of failed inputs.
+	"""
+	inputs = iter(workload)
+	lock = threading.Lock()
+	samples = []
+	errors = [0]
+	def worker():
+		while True:
+			with lock:
+				word = next(inputs, None)
+			if word is None:
+				return
+			begin = time.perf_counter_ns()
+			try:
+				target(word)
+			except Exception:
+				with lock:
+					errors[0] += 1
+				continue
+			end = time.perf_counter_ns()
+			samples.append((end, end - begin))
+	start = time.perf_counter_ns()
+	threads = [ threading.Thread(target = worker) for i in range(concurrency) ]
+	for thread in threads:
+		thread.start()
+	(reported, window) = (0, 0)
+	for thread in threads:
+		while thread.is_alive():
+			if progress is None:
+				thread.join()
+				break
+			window_end = start + int((window + 1) * interval * 1e9)
+			thread.join(max(0, window_end - time.perf_counter_ns()) / 1e9)
+			if time.perf_counter_ns() >= window_end:
+				reported = _progress(progress, samples, reported, window * interval, interval)
+				window += 1
+	if progress is not None and reported < len(samples): # the last interval, cut short by the end of the run
+		_progress(progress, samples, reported, window * interval, (time.perf_counter_ns() - start) / 1e9 - window * interval)
+	return (start, samples, errors[0])
+
+def _progress(progress, samples : list, reported : int, t : float, seconds : float) -> int:
+	"""Hand the summary of the <samples> completed since the first <reported> ones to <progress>, returning how many are reported."""
+	completed = len(samples)
+	summary = summarize([ latency for (end, latency) in samples[reported:completed] ], seconds)
+	summary["t"] = t
+	progress(summary)
+	return completed
+
+def percentile(latencies : list, share : float) -> int:
+	"""Return the <share> (0-1) percentile of the sorted <latencies> (nearest rank), 0 if empty."""
+	if not latencies:
+		return 0
+	return latencies[min(len(latencies) - 1, max(0, int(share * len(latencies) + 0.5) - 1))]
+
+def summarize(latencies : list, seconds : float) -> dict:
+	"""Return the throughput and tail latency (in ms) of <latencies> (ns) completed over <seconds>."""
+	latencies = sorted(latencies)
+	summary = {"requests" : len(latencies), "throughput" : len(latencies) / seconds if seconds > 0 else 0.0}
+	for (name, share) in (("p50_ms", 0.5), ("p99_ms", 0.99), ("p999_ms", 0.999), ("max_ms", 1.0)):
+		summary[name] = percentile(latencies, share) / 1e6
+	return summary
+
+def report(start : int, samples : list, interval : float = DEFAULT_INTERVAL) -> tuple:
+	"""
+	Summarize the <samples> of run() per <interval> seconds (by time of completion) and overall.
+
+	Return:
+		tuple[list[dict], dict] --> the summary of every interval, with its start "t" in seconds, and the overall summary.
+	"""
+	windows = {}
+	for (end, latency) in samples:
+		windows.setdefault(int((end - start) / 1e9 // interval), []).append(latency)
+	elapsed = (max(end for (end, latency) in samples) - start) / 1e9 if samples else 0.0
+	intervals = []
+	for window in range(max(windows) + 1 if windows else 0):
+		seconds = min(interval, elapsed - window * interval) # the last interval is cut short by the end of the run
+		summary = summarize(windows.get(window, []), seconds)
+		summary["t"] = window * interval
+		intervals.append(summary)
+	return (intervals, summarize([ latency for (end, latency) in samples ], elapsed))
+
+def format_summary(summary : dict) -> str:
+	"""Return a single line of a summary."""
+	return "{requests:>8} req {throughput:>10.0f} req/s  p50 {p50_ms:.3f}  p99 {p99_ms:.3f}  " \
+		   "p99.9 {p999_ms:.3f}  max {max_ms:.3f} ms".format(**summary)
+
+
+def main(argv : list = None):
+	parser = argparse.ArgumentParser(description = "Replay a Zipf-distributed workload against the conjugator.")
+	parser.add_argument("--url", help = "base URL of a running service (default: conjugate in-process)")
+	parser.add_argument("--requests", type = int, default = DEFAULT_REQUESTS, help = "number of inputs")
+	parser.add_argument("--zipf", type = float, default = DEFAULT_ZIPF, help = "Zipf exponent of the word ranks")
+	parser.add_argument("--unknown", type = float, default = DEFAULT_UNKNOWN, help = "share of unknown infinitives")
+	parser.add_argument("--nonverbs", type = float, default = DEFAULT_NONVERBS, help = "share of inputs that are not verbs")
+	parser.add_argument("--concurrency", type = int, default = 1, help = "number of client threads")
+	parser.add_argument("--interval", type = float, default = DEFAULT_INTERVAL, help = "seconds per reported interval")
+	parser.add_argument("--seed", type = int, default = 0)
+	args = parser.parse_args(argv)
+
+	workload = make_workload(conjutils.get_verbs(), args.requests, args.zipf, args.unknown, args.nonverbs, args.seed)
+	target = HttpTarget(args.url) if args.url else InProcessTarget()
+	live = lambda summary: print("{:>7.1f}s ".format(summary["t"]) + format_summary(summary), flush = True)
+	(start, samples, errors) = run(target, workload, args.concurrency, args.interval, live)
+	overall = report(start, samples, args.interval)[1]
+	print("  total  " + format_summary(overall) + ("  (" + str(errors) + " failed)" if errors else ""))
+
+if __name__ == "__main__":
+	main()
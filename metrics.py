@@ -0,0 +1,105 @@
+""""
+Metrics
+
+Provides the Prometheus text exposition format (version 0.0.4) of the conjugator's
+counters, without any dependency:
+	1. pipeline_families : words conjugated and no-match counts per Verb.kind(),
+	   latency histograms per stage and kind (see instrumentation.PipelineStats)
+	2. cache_families : hit/miss/eviction/rejection counters of a cache (see cache.CacheStats)
+	3. render : the exposition text of any metric families
+
+A metric family is a Family: its name, type, help text and samples, where each sample
+is (name suffix, labels, value), such as ("_bucket", {"le": "0.001"}, 12).
+"""
+
+import instrumentation
+from collections import namedtuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Family = namedtuple("Family", ["name", "type", "help", "samples"])
+
+def _escape(value : str) -> str:
+	"""Escape a label value."""
+	return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value) -> str:
+	"""Format a sample value, as Prometheus expects infinities and integers."""
+	if value == float("inf"):
+		return "+Inf"
+	if isinstance(value, float) and value.is_integer():
+		return str(int(value))
+	return repr(value) if isinstance(value, float) else str(value)
+
+def render(families : list) -> str:
+	"""Return the exposition text of metric <families>."""
+	lines = []
+	for family in families:
+		lines.append("# HELP " + family.name + " " + family.help)
+		lines.append("# TYPE " + family.name + " " + family.type)
+		for (suffix, labels, value) in family.samples:
+			label_text = ",".join(name + '="' + _escape(str(label)) + '"' for (name, label) in labels.items())
+			lines.append(family.name + suffix + ("{" + label_text + "}" if label_text else "") + " " + _format_value(value))
+	return "\n".join(lines) + "\n"
+
+def histogram_samples(labels : dict, buckets : list, total : float) -> list:
+	"""
+	Return the samples of a histogram.
+
+	Parameters:
+		labels : dict --> labels of every sample
+		buckets : list[tuple[float, int]] --> (upper bound, count) of every bucket, not cumulative (see PipelineStats.histogram)
+		total : float --> the sum of all observations
+	"""
+	samples = []
+	cumulative = 0
+	for (bound, count) in buckets:
+		cumulative += count
+		samples.append(("_bucket", dict(labels, le = _format_value(bound)), cumulative))
+	samples.append(("_sum", labels, total))
+	samples.append(("_count", labels, cumulative))
+	return samples
+
+def _seconds(buckets : list) -> list:
+	"""Convert the bounds of <buckets> from nanoseconds to seconds."""
+	return [ (bound / 1e9, count) for (bound, count) in buckets ]
+
+def latency_families(stats : instrumentation.PipelineStats, name : str, help : str, group_label : str) -> list:
+	"""
+	Return the TOTAL latency histogram of every group (kind) recorded by <stats> as a single family.
+
+	Used for latencies other than the pipeline's, such as those of requests grouped by endpoint (<group_label>).
+	"""
+	snapshot = stats.snapshot()
+	samples = []
+	for (group, stages) in sorted(snapshot["kinds"].items()):
+		total = stages[instrumentation.TOTAL]["total_ns"] / 1e9
+		samples += histogram_samples({group_label : group}, _seconds(stats.histogram(group)), total)
+	return [ Family(name, "histogram", help, samples) ]
+
+def pipeline_families(stats : instrumentation.PipelineStats, prefix : str = "conjugator") -> list:
+	"""Return the metric families of the conjugation pipeline <stats> (only filled while it is enabled)."""
+	snapshot = stats.snapshot()
+	(words, stage_samples) = ([], [])
+	for (kind, stages) in sorted(snapshot["kinds"].items()):
+		words.append(("", {"kind" : kind}, stages[instrumentation.TOTAL]["count"]))
+		for (stage, stage_stats) in sorted(stages.items()):
+			stage_samples += histogram_samples({"kind" : kind, "stage" : stage}, _seconds(stats.histogram(kind, stage)),
+											   stage_stats["total_ns"] / 1e9)
+	no_match = snapshot["kinds"].get(instrumentation.NO_MATCH, {}).get(instrumentation.TOTAL, {}).get("count", 0)
+	return [
+		Family(prefix + "_instrumentation_enabled", "gauge", "Whether the pipeline stages are being timed.",
+			   [("", {}, int(snapshot["enabled"]))]),
+		Family(prefix + "_words_total", "counter", "Words conjugated, by resulting Verb.kind().", words),
+		Family(prefix + "_no_match_total", "counter", "Words without a corresponding verb class pattern.", [("", {}, no_match)]),
+		Family(prefix + "_stage_seconds", "histogram", "Latency of every pipeline stage (and the word in total), by Verb.kind().",
+			   stage_samples),
+	]
+
+def cache_families(stats : dict, prefix : str = "conjugator_classification_cache") -> list:
+	"""Return the metric families of the cache counters <stats> (see cache.CacheStats.as_dict)."""
+	families = []
+	for counter in ("hits", "misses", "evictions", "rejections"):
+		families.append(Family(prefix + "_" + counter + "_total", "counter", "Cache " + counter + ".", [("", {}, stats[counter])]))
+	families.append(Family(prefix + "_hit_ratio", "gauge", "Share of cache lookups that were hits.", [("", {}, stats["hit_ratio"])]))
+	return families
@@ -0,0 +1,171 @@
+""""
+Overlay
+
+Provides per-tenant (or per-request) data on top of the shared data of the conjugator:
+	1. an Overlay : a few irregular verb-tuples and concrete verbs of its own
+	2. a LayeredState : an Overlay on top of a shared engine.EngineState, usable wherever one is
+
+The overlay is always consulted before the base: its irregular verbs match before those of the base,
+its concrete verbs add to those of the base. The base indexes (irregular suffix index, concrete
+verbs and prefix automaton) are shared by reference, never copied, so that a tenant costs the size
+of its overlay and of its own cache.
+
+Caches are scoped per layer: only the words an overlay can change (those matching one of its
+irregular verbs or being one of its concrete verbs) are classified and cached in the LayeredState's
+own cache, every other word is classified by the base, in the shared cache of the base.
+Entries added to the base at runtime (see engine.EngineState.add_entries) clear the layer's cache.
+
+	tenant = conjugator.with_overlay(Overlay(["kvorgat,2,kvorž,kvorgal,kvorži"], ["kvorgat"]))
+	(verb, verb2) = tenant.conjugate("kvorgat")
+"""
+
+import conjugator_utils as conjutils
+import engine
+import cache
+import instrumentation
+import threading
+
+DEFAULT_CACHE_SIZE = 1024
+DEFAULT_CACHE_POLICY = "lru"
+
+class Overlay:
+	"""
+	Irregular verbs and concrete verbs of a tenant, consulted before the shared data.
+
+	Attributes:
+		irregular_verbs : list[tuple[str, int, str, str, str]] --> the irregular verb-tuples of the overlay
+		concrete_verbs : frozenset[str] --> the concrete verbs of the overlay
+		irregular_index : conjutils.IrregularIndex --> suffix index of <irregular_verbs>
+
+	Methods:
+		affects(self, word : str) -> bool
+			whether the overlay can change the classification of a word
+	"""
+	def __init__(self, irregular_verbs : list = (), concrete_verbs : list = ()):
+		"""
+		Construct an overlay of <irregular_verbs> (lines of irregular.txt or verb-tuples, see conjutils.parse_irregular)
+		and <concrete_verbs>.
+
+		Raises:
+			ValueError --> an irregular verb is malformed.
+		"""
+		self.irregular_verbs = [ conjutils.parse_irregular(row) for row in irregular_verbs ]
+		self.concrete_verbs = frozenset(concrete_verbs)
+		self.irregular_index = conjutils.IrregularIndex(self.irregular_verbs)
+
+	def affects(self, word : str) -> bool:
+		"""Determine if <word> matches an irregular verb of the overlay or is one of its concrete verbs."""
+		return bool(self.irregular_index.find_verb_matches(word)) or conjutils.is_concrete_verb(word, self.concrete_verbs)
+
+
+class LayeredIndex:
+	"""Irregular verb lookup of an overlay index before a base index, same as conjutils.IrregularIndex.find_verb_matches()."""
+	def __init__(self, overlay : conjutils.IrregularIndex, base):
+		self.overlay = overlay
+		self.base = base
+
+	def find_verb_matches(self, word : str) -> list:
+		"""Return the verb-tuples of the overlay, then those of the base, that end with <word>."""
+		return self.overlay.find_verb_matches(word) + conjutils.find_verb_matches(word, self.base)
+
+class LayeredSet:
+	"""Membership in an overlay set or in a base set, without copying either."""
+	def __init__(self, overlay : frozenset, base):
+		self.overlay = overlay
+		self.base = base
+
+	def __contains__(self, word) -> bool:
+		return word in self.overlay or word in self.base
+
+
+class LayeredState:
+	"""
+	An Overlay on top of a shared engine.EngineState, used as an EngineState (such as Conjugator(state = ...)).
+
+	Attributes:
+		base : engine.EngineState --> the shared state, never modified
+		overlay : Overlay --> the data of the layer
+		data : data_bundle.VerbData --> the data of the base
+		irregular_index : LayeredIndex --> the irregular verbs of the overlay, then of the base
+		prefixes : conjutils.PrefixAutomaton --> the prefixes of the base (shared)
+		concrete_verbs : LayeredSet --> the concrete verbs of the overlay and of the base
+		classifications : cache.LRUCache/cache.TinyLFUCache --> the layer's own cache, word -> conjutils.Classification
+		cache_policy : str --> the policy of the layer's cache (see cache.POLICIES)
+		generation : int --> the generation of the base the layer's cache holds classifications of (entries cannot be
+							 added to a layer itself, build a new Overlay instead)
+
+	Methods:
+		classify(self, word : str, timer = instrumentation.NULL_TIMER) -> conjutils.Classification
+			classify a word with the overlay, or by the base if the overlay does not affect it
+		put_classification(self, word : str, classification : conjutils.Classification, generation : int) -> bool
+			cache a classification in the layer's cache, unless entries were added to the base since it was started
+		warm(self, words : list)
+			classify every word in advance
+		cache_stats(self) -> dict
+			get the counters and hit ratio of the layer's cache
+	"""
+	def __init__(self, base : engine.EngineState, overlay : Overlay, cache_size : int = DEFAULT_CACHE_SIZE,
+				 cache_policy : str = DEFAULT_CACHE_POLICY):
+		"""Layer <overlay> on top of <base>, with its own <cache_policy> cache of <cache_size> entries."""
+		self.base = base
+		self.overlay = overlay
+		self.data = base.data
+		self.irregular_index = LayeredIndex(overlay.irregular_index, base.irregular_index)
+		self.prefixes = base.prefixes
+		self.concrete_verbs = LayeredSet(overlay.concrete_verbs, base.concrete_verbs)
+		self.cache_policy = cache_policy
+		self.classifications = cache.make_cache(cache_policy, cache_size)
+		self._generation = base.generation
+		self._lock = threading.Lock()
+
+	@property
+	def generation(self) -> int:
+		"""The generation of the base, the layer's cache being cleared first if entries were added to the base since it was filled."""
+		with self._lock:
+			return self._sync()
+
+	def _sync(self) -> int:
+		"""Clear the layer's cache if entries were added to the base since it was filled, holding the lock."""
+		if self._generation != self.base.generation:
+			self.classifications.clear()
+			self._generation = self.base.generation
+		return self._generation
+
+	def classify(self, word : str, timer : instrumentation.StageTimer = instrumentation.NULL_TIMER) -> conjutils.Classification:
+		"""
+		Return the classification of <word>: classified with the overlay and cached in the layer's cache if the
+		overlay affects it, otherwise classified by the base (in the shared cache).
+		"""
+		if not self.overlay.affects(word):
+			return self.base.classify(word, timer)
+		generation = self.generation
+		classification = self.classifications.get(word)
+		if classification is None:
+			classification = conjutils.classify_word(word, self.irregular_index, self.prefixes, self.concrete_verbs, timer)
+			self.put_classification(word, classification, generation)
+		elif timer.tracing:
+			timer.annotate(cached = True)
+		return classification
+
+	def put_classification(self, word : str, classification : conjutils.Classification, generation : int) -> bool:
+		"""
+		Cache <classification> of <word>, started at <generation>, in the layer's cache, unless entries were added
+		to the base meanwhile (as engine.EngineState.put_classification()).
+
+		Return:
+			bool --> whether it was cached.
+		"""
+		with self._lock:
+			if generation != self._sync():
+				return False
+			self.classifications.put(word, classification)
+			return True
+
+	def warm(self, words : list):
+		"""Classify every word in <words> ahead of time, filling the layer's and the base's caches."""
+		for word in words:
+			self.classify(word)
+
+	def cache_stats(self) -> dict:
+		"""Return the counters and hit ratio of the layer's cache (see cache.CacheStats.as_dict)."""
+		return self.classifications.stats.as_dict()
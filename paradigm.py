@@ -0,0 +1,261 @@
+""""
+Paradigms
+
+Provides a compressed storage of conjugations: each verb is kept as a paradigm id
+and its four stems (present, past, future and imperative), and every cell is
+reconstructed on demand from the paradigm's templates, which are shared by all
+verbs conjugated alike (such as every Class2_ovat verb).
+
+A template describes a single cell:
+	before + stems[stem_idx][:len(stem) - cut] + after
+where cut drops the end of the stem (used by the vowel changes of the imperative plural),
+and before/after hold the auxiliaries, endings and negation.
+Cells that cannot be expressed from a stem (and forms that do not exist) are
+kept literally, in <before>, with stem_idx LITERAL.
+
+	python3 paradigm.py
+reports the size of the whole lexicon stored as paradigms versus full tables.
+"""
+
+import verbs as v
+import sys
+from collections import namedtuple
+
+STEMS = 4 # present, past, future, imperative
+LITERAL = -1 # stem_idx of cells kept literally
+
+Template = namedtuple("Template", ["stem_idx", "cut", "before", "after"])
+
+# a paradigm: the kind() of its verbs and a template per cell (tense major, as in Verb.get_table())
+Paradigm = namedtuple("Paradigm", ["kind", "templates"])
+
+# the stem each tense naturally uses (the conditional uses the past stem), tried first
+_tense_to_stem = (0, 1, 2, 3, 1)
+
+def verb_stems(verb : v.Verb) -> tuple:
+	"""Return the four stems <verb> conjugates with: present, past, future and imperative."""
+	return tuple(verb._get_stem(tense) for tense in range(STEMS))
+
+def cell_template(cell : str, stems : tuple, tense : int) -> Template:
+	"""
+	Find the template of <cell> of <tense> conjugated from <stems>.
+
+	The stem <tense> naturally uses is tried first, then the others. Of each stem,
+	the longest start found within <cell> is used.
+
+	Return:
+		Template --> a template with stem_idx LITERAL if no (non-empty start of a) stem is found in <cell>.
+	"""
+	natural = _tense_to_stem[tense]
+	for stem_idx in [natural] + [ idx for idx in range(STEMS) if idx != natural ]:
+		stem = stems[stem_idx]
+		for cut in range(len(stem)):
+			position = cell.find(stem[:len(stem) - cut])
+			if position != -1:
+				return Template(stem_idx, cut, cell[:position], cell[position + len(stem) - cut:])
+	return Template(LITERAL, 0, cell, "")
+
+def compile_paradigm(paradigm : Paradigm) -> tuple:
+	"""
+	Compile the templates of <paradigm> into a single format string rendering all of its cells at once.
+
+	Return:
+		tuple[str, list[tuple[int, int]]] --> the format string, rendering the cells separated by "\0",
+											  and the (stem_idx, cut) of each of its fields.
+	"""
+	fields = []
+	parts = []
+	for (stem_idx, cut, before, after) in paradigm.templates:
+		before = before.replace("{", "{{").replace("}", "}}")
+		if stem_idx == LITERAL:
+			parts.append(before)
+			continue
+		if (stem_idx, cut) not in fields:
+			fields.append((stem_idx, cut))
+		parts.append(before + "{" + str(fields.index((stem_idx, cut))) + "}" + after.replace("{", "{{").replace("}", "}}"))
+	return ("\0".join(parts), fields)
+
+def render(template : Template, stems : tuple) -> str:
+	"""Reconstruct the cell described by <template> from <stems>."""
+	(stem_idx, cut, before, after) = template
+	if stem_idx == LITERAL:
+		return before
+	stem = stems[stem_idx]
+	return before + stem[:len(stem) - cut] + after
+
+
+class ParadigmTable:
+	"""
+	The shared paradigms, numbered by paradigm id in order of first use.
+
+	Attributes:
+		paradigms : list[Paradigm] --> paradigm id -> Paradigm
+
+	Methods:
+		compress(self, verb : v.Verb) -> tuple
+			get the paradigm id and stems of a conjugated verb
+		expand(self, paradigm_id : int, stems : tuple) -> list
+			reconstruct the conjugation table
+		form(self, paradigm_id : int, stems : tuple, tense : int, person : int) -> str
+			reconstruct a single cell
+	"""
+	def __init__(self, paradigms : list = ()):
+		"""Construct a table of <paradigms> (default none)."""
+		self.paradigms = list(paradigms)
+		self._ids = { paradigm : paradigm_id for (paradigm_id, paradigm) in enumerate(self.paradigms) }
+		self._by_kind = {} # kind -> ids of its paradigms, most recently used first
+		self._compiled = [ compile_paradigm(paradigm) for paradigm in self.paradigms ] # paradigm id -> compile_paradigm()
+		for (paradigm_id, paradigm) in enumerate(self.paradigms):
+			self._by_kind.setdefault(paradigm.kind, []).insert(0, paradigm_id)
+
+	def __len__(self) -> int:
+		return len(self.paradigms)
+
+	def paradigm_id(self, paradigm : Paradigm) -> int:
+		"""Return the id of <paradigm>, adding it to the table if it is new."""
+		paradigm_id = self._ids.get(paradigm)
+		if paradigm_id is None:
+			paradigm_id = self._ids[paradigm] = len(self.paradigms)
+			self.paradigms.append(paradigm)
+			self._compiled.append(compile_paradigm(paradigm))
+			self._by_kind.setdefault(paradigm.kind, []).insert(0, paradigm_id)
+		return paradigm_id
+
+	def compress(self, verb : v.Verb) -> tuple:
+		"""
+		Compress the conjugated <verb>.
+
+		The known paradigms of <verb>'s kind are tried first (most recently used first): rendering
+		their compiled templates is much cheaper than working out the template of every cell.
+
+		Return:
+			tuple[int, tuple[str, str, str, str]] --> the paradigm id and the stems of <verb>.
+		"""
+		stems = verb_stems(verb)
+		table = verb.get_table()
+		cells = "\0".join(map("\0".join, table))
+		known = self._by_kind.get(verb.kind(), [])
+		for (position, paradigm_id) in enumerate(known):
+			(text, fields) = self._compiled[paradigm_id]
+			if text.format(*[ stems[stem_idx][:len(stems[stem_idx]) - cut] for (stem_idx, cut) in fields ]) == cells:
+				if position:
+					known.insert(0, known.pop(position))
+				return (paradigm_id, stems)
+		templates = tuple(cell_template(cell, stems, tense) for (tense, row) in enumerate(table) for cell in row)
+		return (self.paradigm_id(Paradigm(verb.kind(), templates)), stems)
+
+	def kind(self, paradigm_id : int) -> str:
+		"""Return the kind() of the verbs of paradigm <paradigm_id>."""
+		return self.paradigms[paradigm_id].kind
+
+	def form(self, paradigm_id : int, stems : tuple, tense : int, person : int) -> str:
+		"""Reconstruct the cell at <tense> and <person> of the verb stored as <paradigm_id> and <stems>."""
+		return render(self.paradigms[paradigm_id].templates[tense * len(v.Person) + person], stems)
+
+	def expand(self, paradigm_id : int, stems : tuple) -> list:
+		"""Reconstruct the conjugation table (see Verb.get_table()) of the verb stored as <paradigm_id> and <stems>."""
+		templates = self.paradigms[paradigm_id].templates
+		persons = len(v.Person)
+		return [ [ render(template, stems) for template in templates[tense * persons:(tense + 1) * persons] ]
+				 for tense in range(len(v.Tense)) ]
+
+
+def pack(conjugations) -> str:
+	"""
+	Pack the (paradigm id, stems) of every conjugation of a word into a single string.
+
+	A single string takes a fraction of the memory of a tuple of tuples of strings:
+	"id\tpresent\tpast\tfuture\timperative", with the conjugations separated by "\n".
+	"""
+	return "\n".join(str(paradigm_id) + "\t" + "\t".join(stems) for (paradigm_id, stems) in conjugations)
+
+def unpack(packed : str) -> list:
+	"""Unpack the conjugations packed by pack(): a list of (paradigm id, stems)."""
+	conjugations = []
+	for conjugation in packed.split("\n") if packed else ():
+		fields = conjugation.split("\t")
+		conjugations.append((int(fields[0]), tuple(fields[1:])))
+	return conjugations
+
+
+class ParadigmLexicon:
+	"""
+	Lexicon stored as paradigm ids and stems.
+
+	Attributes:
+		table : ParadigmTable --> the shared paradigms
+		entries : dict --> word -> its conjugations packed into a single string (see pack), "" without a match
+
+	Methods:
+		build(words : list, conjugator) -> ParadigmLexicon
+			conjugate and compress every word
+		add(self, word : str, result : tuple)
+			compress the conjugation (verb, verb2) of a word
+		tables(self, word : str) -> list
+			reconstruct the conjugation tables of a word
+		record(self, word : str) -> dict
+			reconstruct the golden record of a word
+	"""
+	def __init__(self, table : ParadigmTable = None):
+		"""Construct an empty lexicon sharing the paradigms of <table> (default a new table)."""
+		self.table = table if table is not None else ParadigmTable()
+		self.entries = {}
+
+	def __len__(self) -> int:
+		return len(self.entries)
+
+	def __contains__(self, word : str) -> bool:
+		return word in self.entries
+
+	@classmethod
+	def build(cls, words : list, conjugator):
+		"""Conjugate every word of <words> with <conjugator> (a conjugator.Conjugator) and compress it."""
+		lexicon = cls()
+		for word in words:
+			lexicon.add(word, conjugator.conjugate(word))
+		return lexicon
+
+	def add(self, word : str, result : tuple):
+		"""Compress <result>, the conjugation (verb, verb2) of <word>."""
+		self.entries[word] = pack(self.table.compress(verb) for verb in result if verb)
+
+	def tables(self, word : str) -> list:
+		"""Reconstruct the conjugation tables of <word> (KeyError if it is not in the lexicon)."""
+		return [ self.table.expand(paradigm_id, stems) for (paradigm_id, stems) in unpack(self.entries[word]) ]
+
+	def form(self, word : str, tense : int, person : int) -> str:
+		"""Reconstruct only the cell of the first conjugation of <word> at <tense> and <person>, None without a match."""
+		conjugations = unpack(self.entries[word])
+		return self.table.form(*conjugations[0], tense, person) if conjugations else None
+
+	def record(self, word : str) -> dict:
+		"""Reconstruct the golden record (see golden.record) of <word>."""
+		return {"word" : word, "verbs" : [ {"kind" : self.table.kind(paradigm_id), "table" : self.table.expand(paradigm_id, stems)}
+										   for (paradigm_id, stems) in unpack(self.entries[word]) ]}
+
+
+def deep_size(obj, seen : set = None) -> int:
+	"""Return the bytes taken by <obj> and every (distinct) str, tuple, list and dict it holds."""
+	seen = set() if seen is None else seen
+	if id(obj) in seen:
+		return 0
+	seen.add(id(obj))
+	size = sys.getsizeof(obj)
+	if isinstance(obj, dict):
+		size += sum(deep_size(key, seen) + deep_size(value, seen) for (key, value) in obj.items())
+	elif isinstance(obj, (tuple, list)):
+		size += sum(deep_size(item, seen) for item in obj)
+	return size
+
+
+if __name__ == "__main__":
+	import golden
+	from conjugator import Conjugator
+	words = golden.golden_words()
+	conjugator = Conjugator()
+	lexicon = ParadigmLexicon.build(words, conjugator)
+	tables = { word : [ verb.get_table() for verb in conjugator.conjugate(word) if verb ] for word in words }
+	(paradigm_bytes, table_bytes) = (deep_size([lexicon.entries, lexicon.table.paradigms]), deep_size(tables))
+	print("words: " + str(len(lexicon)) + ", paradigms: " + str(len(lexicon.table)))
+	print("full tables: " + str(table_bytes) + " bytes, paradigms: " + str(paradigm_bytes) + " bytes (" +
+		  str(round(table_bytes / paradigm_bytes, 1)) + "x smaller)")
@@ -0,0 +1,157 @@
+""""
+Parallel
+
+Provides the conjugation of large word lists across worker processes, for the batch CLI:
+
+	python3 conjugator.py --jobs N [--ordered] [--format FORMAT] [--perfective] word list ...
+
+The words are read lazily and sent to the workers in chunks; every worker conjugates
+and formats its chunks, and the formatted text is written as soon as it comes back:
+	1. unordered (default) : chunks are written in the order they complete
+	2. ordered : chunks are written in input order, those completing early wait in a reorder buffer
+The rejected words of every chunk (see conjutils.ConjugationResult) come back with its text,
+and are written to a separate file if one is given (--rejects).
+
+Only a bounded number of chunks is in flight (sent, but not yet written), so neither the input
+nor a slow chunk holding up the reorder buffer can make the memory grow with the size of the files.
+"""
+
+import conjugator_utils as conjutils
+import formatters
+import io
+import multiprocessing
+import queue
+import sys
+
+_CHUNK_SIZE = 256
+_CHUNKS_PER_JOB = 4 # chunks in flight per worker
+
+def read_chunks(files : list, size : int = _CHUNK_SIZE):
+	"""
+	Lazily read the words of word lists <files> ('-' for stdin) in chunks of <size>.
+
+	Surrounding whitespace is stripped and blank lines are skipped, as in Conjugator.conjugate_stream().
+
+	Yield:
+		tuple[int, list[str]] --> the index of the chunk and its words.
+	"""
+	(index, chunk) = (0, [])
+	for name in files:
+		file = sys.stdin if name == "-" else open(name, "r", encoding = "utf-8")
+		try:
+			for line in file:
+				word = line.strip()
+				if word:
+					chunk.append(word)
+					if len(chunk) == size:
+						yield (index, chunk)
+						(index, chunk) = (index + 1, [])
+		finally:
+			if file is not sys.stdin:
+				file.close()
+	if chunk:
+		yield (index, chunk)
+
+
+class ReorderBuffer:
+	"""
+	Puts items indexed 0, 1, 2... arriving in any order back in order.
+
+	Attributes:
+		peak : int --> most items that waited at the same time
+
+	Methods:
+		push(self, index : int, item) -> list
+			add an item, getting every item now in order
+	"""
+	def __init__(self):
+		self.peak = 0
+		self._next = 0
+		self._waiting = {}
+
+	def __len__(self) -> int:
+		return len(self._waiting)
+
+	def push(self, index : int, item) -> list:
+		"""Add <item> of <index>, returning the items that are now next in order (none if an earlier one is missing)."""
+		self._waiting[index] = item
+		self.peak = max(self.peak, len(self._waiting))
+		ready = []
+		while self._next in self._waiting:
+			ready.append(self._waiting.pop(self._next))
+			self._next += 1
+		return ready
+
+
+# state of a worker process, set up once by _init_worker
+_worker = None
+
+def _init_worker(format_name : str, is_perfective : bool):
+	"""Build the worker's Conjugator once, instead of for every chunk."""
+	global _worker
+	from conjugator import Conjugator
+	_worker = (Conjugator(), format_name, is_perfective)
+
+def _format_chunk(chunk : tuple) -> tuple:
+	"""
+	Conjugate and format the words of <chunk> (index, words), returning (index, number of words, text,
+	lines of the rejected words).
+	"""
+	(index, words) = chunk
+	(conjugator, format_name, is_perfective) = _worker
+	results = {}
+	for word in words:
+		if word not in results:
+			results[word] = conjugator.conjugate_result(word, is_perfective)
+	text = io.StringIO()
+	writer = formatters.get_writer(format_name, text, header = False)
+	writer.write_all((word, (results[word].verb, results[word].verb2)) for word in words)
+	rejected = "".join(formatters.reject_line(results[word]) for word in words if results[word].status in conjutils.REJECTED)
+	return (index, len(words), text.getvalue(), rejected)
+
+def conjugate_files(files : list, file_out, format_name : str, is_perfective : bool = False, jobs : int = None,
+					ordered : bool = False, chunk_size : int = _CHUNK_SIZE, rejects = None) -> int:
+	"""
+	Conjugate every word of word lists <files> across <jobs> worker processes, writing them to <file_out>.
+
+	Parameters:
+		files : list[str] --> word lists, one infinitive per line ('-' for stdin)
+		file_out : file object --> where the conjugations are written (text mode)
+		format_name : str --> one of formatters.WRITERS, its header (if any) is written first
+		is_perfective : bool --> conjugate the verbs as perfective
+		jobs : int --> number of worker processes (default: one per core)
+		ordered : bool --> write the words in input order, otherwise in the order their chunks complete
+		chunk_size : int --> number of words sent to a worker at once
+		rejects : file object --> where the rejected words are written (see formatters.reject_line), if given
+	Return:
+		int --> the number of words written.
+	"""
+	jobs = jobs or multiprocessing.cpu_count()
+	formatters.get_writer(format_name, file_out) # writes the header
+	chunks = read_chunks(files, chunk_size)
+	done = queue.Queue()
+	reorder = ReorderBuffer() if ordered else None
+	(in_flight, words) = (0, 0)
+	with multiprocessing.Pool(jobs, _init_worker, (format_name, is_perfective)) as pool:
+		while True:
+			while in_flight < jobs * _CHUNKS_PER_JOB:
+				chunk = next(chunks, None)
+				if chunk is None:
+					break
+				pool.apply_async(_format_chunk, (chunk,), callback = done.put, error_callback = done.put)
+				in_flight += 1
+			if in_flight == 0:
+				break
+			result = done.get()
+			if isinstance(result, BaseException):
+				raise result
+			for (index, count, text, rejected) in reorder.push(result[0], result) if ordered else [result]:
+				file_out.write(text)
+				if rejects is not None and rejected:
+					rejects.write(rejected)
+				words += count
+				in_flight -= 1
+	file_out.flush()
+	if rejects is not None:
+		rejects.flush()
+	return words
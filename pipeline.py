@@ -0,0 +1,403 @@
+""""
+Pipeline
+
+Provides the conjugation flow as a Pipeline of explicit stages, each run on a whole batch of words:
+	1. normalize : strip surrounding whitespace, NFC-normalize
+	2. get_prefix : strip the prefixes, keeping the root
+	3. find_verb_matches : match the irregular verbs
+	4. disambiguate_verb : pick the irregular verb(s) among the matches
+	5. determine_verb_class : classify the words left without an irregular verb, work out concreteness
+	6. construct : construct the Verb(s)
+	7. conjugate : fill their conjugation tables
+	8. format : format them with one of formatters.WRITERS (only when a format is given)
+
+A stage is any object with a <name> and a run(items) method, which fills in the fields of the Items
+of a batch. Every stage can be replaced by name, and any stage (or a Pipeline of several, which is
+itself a stage) can be wrapped in a CachedStage so that only the words it has not seen are run
+through it. Every Pipeline profiles its stages: calls, words and time spent in each of them.
+
+A word making a stage raise is isolated: the stage is run again word by word, the words raising
+keep their exception in <error> and skip the later stages, the rest of the batch goes on. Every
+Item has a status (see conjutils.ConjugationResult), as Conjugator.conjugate_result().
+
+	pipeline = default_pipeline()
+	results = pipeline.conjugate_batch(words) # [(verb, verb2), ...] as Conjugator.conjugate_batch()
+	results = pipeline.conjugate_results(words) # [conjutils.ConjugationResult, ...]
+	pipeline.profile()
+
+The default pipeline caches steps 2-5 in the classification cache of its engine.EngineState,
+shared with any Conjugator of the same state. On an overlay.LayeredState, that is the
+cache of the layer, holding every word the pipeline sees.
+"""
+
+import conjugator_utils as conjutils
+import engine
+import formatters
+import cache
+import io
+import threading
+import time
+import unicodedata
+
+class Item:
+	"""
+	A word travelling through a Pipeline; every stage fills in some of its fields.
+
+	Attributes:
+		text : str --> the word as given
+		word : str --> the normalized word
+		is_perfective : bool --> conjugate the verb as perfective
+		root : str --> the word without its prefixes
+		matches : list --> the matching irregular verb-tuples
+		spec, spec2 : conjutils.VerbSpec --> the verb (and 2nd verb of stát) to construct, None if not (yet) classified
+		is_concrete : bool --> whether the verb is concrete
+		verb, verb2 : v.Verb --> the constructed verbs
+		output : str --> the formatted verbs
+		error : Exception --> what a stage raised on the word, None if nothing did
+	"""
+	__slots__ = ("text", "word", "is_perfective", "root", "matches", "spec", "spec2", "is_concrete", "verb", "verb2", "output",
+				 "error")
+
+	def __init__(self, text : str, is_perfective : bool = False):
+		self.text = text
+		self.word = text
+		self.is_perfective = is_perfective
+		self.root = None
+		self.matches = ()
+		self.spec = None
+		self.spec2 = None
+		self.is_concrete = False
+		self.verb = None
+		self.verb2 = None
+		self.output = None
+		self.error = None
+
+	def result(self) -> tuple:
+		"""Return the conjugation (verb, verb2), as Conjugator.conjugate()."""
+		return (self.verb, self.verb2)
+
+	def conjugation_result(self) -> conjutils.ConjugationResult:
+		"""Return the conjugation with its status, as Conjugator.conjugate_result()."""
+		if self.error is not None:
+			return conjutils.error_result(self.text, self.error)
+		return conjutils.conjugation_result(self.text, self.verb, self.verb2)
+
+
+class NormalizeStage:
+	"""Strips surrounding whitespace and composes the words (Unicode NFC), so that decomposed input is matched too."""
+	name = "normalize"
+
+	def run(self, items : list):
+		for item in items:
+			item.word = unicodedata.normalize("NFC", item.word.strip())
+
+class PrefixStage:
+	"""Strips the prefixes of the words with <prefixes>, a conjutils.PrefixAutomaton or regex expression."""
+	name = "get_prefix"
+
+	def __init__(self, prefixes):
+		self.prefixes = prefixes
+
+	def run(self, items : list):
+		prefixes = self.prefixes
+		for item in items:
+			item.root = conjutils.get_prefix(item.word, prefixes)[1]
+
+class IrregularMatchStage:
+	"""Finds the irregular verb-tuples matching the words in <irregular_verbs>, a conjutils.IrregularIndex or list."""
+	name = "find_verb_matches"
+
+	def __init__(self, irregular_verbs):
+		self.irregular_verbs = irregular_verbs
+
+	def run(self, items : list):
+		irregular_verbs = self.irregular_verbs
+		for item in items:
+			item.matches = conjutils.find_verb_matches(item.word, irregular_verbs)
+
+class DisambiguateStage:
+	"""Picks the irregular verb(s) of the words with irregular matches."""
+	name = "disambiguate_verb"
+
+	def run(self, items : list):
+		for item in items:
+			if item.matches:
+				(item.spec, item.spec2) = conjutils.disambiguate_matches(item.matches, item.word, item.root)
+
+class ClassifyStage:
+	"""Classifies the words still without a spec as regular verbs, and works out concreteness from <concrete_verbs>."""
+	name = "determine_verb_class"
+
+	def __init__(self, concrete_verbs):
+		self.concrete_verbs = concrete_verbs
+
+	def run(self, items : list):
+		concrete_verbs = self.concrete_verbs
+		for item in items:
+			if not item.spec:
+				item.spec = conjutils.classify_verb(item.word, item.root)
+			item.is_concrete = conjutils.is_concrete_verb(item.word, concrete_verbs)
+
+class ConstructStage:
+	"""Constructs the Verb(s) of the classified words."""
+	name = "construct"
+
+	def run(self, items : list):
+		for item in items:
+			item.verb = conjutils.build_verb(item.word, item.spec, item.is_concrete, item.is_perfective) if item.spec else None
+			item.verb2 = conjutils.build_verb(item.word, item.spec2, item.is_concrete, item.is_perfective) if item.spec2 else None
+
+class ConjugateStage:
+	"""Fills the conjugation tables of the constructed Verb(s)."""
+	name = "conjugate"
+
+	def run(self, items : list):
+		for item in items:
+			if item.verb:
+				item.verb.conjugate()
+				if item.verb2 is not None:
+					item.verb2.conjugate()
+
+class FormatStage:
+	"""
+	Formats the conjugated words with the writer of <format_name> (see formatters.WRITERS), without its header.
+
+	Attributes:
+		format_name : str --> one of formatters.WRITERS
+		header : str --> the header text of the format, to be written before the first batch
+	"""
+	name = "format"
+
+	def __init__(self, format_name : str):
+		self.format_name = format_name
+		header = io.StringIO()
+		formatters.get_writer(format_name, header)
+		self.header = header.getvalue()
+
+	def run(self, items : list):
+		text = io.StringIO()
+		writer = formatters.get_writer(self.format_name, text, header = False)
+		for item in items:
+			writer.write(item.text, (item.verb, item.verb2))
+			item.output = text.getvalue()
+			text.seek(0)
+			text.truncate()
+
+class CachedStage:
+	"""
+	Runs <stage> only on the words it has not seen before, restoring the <outputs> fields of the others from <cache>.
+	Words <stage> failed on (see Item.error) are not cached.
+
+	The cache is keyed by the <key> field of the items, its values are the tuple of the <outputs> fields
+	or, given a <value_type> (such as a namedtuple), value_type(*outputs). Given the engine.EngineState
+	<state> the cache belongs to, it is written through state.put_classification(), so that nothing
+	classified before entries are added (see engine.EngineState.add_entries) is cached.
+
+	Attributes:
+		stage --> the cached stage (or Pipeline)
+		name : str --> the name of <stage>
+		key : str --> the Item field the cache is keyed by
+		outputs : tuple[str] --> the Item fields <stage> fills in
+		cache : cache.LRUCache/cache.TinyLFUCache --> the cached outputs
+		state : engine.EngineState --> the state owning <cache>, None for a cache of its own
+	"""
+	def __init__(self, stage, outputs : tuple, key : str = "word", cache_policy : str = engine.DEFAULT_CACHE_POLICY,
+				 maxsize : int = engine.DEFAULT_CACHE_SIZE, shared_cache = None, value_type = None, state = None):
+		"""Wrap <stage> with a new <cache_policy> cache of <maxsize> entries, the existing <shared_cache>, or the classifications of <state>."""
+		self.stage = stage
+		self.name = stage.name
+		self.key = key
+		self.outputs = tuple(outputs)
+		self.state = state
+		if state is not None:
+			shared_cache = state.classifications
+		self.cache = shared_cache if shared_cache is not None else cache.make_cache(cache_policy, maxsize)
+		self._value_type = value_type
+
+	def run(self, items : list):
+		(key, outputs, cached) = (self.key, self.outputs, self.cache)
+		generation = self.state.generation if self.state is not None else None # read first: a layer's cache is cleared if stale
+		misses = []
+		for item in items:
+			value = cached.get(getattr(item, key))
+			if value is None:
+				misses.append(item)
+			else:
+				for (field, field_value) in zip(outputs, value):
+					setattr(item, field, field_value)
+		if misses:
+			self.stage.run(misses)
+			for item in misses:
+				if item.error is not None:
+					continue
+				values = [ getattr(item, field) for field in outputs ]
+				value = self._value_type(*values) if self._value_type else tuple(values)
+				if self.state is not None:
+					self.state.put_classification(getattr(item, key), value, generation)
+				else:
+					cached.put(getattr(item, key), value)
+
+	def profile(self) -> dict:
+		"""Return the profile of the cached stage, if it is a Pipeline (see Pipeline.profile)."""
+		return self.stage.profile() if hasattr(self.stage, "profile") else {}
+
+
+class _StageProfile:
+	"""Calls, words and nanoseconds spent in a stage."""
+	__slots__ = ("calls", "words", "total_ns")
+
+	def __init__(self):
+		self.calls = 0
+		self.words = 0
+		self.total_ns = 0
+
+class Pipeline:
+	"""
+	Runs batches of words through a sequence of stages, profiling each of them.
+
+	A Pipeline is a stage itself (see run), so that several stages can be cached or replaced as one.
+
+	Attributes:
+		name : str --> the name of the pipeline as a stage
+		stages : tuple --> the stages, in the order they are run
+
+	Methods:
+		replace(self, name : str, stage)
+			replace the stage called <name>
+		run(self, items : list)
+			run Items through the stages
+		run_words(self, words : list, is_perfective : bool = False) -> list
+			run words through the stages, getting their Items
+		conjugate_batch(self, words : list, is_perfective : bool = False) -> list
+			conjugate a list of words
+		conjugate_results(self, words : list, is_perfective : bool = False) -> list
+			conjugate a list of words, getting their statuses
+		conjugate(self, word : str, is_perfective : bool = False) -> tuple
+			conjugate a single word
+		profile(self) -> dict
+			get the calls, words and time spent in every stage
+		reset_profile(self)
+			drop the collected profile
+	"""
+	def __init__(self, stages : list, name : str = "pipeline"):
+		self.name = name
+		self.stages = tuple(stages)
+		self._lock = threading.Lock()
+		self._profile = {}
+
+	def __getitem__(self, name : str):
+		"""Return the stage called <name> (KeyError if there is none)."""
+		for stage in self.stages:
+			if stage.name == name:
+				return stage
+		raise KeyError(name)
+
+	def replace(self, name : str, stage):
+		"""
+		Replace the stage called <name> with <stage>. Batches already running finish with the old stage.
+
+		Raises:
+			KeyError --> no stage is called <name>.
+		"""
+		self[name]
+		self.stages = tuple(stage if old.name == name else old for old in self.stages)
+
+	def run(self, items : list):
+		"""
+		Run <items> through every stage, in order (the stage API, see run_words for words).
+
+		If a stage raises, it is run again on every item alone: the items it raises on get the exception
+		in their <error> and are not run through the later stages.
+		"""
+		for stage in self.stages:
+			if any(item.error is not None for item in items):
+				items = [ item for item in items if item.error is None ]
+			start = time.perf_counter_ns()
+			try:
+				stage.run(items)
+			except Exception:
+				_isolate(stage, items)
+			elapsed = time.perf_counter_ns() - start
+			with self._lock:
+				profile = self._profile.get(stage.name)
+				if profile is None:
+					profile = self._profile[stage.name] = _StageProfile()
+				profile.calls += 1
+				profile.words += len(items)
+				profile.total_ns += elapsed
+
+	def run_words(self, words : list, is_perfective : bool = False) -> list:
+		"""Return the Items of <words> once run through every stage."""
+		items = [ Item(word, is_perfective) for word in words ]
+		self.run(items)
+		return items
+
+	def conjugate_batch(self, words : list, is_perfective : bool = False) -> list:
+		"""Conjugate every word in <words>, returning a list of (verb, verb2) tuples in the same order."""
+		return [ item.result() for item in self.run_words(words, is_perfective) ]
+
+	def conjugate_results(self, words : list, is_perfective : bool = False) -> list:
+		"""Conjugate every word in <words>, returning a list of conjutils.ConjugationResult in the same order."""
+		return [ item.conjugation_result() for item in self.run_words(words, is_perfective) ]
+
+	def conjugate(self, word : str, is_perfective : bool = False) -> tuple:
+		"""Classify, construct and conjugate <word>, as Conjugator.conjugate()."""
+		return self.run_words([word], is_perfective)[0].result()
+
+	def profile(self) -> dict:
+		"""
+		Return the calls (batches), words and time spent in every stage, and in the stages of nested Pipelines.
+
+		Return:
+			dict --> {stage: {"calls": int, "words": int, "total_ns": int, "mean_ns": float (per word)}}, in stage order.
+		"""
+		profile = {}
+		with self._lock:
+			collected = { name: (p.calls, p.words, p.total_ns) for (name, p) in self._profile.items() }
+		for stage in self.stages:
+			if stage.name in collected:
+				(calls, words, total_ns) = collected[stage.name]
+				profile[stage.name] = {"calls" : calls, "words" : words, "total_ns" : total_ns,
+									   "mean_ns" : total_ns / words if words else 0.0}
+			if hasattr(stage, "profile"):
+				profile.update(stage.profile())
+		return profile
+
+	def reset_profile(self):
+		"""Drop the collected profile, and that of nested Pipelines."""
+		with self._lock:
+			self._profile = {}
+		for stage in self.stages:
+			nested = getattr(stage, "stage", stage)
+			if nested is not self and hasattr(nested, "reset_profile"):
+				nested.reset_profile()
+
+
+def _isolate(stage, items : list):
+	"""Run <stage> on every item of <items> alone, setting the <error> of those it raises on."""
+	for item in items:
+		try:
+			stage.run([item])
+		except Exception as error:
+			item.error = error
+
+def default_pipeline(state : engine.EngineState = None, format_name : str = None) -> Pipeline:
+	"""
+	Construct the pipeline of the conjugator on <state> (default: a freshly built engine.EngineState).
+
+	The classifying stages (get_prefix to determine_verb_class) run as the nested Pipeline "classify",
+	cached in the classification cache of <state>: on a hit, root and matches are left unset.
+
+	Parameters:
+		state : engine.EngineState --> loaded data, indexes and the classification cache
+		format_name : str --> one of formatters.WRITERS to add the format stage, None to leave it out
+	"""
+	state = state if state is not None else engine.EngineState()
+	classify = Pipeline([PrefixStage(state.prefixes), IrregularMatchStage(state.irregular_index),
+						 DisambiguateStage(), ClassifyStage(state.concrete_verbs)], name = "classify")
+	stages = [NormalizeStage(),
+			  CachedStage(classify, ("spec", "spec2", "is_concrete"), value_type = conjutils.Classification, state = state),
+			  ConstructStage(), ConjugateStage()]
+	if format_name is not None:
+		stages.append(FormatStage(format_name))
+	return Pipeline(stages)
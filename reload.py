@@ -0,0 +1,160 @@
+""""
+Reload
+
+Provides Reloader, which picks up edits of the data files (irregular.txt, concrete.txt and
+prefix.txt, or the bundle named by VERB_DATA_BUNDLE) in a long-running process:
+	1. polling : a background thread checks the files' modification times every <interval> seconds
+	2. on request : request_reload() (for instance from a SIGHUP handler, see install_signal) wakes it up at once
+
+A reload builds a new engine.EngineState from the files in the background, warms its (empty)
+classification cache with the words cached by the live state, then swaps it into the Conjugator
+with a single assignment. Requests in flight finish with the state they started with, later
+ones use the new one; nothing is paused or locked on the request path. The entries added at
+runtime (see Conjugator.add_entries) are carried over to the new state, including those
+added while it was being built (see engine.EngineState.hand_over). If the files cannot be
+loaded (such as a malformed line mid-edit), the live state is kept and the failure is counted.
+
+	reloader = Reloader(conjugator, interval = 2.0)
+	reloader.install_signal() # kill -HUP <pid> reloads at once
+	reloader.start()
+
+Pipelines (see Conjugator.pipeline) are built on the state of the moment and do not follow reloads.
+"""
+
+import conjugator_utils as conjutils
+import data_bundle
+import engine
+import os
+import signal
+import threading
+
+DEFAULT_INTERVAL = 2.0 # seconds between checks of the files
+
+def source_paths() -> list:
+	"""Return the paths of the files a reload reads: VERB_DATA_BUNDLE if exported, otherwise the text files of the data directory."""
+	if "VERB_DATA_BUNDLE" in os.environ:
+		return [os.environ["VERB_DATA_BUNDLE"]]
+	return [ os.path.join(conjutils.get_data_dir(), name) for name in data_bundle.SOURCE_FILES ]
+
+def load_source() -> data_bundle.VerbData:
+	"""
+	Load the data from source_paths(). Unlike data_bundle.load_data(), the text files are read
+	even from the shipped data directory, as its bundle is only rebuilt by hand.
+	"""
+	if "VERB_DATA_BUNDLE" in os.environ:
+		return data_bundle.read_bundle(os.environ["VERB_DATA_BUNDLE"])
+	return data_bundle.load_text(conjutils.get_data_dir())
+
+def _signature(paths : list) -> tuple:
+	"""Return the modification time and size of every path of <paths> (None for missing files)."""
+	signature = []
+	for path in paths:
+		try:
+			stat = os.stat(path)
+			signature.append((stat.st_mtime_ns, stat.st_size))
+		except OSError:
+			signature.append(None)
+	return tuple(signature)
+
+
+class Reloader:
+	"""
+	Reloads the data of a Conjugator when its files change, or on request.
+
+	Attributes:
+		conjugator : Conjugator --> whose state is swapped
+		interval : float --> seconds between checks of the files (None: only reload on request)
+		warm : bool --> whether the new state's cache is warmed with the words cached by the live state
+		generation : int --> number of states swapped in
+		failures : int --> reloads that failed (the live state was kept)
+		last_error : Exception --> the error of the last failed reload
+
+	Methods:
+		reload(self) -> bool
+			reload now, in the calling thread
+		check(self) -> bool
+			reload if the files changed since the last reload
+		request_reload(self)
+			have the background thread reload at once
+		install_signal(self, signum : int = signal.SIGHUP)
+			reload on a signal
+		start(self)
+			start the background thread
+		stop(self)
+			stop the background thread
+	"""
+	def __init__(self, conjugator, interval : float = DEFAULT_INTERVAL, warm : bool = True):
+		self.conjugator = conjugator
+		self.interval = interval
+		self.warm = warm
+		self.generation = 0
+		self.failures = 0
+		self.last_error = None
+		self._signature = _signature(source_paths())
+		self._lock = threading.Lock() # one reload at a time
+		self._wake = threading.Event()
+		self._stopped = False
+		self._thread = None
+
+	def reload(self) -> bool:
+		"""
+		Build a state from the files and swap it in, unless the files hold the same data as the live state.
+
+		Return:
+			bool --> whether a new state was swapped in.
+		Raises:
+			whatever loading the files raised (the live state is kept).
+		"""
+		with self._lock:
+			self._signature = _signature(source_paths())
+			data = load_source()
+			live = self.conjugator.state
+			if data.checksum == live.data.checksum:
+				return False
+			state = engine.EngineState(data, live.classifications.maxsize, live.cache_policy)
+			if self.warm:
+				state.warm([ word for (word, classification) in live.classifications.items() ])
+			live.hand_over(state) # from now on, entries added to the live state go to the new one
+			self.conjugator.state = state # the swap: a single assignment
+			self.generation += 1
+			return True
+
+	def check(self) -> bool:
+		"""Reload if the modification time or size of any file changed since the last reload, returning whether a state was swapped in."""
+		if _signature(source_paths()) == self._signature:
+			return False
+		return self.reload()
+
+	def request_reload(self):
+		"""Have the background thread reload at once (safe to call from a signal handler)."""
+		self._wake.set()
+
+	def install_signal(self, signum : int = getattr(signal, "SIGHUP", None)):
+		"""Reload on signal <signum> (default SIGHUP). Only callable from the main thread."""
+		signal.signal(signum, lambda signum, frame: self.request_reload())
+
+	def start(self):
+		"""Start the background thread, which checks the files every <interval> seconds and reloads on request."""
+		self._stopped = False
+		self._thread = threading.Thread(target = self._run, name = "reloader", daemon = True)
+		self._thread.start()
+
+	def stop(self):
+		"""Stop the background thread, waiting for a reload in progress."""
+		self._stopped = True
+		self._wake.set()
+		if self._thread is not None:
+			self._thread.join()
+			self._thread = None
+
+	def _run(self):
+		while True:
+			requested = self._wake.wait(self.interval)
+			self._wake.clear()
+			if self._stopped:
+				return
+			try:
+				self.reload() if requested else self.check()
+			except Exception as error: # a half-edited file: keep the live state, try again on the next change
+				self.failures += 1
+				self.last_error = error
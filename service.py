@@ -0,0 +1,255 @@
+""""
+Service
+
+Provides an HTTP front end to a shared Conjugator, serving every request on its own thread:
+
+	GET /conjugate?word=<infinitive>[&perfective=1]
+		200, the JSON record of the word (see formatters.to_record), "verbs" is empty without a match
+		400, if the word is missing
+		503, if the service is saturated (its queue of words waiting for a batch is full)
+		500, {"error": "internal error"} if conjugating raised (the traceback is written to stderr)
+	GET /metrics
+		200, the service's metrics in the Prometheus text format (see metrics): requests and their
+		latency, requests in flight, the pipeline's stage latencies and the classification cache's counters
+		(and the data reloads, see reload)
+
+Identical requests in flight at the same time are coalesced (see singleflight):
+the word is conjugated and encoded once, and the response is shared by all of them.
+Distinct words are gathered into micro-batches (see batcher), conjugated together
+by Conjugator.conjugate_batch() on a single worker thread.
+
+	python3 service.py [--host HOST] [--port PORT] [--max-batch N] [--batch-window-ms MS] [--max-queue N] [--reload-interval S]
+
+Run as a script, the service picks up edits of the data files without a restart (see reload):
+they are checked every --reload-interval seconds, and reloaded at once on SIGHUP.
+"""
+
+import batcher
+import formatters
+import instrumentation
+import metrics
+import reload
+import argparse
+import json
+import signal
+import sys
+import threading
+import time
+import traceback
+from conjugator import Conjugator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from singleflight import SingleFlight
+from urllib.parse import parse_qs, urlsplit
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+
+class ConjugationService:
+	"""
+	Conjugates words for the request handlers, coalescing identical concurrent requests
+	and batching distinct ones.
+
+	Attributes:
+		conjugator : Conjugator --> shared by every request
+		flights : SingleFlight --> in-flight requests, keyed by (word, is_perfective)
+		batcher : batcher.MicroBatcher --> gathers the (word, is_perfective) of the requests into batches
+		requests : dict --> (path, status) -> number of requests
+		request_stats : instrumentation.PipelineStats --> request latencies, grouped by path
+		in_flight : int --> requests being handled
+		reloader : reload.Reloader --> reloads the conjugator's data (None if it is never reloaded)
+
+	Methods:
+		conjugate_json(self, word : str, is_perfective : bool = False) -> bytes
+			the encoded JSON record of a word
+		close(self)
+			stop the batcher
+		begin_request(self)
+			count a request as in flight
+		end_request(self, path : str, status : int, latency_ns : int)
+			count a handled request
+		metrics_text(self) -> str
+			the metrics in the Prometheus text format
+	"""
+	def __init__(self, conjugator : Conjugator = None, max_batch : int = batcher.DEFAULT_MAX_BATCH,
+				 window : float = batcher.DEFAULT_WINDOW, max_queue : int = batcher.DEFAULT_MAX_QUEUE):
+		"""
+		Construct a service conjugating with <conjugator> (default a new Conjugator).
+
+		Parameters:
+			max_batch, window, max_queue --> the batcher's largest batch, longest wait for a batch (in seconds)
+											 and most words waiting (see batcher.MicroBatcher)
+		"""
+		self.conjugator = conjugator if conjugator is not None else Conjugator()
+		self.flights = SingleFlight()
+		self.batcher = batcher.MicroBatcher(self._render_batch, max_batch, window, max_queue)
+		self.requests = {}
+		self.request_stats = instrumentation.PipelineStats(enabled = True)
+		self.in_flight = 0
+		self.reloader = None
+		self._lock = threading.Lock()
+
+	def _render_batch(self, keys : list) -> list:
+		"""Conjugate the (word, is_perfective) of <keys> as a batch per aspect and encode their JSON records, in order."""
+		bodies = {}
+		for is_perfective in (False, True):
+			words = [ word for (word, perfective) in keys if perfective == is_perfective ]
+			for (word, result) in zip(words, self.conjugator.conjugate_batch(words, is_perfective) if words else ()):
+				record = formatters.to_record(word, result)
+				bodies[(word, is_perfective)] = json.dumps(record, ensure_ascii = False).encode("utf-8")
+		return [ bodies[key] for key in keys ]
+
+	def conjugate_json(self, word : str, is_perfective : bool = False) -> bytes:
+		"""
+		Return the UTF-8 encoded JSON record of <word>, shared with identical requests in flight.
+
+		Raises:
+			batcher.Overloaded --> too many words are already waiting for a batch.
+		"""
+		key = (word, is_perfective)
+		return self.flights.do(key, lambda: self.batcher.submit(key))
+
+	def close(self):
+		"""Stop the batcher, once the words it already queued are done."""
+		self.batcher.close()
+
+	def begin_request(self):
+		"""Count a request as in flight."""
+		with self._lock:
+			self.in_flight += 1
+
+	def end_request(self, path : str, status : int, latency_ns : int):
+		"""Count a request to <path> answered with <status> after <latency_ns> nanoseconds, no longer in flight."""
+		with self._lock:
+			self.in_flight -= 1
+			self.requests[(path, status)] = self.requests.get((path, status), 0) + 1
+		self.request_stats.record(path, [], latency_ns)
+
+	def metrics_text(self) -> str:
+		"""Return the service's metrics in the Prometheus text format."""
+		with self._lock:
+			requests = [ ("", {"path" : path, "status" : status}, count) for ((path, status), count) in sorted(self.requests.items()) ]
+			in_flight = self.in_flight
+		families = [
+			metrics.Family("conjugator_requests_total", "counter", "Requests handled, by path and status.", requests),
+			metrics.Family("conjugator_requests_in_flight", "gauge", "Requests being handled.", [("", {}, in_flight)]),
+			metrics.Family("conjugator_conjugations_in_flight", "gauge", "Distinct words being conjugated (see single-flight).",
+						   [("", {}, self.flights.in_flight())]),
+			metrics.Family("conjugator_single_flight_shared_total", "counter", "Requests that shared the conjugation of an identical request.",
+						   [("", {}, self.flights.shared)]),
+			metrics.Family("conjugator_batch_queue_depth", "gauge", "Words waiting for a batch.", [("", {}, self.batcher.depth())]),
+			metrics.Family("conjugator_batch_queue_capacity", "gauge", "Most words waiting for a batch before requests are refused.",
+						   [("", {}, self.batcher.max_queue)]),
+			metrics.Family("conjugator_batches_total", "counter", "Batches conjugated.", [("", {}, self.batcher.batches)]),
+			metrics.Family("conjugator_batched_words_total", "counter", "Words conjugated in batches.", [("", {}, self.batcher.batched)]),
+			metrics.Family("conjugator_overloaded_total", "counter", "Words refused because the batch queue was full.",
+						   [("", {}, self.batcher.rejected)]),
+			metrics.Family("conjugator_rejected_words_total", "counter", "Words not conjugated, by status and reason.",
+						   [ ("", {"status" : status, "reason" : reason}, count)
+							 for ((status, reason), count) in sorted(self.conjugator.rejection_counts().items()) ]),
+		]
+		families += metrics.latency_families(self.request_stats, "conjugator_request_seconds", "Latency of handled requests, by path.", "path")
+		families += metrics.pipeline_families(self.conjugator.stats)
+		families += metrics.cache_families(self.conjugator.state.cache_stats())
+		if self.reloader is not None:
+			families += [
+				metrics.Family("conjugator_data_generation", "gauge", "Data reloads swapped in since the start.",
+							   [("", {}, self.reloader.generation)]),
+				metrics.Family("conjugator_data_reload_failures_total", "counter", "Data reloads that failed (the live data was kept).",
+							   [("", {}, self.reloader.failures)]),
+			]
+		return metrics.render(families)
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+	"""Handles the requests of a ConjugationService (set as the server's <service>)."""
+	protocol_version = "HTTP/1.1"
+	disable_nagle_algorithm = True # headers and body are sent apart: Nagle would hold the body for the client's delayed ACK (~40 ms)
+
+	def do_GET(self):
+		service = self.server.service
+		start = time.perf_counter_ns()
+		service.begin_request()
+		url = urlsplit(self.path)
+		self._status = None
+		try:
+			self._route(service, url)
+		except Exception:
+			if self._status is not None:
+				raise # the response was already started, the connection cannot be answered anymore
+			traceback.print_exc(file = sys.stderr)
+			self._respond(500, b'{"error": "internal error"}')
+		finally:
+			path = url.path if url.path in ("/conjugate", "/metrics") else "other" # unbounded paths would be unbounded metrics
+			service.end_request(path, self._status or 500, time.perf_counter_ns() - start)
+
+	def _route(self, service : ConjugationService, url):
+		"""Answer the request for <url>."""
+		if url.path == "/metrics":
+			return self._respond(200, service.metrics_text().encode("utf-8"), metrics.CONTENT_TYPE)
+		if url.path != "/conjugate":
+			return self._respond(404, b'{"error": "not found"}')
+		query = parse_qs(url.query)
+		word = query.get("word", [""])[0].strip()
+		if not word:
+			return self._respond(400, b'{"error": "missing word"}')
+		is_perfective = query.get("perfective", ["0"])[0] in ("1", "true")
+		try:
+			body = service.conjugate_json(word, is_perfective)
+		except batcher.Overloaded:
+			return self._respond(503, b'{"error": "overloaded"}', headers = {"Retry-After" : "1"})
+		self._respond(200, body)
+
+	def _respond(self, status : int, body : bytes, content_type : str = "application/json; charset=utf-8", headers : dict = None):
+		"""Send <body> as a response with <status> (and any other <headers>)."""
+		self._status = status
+		self.send_response(status)
+		self.send_header("Content-Type", content_type)
+		for (name, value) in (headers or {}).items():
+			self.send_header(name, value)
+		self.send_header("Content-Length", str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def log_message(self, format, *args):
+		pass # no access log, every request would be written to stderr
+
+
+def make_server(host : str = DEFAULT_HOST, port : int = DEFAULT_PORT, service : ConjugationService = None) -> ThreadingHTTPServer:
+	"""Construct (and bind) the HTTP server of <service> (default a new ConjugationService) at <host>:<port>."""
+	server = ThreadingHTTPServer((host, port), RequestHandler)
+	server.daemon_threads = True
+	server.service = service if service is not None else ConjugationService()
+	return server
+
+
+def main(argv : list = None):
+	parser = argparse.ArgumentParser(description = "Serve conjugations over HTTP.")
+	parser.add_argument("--host", default = DEFAULT_HOST)
+	parser.add_argument("--port", type = int, default = DEFAULT_PORT)
+	parser.add_argument("--max-batch", type = int, default = batcher.DEFAULT_MAX_BATCH, help = "largest batch of words")
+	parser.add_argument("--batch-window-ms", type = float, default = batcher.DEFAULT_WINDOW * 1000,
+						help = "longest wait for a batch to fill up (milliseconds)")
+	parser.add_argument("--max-queue", type = int, default = batcher.DEFAULT_MAX_QUEUE,
+						help = "most words waiting for a batch, further requests are answered 503")
+	parser.add_argument("--reload-interval", type = float, default = reload.DEFAULT_INTERVAL,
+						help = "seconds between checks of the data files (0: only reload on SIGHUP)")
+	args = parser.parse_args(argv)
+
+	service = ConjugationService(max_batch = args.max_batch, window = args.batch_window_ms / 1000, max_queue = args.max_queue)
+	server = make_server(args.host, args.port, service)
+	server.service.conjugator.stats.enable() # stage latencies for /metrics
+	service.reloader = reload.Reloader(service.conjugator, args.reload_interval or None)
+	if hasattr(signal, "SIGHUP"):
+		service.reloader.install_signal(signal.SIGHUP)
+	service.reloader.start()
+	print("serving on http://" + args.host + ":" + str(server.server_address[1]), file = sys.stderr)
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		service.reloader.stop()
+		server.server_close()
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,79 @@
+""""
+Single-flight
+
+Provides SingleFlight, which coalesces concurrent calls for the same key:
+while a call for a key is in flight, every other caller asking for that key
+waits for it and shares its result (or exception) instead of doing the work again.
+
+	flights = SingleFlight()
+	body = flights.do(("být", False), lambda: render("být"))
+"""
+
+import threading
+
+class _Call:
+	"""A call in flight: its callers wait on <done> for its result or error."""
+	__slots__ = ("done", "result", "error")
+
+	def __init__(self):
+		self.done = threading.Event()
+		self.result = None
+		self.error = None
+
+class SingleFlight:
+	"""
+	Coalesces concurrent calls for the same key.
+
+	Attributes:
+		calls : int --> calls that did the work
+		shared : int --> calls that waited for, and shared, the result of another call
+
+	Methods:
+		do(self, key, function)
+			call <function>, or wait for the call already in flight for <key>
+		in_flight(self) -> int
+			number of keys with a call in flight
+	"""
+	def __init__(self):
+		self.calls = 0
+		self.shared = 0
+		self._lock = threading.Lock()
+		self._flights = {}
+
+	def in_flight(self) -> int:
+		"""Return the number of keys with a call in flight."""
+		return len(self._flights)
+
+	def do(self, key, function):
+		"""
+		Return function(), unless a call for <key> is already in flight: then wait for it and return its result.
+
+		Only concurrent calls are coalesced, nothing is cached once a call has returned.
+
+		Raises:
+			whatever function() raised, in the caller and in every caller that waited for it.
+		"""
+		with self._lock:
+			call = self._flights.get(key)
+			leader = call is None
+			if leader:
+				call = self._flights[key] = _Call()
+				self.calls += 1
+			else:
+				self.shared += 1
+
+		if leader:
+			try:
+				call.result = function()
+			except BaseException as error:
+				call.error = error
+			finally:
+				with self._lock:
+					del self._flights[key]
+				call.done.set()
+		else:
+			call.done.wait()
+
+		if call.error is not None:
+			raise call.error
+		return call.result
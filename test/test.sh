@@ -3,5 +3,5 @@
 
 old_dir=`pwd`
 cd $BASE_DIR/test
-pytest test_vutils.py test_verbs.py test_conjutils.py test_conjugator.py
+pytest test_cache.py test_vutils.py test_verbs.py test_conjutils.py test_conjugator.py test_instrumentation.py test_data_bundle.py test_engine.py test_formatters.py test_golden.py test_lexicon.py test_interning.py test_paradigm.py test_singleflight.py test_batcher.py test_service.py test_binproto.py test_metrics.py test_loadgen.py test_parallel.py test_wire.py test_aio.py test_pipeline.py test_reload.py test_overlay.py
 cd $old_dir
\ No newline at end of file
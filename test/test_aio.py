@@ -0,0 +1,112 @@
+# tests the asyncio API
+
+import pytest
+import asyncio
+import concurrent.futures
+import time
+import aio
+from conjugator import Conjugator
+
+# globals/used by (almost) every test. DO NOT NEED TO BE RERUN EVERY TEST
+conjugator = Conjugator()
+words = ["studovat", "stát", "být", "studovan", "dělat", "jít", "nést", "mít", "pracovat", "zůstat", "bét"]
+expected = [ [ verb.get_table() for verb in result if verb ] for result in conjugator.conjugate_batch(words) ]
+
+def tables(results):
+    return [ [ verb.get_table() for verb in result if verb ] for result in results ]
+
+class SlowConjugator:
+    """Conjugates a batch in <delay> seconds, counting the words it was given."""
+    def __init__(self, delay):
+        self.delay = delay
+        self.words = []
+
+    def conjugate_batch(self, words, is_perfective = False):
+        self.words += words
+        time.sleep(self.delay)
+        return [ (None, None) for word in words ]
+
+####### TESTS BEGIN #######
+
+# single words, batches and streams give the same results as the synchronous API
+def test_conjugate():
+    async def run():
+        async with aio.AsyncConjugator(conjugator, chunk_size = 3) as async_conjugator:
+            (verb, verb2) = await async_conjugator.conjugate("stát")
+            assert (verb.kind(), verb2.kind()) == ("Class4", "Class3")
+            perfective = await async_conjugator.conjugate("dělat", True)
+            assert perfective[0].get_table() == conjugator.conjugate("dělat", True)[0].get_table()
+            assert tables(await async_conjugator.conjugate_batch(words)) == expected
+            streamed = [ item async for item in async_conjugator.stream(words + ["", "  "]) ]
+            assert [ word for (word, result) in streamed ] == words
+            assert tables(result for (word, result) in streamed) == expected
+            async def arriving():
+                for word in words:
+                    await asyncio.sleep(0)
+                    yield word + "\n"
+            assert [ word async for (word, result) in async_conjugator.stream(arriving()) ] == words
+    asyncio.run(run())
+
+# the event loop keeps running while a batch is being conjugated
+def test_not_blocking():
+    async def run():
+        async with aio.AsyncConjugator(SlowConjugator(0.3)) as async_conjugator:
+            ticks = 0
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+            task = asyncio.ensure_future(ticker())
+            await async_conjugator.conjugate_batch(words)
+            task.cancel()
+            assert ticks >= 10
+    asyncio.run(run())
+
+# timed out and cancelled calls drop the chunks that have not started yet
+def test_timeout_and_cancel():
+    async def run():
+        slow = SlowConjugator(0.1)
+        executor = concurrent.futures.ThreadPoolExecutor(1)
+        async_conjugator = aio.AsyncConjugator(slow, executor, chunk_size = 1)
+        with pytest.raises(asyncio.TimeoutError):
+            await async_conjugator.conjugate_batch(words, timeout = 0.15)
+        await asyncio.sleep(0.3)
+        assert len(slow.words) <= 3 # the running chunks finish, the others never start
+        slow.words.clear()
+        task = asyncio.ensure_future(async_conjugator.conjugate("být"))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # an abandoned stream does not leave chunks behind either
+        async for item in async_conjugator.stream(words):
+            break
+        await asyncio.sleep(0.3)
+        assert len(slow.words) <= 4
+        executor.shutdown()
+    asyncio.run(run())
+
+# a stream waiting too long for a chunk raises, dropping the chunks not yet started
+def test_stream_timeout():
+    async def run():
+        slow = SlowConjugator(0.2)
+        executor = concurrent.futures.ThreadPoolExecutor(1)
+        async_conjugator = aio.AsyncConjugator(slow, executor, chunk_size = 2)
+        with pytest.raises(asyncio.TimeoutError):
+            async for item in async_conjugator.stream(words, timeout = 0.05):
+                pass
+        await asyncio.sleep(0.5)
+        assert len(slow.words) <= 4 # the running chunk finishes, the one queued behind it never starts
+        assert [ word async for (word, result) in async_conjugator.stream(words[:2], timeout = 1.0) ] == words[:2]
+        executor.shutdown()
+    asyncio.run(run())
+
+# worker processes build their own conjugator
+def test_process_executor():
+    async def run():
+        with concurrent.futures.ProcessPoolExecutor(2) as executor:
+            async_conjugator = aio.AsyncConjugator(executor = executor, chunk_size = 4)
+            assert async_conjugator.conjugator is None
+            assert tables(await async_conjugator.conjugate_batch(words)) == expected
+    asyncio.run(run())
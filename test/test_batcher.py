@@ -0,0 +1,84 @@
+# tests the micro-batcher: batching, backpressure and errors
+
+import pytest
+import threading
+import batcher
+
+####### TESTS BEGIN #######
+
+# concurrent items are gathered into batches of at most max_batch, every submitter gets its own result
+def test_batches():
+    batches = []
+    def double(items):
+        batches.append(list(items))
+        return [ item * 2 for item in items ]
+    micro = batcher.MicroBatcher(double, max_batch = 8, window = 0.05)
+    results = {}
+    barrier = threading.Barrier(40)
+    def submit(item):
+        barrier.wait()
+        results[item] = micro.submit(item)
+    threads = [ threading.Thread(target = submit, args = (item,)) for item in range(40) ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    micro.close()
+    assert results == { item : item * 2 for item in range(40) }
+    assert all(len(batch) <= 8 for batch in batches)
+    assert len(batches) < 40 # batched, not dispatched one by one
+    assert (micro.batches, micro.batched) == (len(batches), 40)
+
+# a lone item does not wait longer than the window
+def test_window():
+    micro = batcher.MicroBatcher(lambda items: items, max_batch = 100, window = 0.01)
+    assert micro.submit("být") == "být"
+    assert micro.batches == 1
+    micro.close()
+    with pytest.raises(RuntimeError):
+        micro.submit("být")
+
+# a full queue refuses items at once, instead of queueing them
+def test_overloaded():
+    release = threading.Event()
+    def blocked(items):
+        release.wait(5)
+        return items
+    micro = batcher.MicroBatcher(blocked, max_batch = 1, window = 0, max_queue = 2)
+    threads = [ threading.Thread(target = micro.submit, args = (item,)) for item in range(3) ]
+    for thread in threads: # one being processed, two waiting
+        thread.start()
+    while micro.depth() < 2 or micro.batches < 1:
+        threading.Event().wait(0.01)
+    with pytest.raises(batcher.Overloaded):
+        micro.submit(3)
+    assert micro.rejected == 1
+    release.set()
+    for thread in threads:
+        thread.join()
+    micro.close()
+
+# the error of a batch is raised in every submitter of that batch
+def test_error():
+    def failing(items):
+        raise ValueError("bad batch")
+    micro = batcher.MicroBatcher(failing)
+    with pytest.raises(ValueError):
+        micro.submit("být")
+    micro.close()
+
+# a batch function returning fewer results than items fails the whole batch instead of leaving results unset
+def test_missing_results():
+    micro = batcher.MicroBatcher(lambda items: items[:-1])
+    with pytest.raises(RuntimeError):
+        micro.submit("být")
+    micro.close()
+
+# a closed batcher refuses new items instead of queueing them behind its worker
+def test_closed():
+    micro = batcher.MicroBatcher(lambda items: items)
+    assert micro.submit("být") == "být"
+    micro.close()
+    with pytest.raises(RuntimeError):
+        micro.submit("jít")
+    micro.close() # closing twice does nothing
@@ -0,0 +1,73 @@
+# tests the binary protocol: encoding, the daemon and the pooled client
+
+import pytest
+import socket
+import threading
+import binproto
+import golden
+from conjugator import Conjugator
+
+# globals/used by (almost) every test. DO NOT NEED TO BE RERUN EVERY TEST
+conjugator = Conjugator()
+records = golden.read_golden()[:300]
+words = [ record["word"] for record in records ]
+server = binproto.make_server("127.0.0.1", 0, conjugator)
+threading.Thread(target = server.serve_forever, daemon = True).start()
+port = server.server_address[1]
+
+####### TESTS BEGIN #######
+
+# requests and responses round trip, strings as UTF-8 with an offset table
+def test_encoding():
+    assert binproto.unpack_strings(binproto.pack_strings(["být", "", "žít"]), 0) == ["být", "", "žít"]
+    assert binproto.decode_request(binproto.encode_request(["být", "mít"], True)) == (["být", "mít"], True)
+    payload = binproto.encode_response(conjugator.conjugate_batch(["stát", "studovan"]))
+    assert binproto.decode_response(payload, ["stát", "studovan"]) == [golden.record(word, conjugator.conjugate(word))
+                                                                       for word in ["stát", "studovan"]]
+    with pytest.raises(binproto.ProtocolError):
+        binproto.decode_request(b"\x02\x00\x00\x00")
+    with pytest.raises(binproto.ProtocolError):
+        binproto.unpack_strings(binproto.pack_strings(["být"])[:-1], 0)
+    with pytest.raises(binproto.ProtocolError):
+        binproto.decode_response(binproto.encode_error(binproto.BAD_REQUEST, "bad"), [])
+
+# the daemon answers batches with the golden records, over pooled connections shared by threads
+def test_client():
+    client = binproto.Client("127.0.0.1", port, pool_size = 2)
+    assert client.conjugate_batch(words) == records
+    assert client.conjugate_batch([]) == []
+    assert client.conjugate_batch(["dělat"], True)[0]["verbs"][0]["table"] == conjugator.conjugate("dělat", True)[0].get_table()
+    results = {}
+    def batch(start):
+        results[start] = client.conjugate_batch(words[start:start + 30])
+    threads = [ threading.Thread(target = batch, args = (start,)) for start in range(0, 300, 30) ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert [ record for start in sorted(results) for record in results[start] ] == records
+    assert client._idle.qsize() == 2 # the others were closed, not kept
+    client.close()
+    assert client._idle.qsize() == 0
+
+# idle connections closed by the server are replaced
+def test_stale_connection():
+    client = binproto.Client("127.0.0.1", port)
+    client.conjugate_batch(["být"])
+    stale = client._idle.get_nowait()
+    stale.shutdown(socket.SHUT_RDWR)
+    client._idle.put_nowait(stale)
+    assert client.conjugate_batch(["být"])[0]["verbs"][0]["kind"] == "Být"
+    client.close()
+
+# malformed requests are answered with an error, the connection stays usable
+def test_bad_request():
+    with socket.create_connection(("127.0.0.1", port)) as sock:
+        binproto.write_frame(sock, b"\x01\x00\x05\x00" + binproto.pack_strings(["být"]))
+        with pytest.raises(binproto.ProtocolError) as error:
+            binproto.decode_response(binproto.read_frame(sock), ["být"])
+        assert "word count mismatch" in str(error.value)
+        binproto.write_frame(sock, binproto.encode_request(["být"]))
+        assert binproto.decode_response(binproto.read_frame(sock), ["být"])[0]["verbs"][0]["kind"] == "Být"
+        sock.sendall(binproto._LENGTH.pack(binproto.MAX_FRAME + 1)) # too large: the connection is closed
+        assert binproto.read_frame(sock) is None
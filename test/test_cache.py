@@ -0,0 +1,75 @@
+# tests the caches and their admission policies
+
+import pytest
+import itertools
+import random
+import cache
+import conjugator_utils as conjutils
+
+# globals/used by (almost) every test. DO NOT NEED TO BE RERUN EVERY TEST
+words = conjutils.get_verbs(conjutils.DEFAULT_DATA_DIR)
+hot = ["být", "mít", "chtít", "jít", "dělat", "vědět", "studovat", "psát"]
+
+####### TESTS BEGIN #######
+
+# least recently used entries are evicted first
+def test_lru():
+    lru = cache.LRUCache(2)
+    lru.put("a", 1)
+    lru.put("b", 2)
+    assert lru.get("a") == 1
+    lru.put("c", 3)
+    assert lru.keys() == ["a", "c"]
+    assert (lru.stats.hits, lru.stats.misses, lru.stats.evictions) == (1, 0, 1)
+
+# the sketch counts accesses (up to 15) and ages them by halving
+def test_frequency_sketch():
+    sketch = cache.FrequencySketch(100)
+    for i in range(20):
+        sketch.increment("být")
+    sketch.increment("mít")
+    assert sketch.estimate("být") == 15
+    assert sketch.estimate("mít") >= 1
+    assert sketch.estimate("chtít") == 0
+    for word in words[:1000 - 21]:
+        sketch.increment(word)
+    assert sketch.estimate("být") == 7
+
+# entries only enter the main area if they are accessed more often than its least recently used entry
+def test_tinylfu_admission():
+    tinylfu = cache.TinyLFUCache(50, window_ratio = 0.1)
+    for word in hot:
+        for i in range(3):
+            if tinylfu.get(word) is None:
+                tinylfu.put(word, word)
+    for word in words[:400]: # a scan, every word looked up once (shorter than the sketch's aging period)
+        if tinylfu.get(word) is None:
+            tinylfu.put(word, word)
+    assert all(word in tinylfu for word in hot)
+    assert len(tinylfu) <= 50
+    assert tinylfu.stats.rejections > 0
+    assert tinylfu.stats.evictions == 0 # a rejected entry leaves the main area as it was
+    assert tinylfu.get("být") == "být"
+
+# a scan running alongside interactive traffic hurts the TinyLFU hit ratio far less than the LRU's
+def test_replay_scan_resistance():
+    random.seed(1)
+    popular = words[::9][:500]
+    interactive = random.choices(popular, [ 1 / (rank + 1) for rank in range(len(popular)) ], k = 10000)
+    scan = itertools.cycle(words)
+    trace = [ word for (idx, word) in enumerate(interactive) for word in ([word, next(scan)] if idx > 2000 else [word]) ]
+    ratios = { policy : cache.replay(cache.make_cache(policy, 200), trace).hit_ratio() for policy in cache.POLICIES }
+    assert ratios["tinylfu"] > ratios["lru"] + 0.03
+
+# both policies have the same interface
+def test_make_cache():
+    for policy in cache.POLICIES:
+        entries = cache.make_cache(policy, 4)
+        entries.put("a", 1)
+        assert "a" in entries and entries.keys() == ["a"] and entries.items() == [("a", 1)]
+        entries.discard("a")
+        assert len(entries) == 0 and entries.get("a", 0) == 0
+        assert cache.make_cache(policy, 0).put("a", 1) is None
+        assert set(entries.stats.as_dict()) == {"hits", "misses", "evictions", "rejections", "hit_ratio"}
+    with pytest.raises(ValueError):
+        cache.make_cache("fifo", 4)
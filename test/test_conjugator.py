@@ -4,25 +4,16 @@ import conjugator_utils as conjutils
 import verbs as v
 import re
 import copy
+import threading
+import instrumentation
+from conjugator import Conjugator
+
+# shared by every test. DOES NOT NEED TO BE RELOADED FOR EVERY VERB
+conjugator = Conjugator()
 
 # also used in every test
-def conjugate_verb(verb_in : v.Verb) -> tuple:
-    irregular_verbs = conjutils.get_irregular_verbs()
-    prefixes = conjutils.get_prefixes()
-    concrete_verbs = conjutils.get_concrete_verbs()
-    matches = conjutils.find_verb_matches(verb_in, irregular_verbs)
-    is_concrete = conjutils.is_concrete_verb(verb_in, concrete_verbs)
-    (not_root, root) = conjutils.get_prefix(verb_in, prefixes)
-    (verb, verb2) = (None, None)
-    if matches != []:
-        (verb, verb2) = conjutils.disambiguate_verb(matches, verb_in, root, is_concrete)
-    if not verb:
-        verb = conjutils.determine_verb_class(verb_in, root, is_concrete)
-    if verb:
-        verb.conjugate() 
-        if verb2 is not None:
-            verb2.conjugate()
-    return (verb, verb2)
+def conjugate_verb(verb_in : str) -> tuple:
+    return conjugator.conjugate(verb_in)
 
 
 ####### TESTS BEGIN #######
@@ -278,4 +269,98 @@ def test_regular_conjugation():
                     ]
     for i in range(len(verbs)):
         (verb, verb2) = conjugate_verb(verbs[i])
-        assert verb.get_table() == expected_conjugations[i]
\ No newline at end of file
+        assert verb.get_table() == expected_conjugations[i]
+
+
+# the step by step utilities and the Conjugator conjugate identically
+def test_conjugator_matches_utilities():
+    irregular_verbs = conjutils.get_irregular_verbs()
+    prefixes = conjutils.get_prefixes()
+    concrete_verbs = conjutils.get_concrete_verbs()
+    for word in ["stát", "nestát", "být", "nebýt", "jít", "přijít", "mstít", "studovat", "zůstat", "říct"]:
+        expected = conjutils.conjugate_verb(word, irregular_verbs, prefixes, concrete_verbs)
+        (verb, verb2) = conjugate_verb(word)
+        assert verb.get_table() == expected[0].get_table()
+        assert (verb2 is None) == (expected[1] is None)
+        if verb2 is not None:
+            assert verb2.get_table() == expected[1].get_table()
+
+# batches keep their order, streams strip and skip blank words
+def test_conjugate_batch_and_stream():
+    words = ["dělat", "bét", "stát", "dělat"]
+    results = conjugator.conjugate_batch(words)
+    assert [ verb.kind() if verb else None for (verb, verb2) in results ] == ["Class1_at", None, "Class4", "Class1_at"]
+    assert results[2][1].kind() == "Class3"
+
+    stream = conjugator.conjugate_stream(["dělat\n", "  \n", " stát "])
+    assert [ (word, result[0].kind()) for (word, result) in stream ] == [("dělat", "Class1_at"), ("stát", "Class4")]
+
+# repeated words in a batch are conjugated once and share their result
+def test_conjugate_batch_dedup():
+    stats = instrumentation.PipelineStats(enabled = True)
+    counting = Conjugator(conjugator.state, stats)
+    results = counting.conjugate_batch(["být", "dělat", "být", "být", "dělat"])
+    assert stats.snapshot()["words"] == 2
+    assert results[0] is results[2] is results[3]
+    assert results[1][0].get_table() == conjugate_verb("dělat")[0].get_table()
+
+# a shared Conjugator conjugates correctly from many threads at once
+def test_conjugator_threads():
+    words = ["jít", "studovat", "být", "nést", "dělat", "mít", "chtít", "stát"] * 25
+    expected = { word : conjugator.conjugate(word)[0].get_table() for word in words }
+    shared = Conjugator(conjugator.state)
+    errors = []
+    def work(offset):
+        for word in words[offset:] + words[:offset]:
+            if shared.conjugate(word)[0].get_table() != expected[word]:
+                errors.append(word)
+    threads = [ threading.Thread(target = work, args = (i,)) for i in range(8) ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+# single forms are the same as the corresponding cell of the full conjugation
+def test_conjugate_form():
+    for word in ["stát", "nebýt", "jít", "tisknout", "prosit", "chtít", "brát", "ctít"]:
+        (verb, verb2) = conjugate_verb(word)
+        for tense in range(len(v.Tense)):
+            for person in range(len(v.Person)):
+                assert conjugator.conjugate_form(word, tense, person) == verb.get_conjugation_at(tense, person)
+    assert conjugator.conjugate_form("jít", v.Tense.FUTURE, v.Person.FIRST_SG) == "půjdu"
+    assert conjugator.conjugate_form("bét", v.Tense.PRESENT, v.Person.FIRST_SG) is None
+
+# every conjugation has a status and a reason, the rejected words are counted instead of printed
+def test_conjugate_result(capsys):
+    c = Conjugator(conjugator.state)
+    assert c.conjugate_result("studovat")[1:3] == (conjutils.STATUS_OK, None)
+    stat = c.conjugate_result("stát")
+    assert (stat.status, stat.reason) == (conjutils.STATUS_AMBIGUOUS, conjutils.REASON_TWO_CONJUGATIONS)
+    assert stat.verb and stat.verb2
+    assert [ c.conjugate_result(word).reason for word in ["bét", "xyz", " ", "bét"] ] == [
+        conjutils.REASON_NO_VERB_CLASS, conjutils.REASON_NOT_INFINITIVE, conjutils.REASON_EMPTY, conjutils.REASON_NO_VERB_CLASS]
+    assert c.rejection_counts() == {(conjutils.STATUS_NO_MATCH, conjutils.REASON_NO_VERB_CLASS) : 2,
+                                    (conjutils.STATUS_NO_MATCH, conjutils.REASON_NOT_INFINITIVE) : 1,
+                                    (conjutils.STATUS_NO_MATCH, conjutils.REASON_EMPTY) : 1}
+    assert capsys.readouterr().out == ""
+
+# a word raising an exception is rejected as an error, the rest of the batch or stream is conjugated
+def test_error_isolation():
+    c = Conjugator(conjugator.state)
+    conjugate = c.conjugate
+    def broken(word, is_perfective = False):
+        if word == "dělat":
+            raise RuntimeError("broken")
+        return conjugate(word, is_perfective)
+    c.conjugate = broken
+    error = c.conjugate_result("dělat")
+    assert (error.status, error.reason, type(error.error)) == (conjutils.STATUS_ERROR, "RuntimeError", RuntimeError)
+    results = c.conjugate_batch(["nosit", "dělat", "jít", "dělat"])
+    assert results[1] == results[3] == (None, None)
+    assert results[0][0].get_table() == conjugate_verb("nosit")[0].get_table() and results[2][0]
+    rejected = []
+    streamed = list(c.conjugate_stream(["jít\n", "dělat\n", "bét\n"], rejects = rejected.append))
+    assert [ word for (word, result) in streamed ] == ["jít", "dělat", "bét"]
+    assert [ (result.word, result.status) for result in rejected ] == [("dělat", conjutils.STATUS_ERROR), ("bét", conjutils.STATUS_NO_MATCH)]
+    assert c.rejection_counts()[(conjutils.STATUS_ERROR, "RuntimeError")] == 3
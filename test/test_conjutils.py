@@ -320,4 +320,22 @@ def test_is_concrete_verb():
                ]
     
     for i in range(len(verbs)):
-        assert conjutils.is_concrete_verb(verbs[i], concrete_verbs) == expected[i]
\ No newline at end of file
+        assert conjutils.is_concrete_verb(verbs[i], concrete_verbs) == expected[i]
+
+# entries added to the indexes are found after the others, as if appended to the data files
+def test_index_additions():
+    index = conjutils.IrregularIndex(irregular_verbs)
+    index.add(("stát", 1, "x", "y", "z"))
+    index.add(("kv.rgat", 2, "kvorž", "kvorgal", "kvorži"))
+    extended = irregular_verbs + [("stát", 1, "x", "y", "z"), ("kv.rgat", 2, "kvorž", "kvorgal", "kvorži")]
+    for word in ["stát", "vstát", "kvorgat", "nosit"]:
+        assert index.find_verb_matches(word) == conjutils.find_verb_matches(word, extended)
+
+    patterns = conjutils.get_prefix_patterns()
+    automaton = conjutils.PrefixAutomaton(patterns)
+    automaton.add_pattern("kv[oa]")
+    automaton.add_pattern("vy") # already known: the earlier rank wins
+    expression = conjutils.prefixes_expression(patterns + ["kv[oa]", "vy"])
+    assert automaton.trie == conjutils.PrefixAutomaton(patterns + ["kv[oa]", "vy"]).trie
+    for word in ["kvorgat", "vykvanout", "kvrkat", "vyskočit"]:
+        assert automaton.get_prefix(word) == conjutils.get_prefix(word, expression)
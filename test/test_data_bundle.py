@@ -0,0 +1,88 @@
+# tests the packed data bundle and the prefix automaton
+
+import pytest
+import conjugator_utils as conjutils
+import data_bundle
+
+# globals/used by (almost) every test. DO NOT NEED TO BE RERUN EVERY TEST
+prefixes = conjutils.get_prefixes()
+automaton = conjutils.PrefixAutomaton(conjutils.get_prefix_patterns())
+
+####### TESTS BEGIN #######
+
+# the shipped bundle must be rebuilt whenever a data file changes (python3 data_bundle.py)
+def test_shipped_bundle_up_to_date():
+    data = data_bundle.read_bundle(data_bundle.DEFAULT_BUNDLE)
+    assert data.checksum == data_bundle.source_checksum(conjutils.DEFAULT_DATA_DIR)
+    assert data.irregular_verbs == conjutils.get_irregular_verbs(conjutils.DEFAULT_DATA_DIR)
+    assert data.concrete_verbs == frozenset(conjutils.get_concrete_verbs(conjutils.DEFAULT_DATA_DIR))
+    assert data.prefixes == conjutils.get_prefixes(conjutils.DEFAULT_DATA_DIR)
+    assert data.prefix_automaton.trie == automaton.trie
+
+# bundles round trip, corrupted bundles are rejected
+def test_pack_unpack(tmp_path):
+    data = data_bundle.load_text(conjutils.DEFAULT_DATA_DIR)
+    path = str(tmp_path / "custom.bundle")
+    data_bundle.write_bundle(data, path)
+    assert data_bundle.read_bundle(path).irregular_verbs == data.irregular_verbs
+
+    raw = data_bundle.pack(data)
+    corrupted = raw[:-1] + bytes([raw[-1] ^ 1])
+    with pytest.raises(data_bundle.BundleError):
+        data_bundle.unpack(corrupted)
+    with pytest.raises(data_bundle.BundleError):
+        data_bundle.unpack(b"CZVB")
+    with pytest.raises(data_bundle.BundleError):
+        data_bundle.unpack(b"XXXX" + raw[4:])
+
+# the data is found with or without VERB_DATA_DIR, custom data directories override the bundle
+def test_load_data(tmp_path, monkeypatch):
+    monkeypatch.delenv("VERB_DATA_DIR", raising = False)
+    monkeypatch.delenv("VERB_DATA_BUNDLE", raising = False)
+    data = data_bundle.load_data()
+    assert ("být", 4, "bud", "byl", "buď") in data.irregular_verbs
+
+    for name in data_bundle.SOURCE_FILES:
+        (tmp_path / name).write_text(open(conjutils.DEFAULT_DATA_DIR + "/" + name, encoding = "utf-8").read(), encoding = "utf-8")
+    (tmp_path / "concrete.txt").write_text("jít\n", encoding = "utf-8")
+    monkeypatch.setenv("VERB_DATA_DIR", str(tmp_path))
+    assert data_bundle.load_data().concrete_verbs == frozenset(["jít"])
+
+    path = str(tmp_path / "custom.bundle")
+    data_bundle.build_bundle(str(tmp_path), path)
+    monkeypatch.setenv("VERB_DATA_BUNDLE", path)
+    assert data_bundle.load_data().concrete_verbs == frozenset(["jít"])
+
+# edits of the shipped text files are loaded, with a warning, until the shipped bundle is rebuilt
+def test_stale_bundle(tmp_path, monkeypatch):
+    monkeypatch.delenv("VERB_DATA_DIR", raising = False)
+    monkeypatch.delenv("VERB_DATA_BUNDLE", raising = False)
+    for name in data_bundle.SOURCE_FILES:
+        (tmp_path / name).write_text(open(conjutils.DEFAULT_DATA_DIR + "/" + name, encoding = "utf-8").read(), encoding = "utf-8")
+    monkeypatch.setattr(conjutils, "DEFAULT_DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(data_bundle, "DEFAULT_BUNDLE", str(tmp_path / data_bundle.BUNDLE_NAME))
+    data_bundle.build_bundle(str(tmp_path))
+    assert data_bundle.load_data().concrete_verbs != frozenset(["jít"])
+    (tmp_path / "concrete.txt").write_text("jít\n", encoding = "utf-8")
+    with pytest.warns(UserWarning):
+        assert data_bundle.load_data().concrete_verbs == frozenset(["jít"])
+    data_bundle.build_bundle(str(tmp_path))
+    assert data_bundle.load_data().concrete_verbs == frozenset(["jít"])
+
+# prefix patterns are expanded in regex preference order
+def test_expand_prefix_pattern():
+    assert conjutils.expand_prefix_pattern("beze?") == ["beze", "bez"]
+    assert conjutils.expand_prefix_pattern("d[oů]") == ["do", "dů"]
+    assert conjutils.expand_prefix_pattern("ob?e?") == ["obe", "ob", "oe", "o"]
+    for bad_pattern in ["(ne)", "ne*", "[a-z]", "n.", "[^a]"]:
+        with pytest.raises(ValueError):
+            conjutils.expand_prefix_pattern(bad_pattern)
+
+# the automaton splits prefixes exactly like the regex expression
+def test_prefix_automaton():
+    words = ["ledne", "nenenenavydopo", "nenenenavydopoledne", "nedalekohledpo", "", "obeobbeze",
+             "přípřepře", "nadejít", "naddat", "nejít", "zneuznat", "spolupracovat", "vyjít"]
+    words += [ line.rstrip("\n") for line in open(conjutils.DEFAULT_DATA_DIR + "/verbs.txt", encoding = "utf-8") ]
+    for word in words:
+        assert automaton.get_prefix(word) == conjutils.get_prefix(word, prefixes)
+        assert conjutils.get_prefix(word, automaton) == conjutils.get_prefix(word, prefixes)
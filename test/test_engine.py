@@ -0,0 +1,164 @@
+# tests the engine state: indexes, classification cache and snapshots
+
+import pytest
+import cache
+import conjugator_utils as conjutils
+import data_bundle
+import engine
+import golden
+import instrumentation
+import verbs as v
+
+# globals/used by (almost) every test. DO NOT NEED TO BE RERUN EVERY TEST
+irregular_verbs = conjutils.get_irregular_verbs()
+prefixes = conjutils.get_prefixes()
+concrete_verbs = conjutils.get_concrete_verbs()
+data = data_bundle.load_data()
+words = ["studovat", "stát", "být", "jít", "přijít", "nést", "bét", "zůstat", "dělat", "mstít"]
+
+####### TESTS BEGIN #######
+
+# the irregular suffix index finds the same matches, in the same order
+def test_irregular_index():
+    index = conjutils.IrregularIndex(irregular_verbs)
+    all_words = [ line.rstrip("\n") for line in open(conjutils.DEFAULT_DATA_DIR + "/verbs.txt", encoding = "utf-8") ]
+    all_words += [ verb[conjutils.IrregularIdx.RGX_INFINITIVE] for verb in irregular_verbs ] + ["", "t", "stát\n"]
+    for word in all_words:
+        assert index.find_verb_matches(word) == conjutils.find_verb_matches(word, irregular_verbs)
+        assert conjutils.find_verb_matches(word, index) == conjutils.find_verb_matches(word, irregular_verbs)
+
+    # infinitives with regex syntax are still matched as regexes
+    verbs = [("st[áa]t", 4, "stan", "stal", "staň"), ("stát", 3, "stoj", "stál", "stůj")]
+    index = conjutils.IrregularIndex(verbs)
+    assert index.find_verb_matches("přestat") == verbs[:1]
+    assert index.find_verb_matches("vstát") == verbs
+
+# classifications are identical to the plain pipeline, and cached
+def test_classify():
+    state = engine.EngineState(data)
+    for word in words:
+        expected = conjutils.classify_word(word, irregular_verbs, prefixes, concrete_verbs)
+        assert state.classify(word) == expected
+        assert state.classify(word) == expected
+    assert state.classifications.stats.hits == len(words)
+    assert state.classify("stát").spec.verb_class == v.Class4
+    assert state.classify("stát").spec2.verb_class == v.Class3
+    assert state.classify("jít").is_concrete
+
+# traced words tell whether their classification was cached
+def test_classify_traced():
+    state = engine.EngineState(data)
+    stats = instrumentation.PipelineStats()
+    stats.add_hook(lambda stage, start_ns, end_ns, attributes: None)
+    (first, second) = (stats.timer("dělat"), stats.timer("dělat"))
+    state.classify("dělat", first)
+    state.classify("dělat", second)
+    assert (first.attributes["cached"], second.attributes["cached"]) == (False, True)
+    assert "root" not in second.attributes
+
+# snapshots restore the indexes and the warm cache
+def test_snapshot(tmp_path):
+    path = str(tmp_path / "engine.snapshot")
+    state = engine.EngineState(data)
+    state.warm(words)
+    state.save_snapshot(path)
+
+    restored = engine.EngineState.load_snapshot(path, data)
+    assert len(restored.classifications) == len(words)
+    assert restored.classifications.items() == state.classifications.items()
+    assert restored.classify("stát") == state.classify("stát")
+    assert restored.irregular_index.find_verb_matches("stát") == state.irregular_index.find_verb_matches("stát")
+
+    state.save_snapshot(path, include_cache = False)
+    assert len(engine.EngineState.load_snapshot(path, data).classifications) == 0
+
+    # the cache policy is restored too
+    state = engine.EngineState(data, cache_policy = "lru")
+    state.warm(words)
+    state.save_snapshot(path)
+    restored = engine.EngineState.load_snapshot(path, data)
+    assert (restored.cache_policy, type(restored.classifications)) == ("lru", cache.LRUCache)
+    assert restored.classifications.items() == state.classifications.items()
+    assert state.cache_stats()["misses"] == len(words)
+
+# snapshots of other data or code are rejected
+def test_snapshot_rejected(tmp_path, monkeypatch):
+    path = str(tmp_path / "engine.snapshot")
+    engine.EngineState(data).save_snapshot(path)
+
+    other_data = data._replace(checksum = "0" * 64)
+    with pytest.raises(engine.SnapshotError):
+        engine.EngineState.load_snapshot(path, other_data)
+    assert len(engine.EngineState.warm_start(path, other_data).classifications) == 0
+
+    monkeypatch.setattr(engine, "_code_version", "1" * 64)
+    with pytest.raises(engine.SnapshotError):
+        engine.EngineState.load_snapshot(path, data)
+
+    (tmp_path / "garbage").write_bytes(b"not a snapshot")
+    with pytest.raises(engine.SnapshotError):
+        engine.EngineState.load_snapshot(str(tmp_path / "garbage"), data)
+    assert engine.EngineState.warm_start(str(tmp_path / "missing"), data).data == data
+
+# entries added at runtime classify every word as a state built from the extended data does
+def test_add_entries():
+    row = ("kvorgat", 2, "kvorž", "kvorgal", "kvorži")
+    extended = data._replace(irregular_verbs = data.irregular_verbs + [row], concrete_verbs = data.concrete_verbs | {"dělat"},
+                             prefix_automaton = conjutils.PrefixAutomaton(data.prefix_automaton.patterns + ["kv[oa]"]))
+    sample = golden.golden_words()[::11] + ["kvorgat", "vykvorgat", "kvanout", "dělat", "nedělat", "udělat"]
+    state = engine.EngineState(data)
+    state.warm(sample)
+    affected = state.add_entries([",".join(map(str, row))], ["kv[oa]"], ["dělat"])
+    assert {"kvorgat", "vykvorgat", "kvanout", "dělat", "nedělat"} <= affected and "udělat" not in affected
+    assert all(word not in state.classifications for word in affected)
+    assert len(state.classifications) == len(set(sample)) - len(affected) # the other cached words are kept
+    rebuilt = engine.EngineState(extended)
+    for word in sample:
+        assert state.classify(word) == rebuilt.classify(word)
+
+    # the data the state was built from is left untouched, so are other states of the same data
+    assert row not in data.irregular_verbs and "dělat" not in data.concrete_verbs and "kv[oa]" not in data.prefix_automaton.patterns
+    other = engine.EngineState(data)
+    assert not other.classify("dělat").is_concrete and other.prefixes.get_prefix("kvanout") == ("", "kvanout")
+
+    # malformed entries are refused before anything is added
+    with pytest.raises(ValueError):
+        state.add_entries([row], ["kv(o|a)"])
+    assert len(state.irregular_index.verbs) == len(data.irregular_verbs) + 1
+
+# classifications started before entries are added are not cached
+def test_add_entries_race():
+    state = engine.EngineState(data)
+    classify_word = conjutils.classify_word
+    def racing(*args):
+        classification = classify_word(*args)
+        state.add_entries(concrete_verbs = ["nosit"]) # lands while "nosit" is being classified
+        return classification
+    engine.conjutils.classify_word = racing
+    try:
+        assert not state.classify("nosit").is_concrete
+    finally:
+        engine.conjutils.classify_word = classify_word
+    assert "nosit" not in state.classifications
+    assert state.classify("nosit").is_concrete
+
+# added entries survive a snapshot
+def test_add_entries_snapshot(tmp_path):
+    path = str(tmp_path / "engine.snapshot")
+    state = engine.EngineState(data)
+    state.add_entries(["kvorgat,2,kvorž,kvorgal,kvorži"], ["kv[oa]"], ["dělat"])
+    state.save_snapshot(path)
+    restored = engine.EngineState.load_snapshot(path, data)
+    for word in ["kvorgat", "kvanout", "dělat"]:
+        assert restored.classify(word) == state.classify(word)
+
+# a classification started before entries are added is never cached, however late they land
+def test_put_classification():
+    state = engine.EngineState(data)
+    generation = state.generation
+    classification = state.classify("nosit")
+    state.classifications.discard("nosit")
+    state.add_entries(concrete_verbs = ["nosit"])
+    assert not state.put_classification("nosit", classification, generation)
+    assert "nosit" not in state.classifications
+    assert state.put_classification("nosit", state.classify("nosit"), state.generation)
@@ -0,0 +1,63 @@
+# tests the streaming output writers
+
+import pytest
+import io
+import csv
+import json
+import formatters
+from conjugator import Conjugator
+
+# globals/used by (almost) every test. DO NOT NEED TO BE RERUN EVERY TEST
+conjugator = Conjugator()
+words = ["studovat", "stát", "studovan"]
+results = [ (word, conjugator.conjugate(word)) for word in words ]
+
+def write(format_name):
+    """Write the results in <format_name>, returning the output."""
+    file = io.StringIO()
+    writer = formatters.get_writer(format_name, file)
+    assert writer.write_all(results) == len(words)
+    return file.getvalue()
+
+####### TESTS BEGIN #######
+
+# a JSON object per word, the same as the golden records
+def test_jsonl():
+    lines = write("jsonl").splitlines()
+    assert len(lines) == len(words)
+    records = [ json.loads(line) for line in lines ]
+    assert [ record["word"] for record in records ] == words
+    assert records[0]["verbs"][0]["table"] == results[0][1][0].get_table()
+    assert len(records[1]["verbs"]) == 2
+    assert records[2]["verbs"] == []
+
+# a header, then a row per word, conjugation and tense
+def test_csv_tsv():
+    for (format_name, delimiter) in [("csv", ","), ("tsv", "\t")]:
+        rows = list(csv.reader(io.StringIO(write(format_name)), delimiter = delimiter))
+        assert rows[0] == list(formatters.COLUMNS)
+        assert rows[1] == ["studovat", "Class2_ovat", "present", "studuji/u", "studuješ", "studuje", "studujeme", "studujete", "studují"]
+        assert len(rows) == 1 + 5 + 2 * 5 + 1
+        assert rows[-1] == ["studovan"] + [""] * (len(formatters.COLUMNS) - 1)
+
+# aligned table per conjugation
+def test_table():
+    lines = write("table").splitlines()
+    assert lines[0] == "studovat (Class2_ovat)"
+    assert lines[1].split() == list(formatters.TENSE_NAMES)
+    assert lines[2].split("  ")[0] == "1sg studuji/u"
+    assert lines[4].index("bude studovat") == lines[2].index("budu studovat")
+    assert "stát (Class3)" in lines
+    assert lines[-2] == "studovan: no verb class pattern corresponding with given verb"
+
+# unknown formats are rejected
+def test_get_writer():
+    assert isinstance(formatters.get_writer("tsv", io.StringIO()), formatters.TsvWriter)
+    with pytest.raises(ValueError):
+        formatters.get_writer("xml", io.StringIO())
+
+# writers to be appended to, such as the chunks of parallel workers, leave out the header
+def test_no_header():
+    file = io.StringIO()
+    formatters.get_writer("csv", file, header = False).write_all(results[:1])
+    assert file.getvalue().splitlines()[0].startswith("studovat,Class2_ovat,present,")
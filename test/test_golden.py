@@ -0,0 +1,43 @@
+# tests the golden corpus and the differential checker
+
+import pytest
+import golden
+from conjugator import Conjugator
+
+# globals/used by (almost) every test. DO NOT NEED TO BE RERUN EVERY TEST
+records = golden.read_golden()
+
+class BrokenConjugator(Conjugator):
+    """Candidate engine getting the 3rd person plural present of studovat wrong."""
+    def conjugate(self, word, is_perfective = False):
+        (verb, verb2) = Conjugator.conjugate(self, word, is_perfective)
+        if word == "studovat":
+            verb.get_table()[0][5] = "studujou"
+        return (verb, verb2)
+
+####### TESTS BEGIN #######
+
+# the corpus covers every verb and irregular infinitive, including both conjugations of stát
+def test_golden_corpus():
+    assert [ entry["word"] for entry in records ] == golden.golden_words()
+    stat = next(entry for entry in records if entry["word"] == "stát")
+    assert len(stat["verbs"]) == 2
+    studovat = next(entry for entry in records if entry["word"] == "studovat")
+    assert studovat["verbs"][0]["table"][0][0] == "studuji/u"
+
+# today's engine matches the corpus, cell for cell (in this process and across workers)
+def test_check():
+    assert golden.check(jobs = 1) == []
+    assert golden.check(jobs = 2) == []
+
+# mismatching cells are reported
+def test_check_mismatch():
+    mismatches = golden.check(__name__ + ":BrokenConjugator", jobs = 2)
+    assert mismatches == [ golden.Mismatch("studovat", 0, 0, 5, "studují", "studujou") ]
+
+# records of a different kind or number of conjugations are reported as a whole
+def test_compare():
+    expected = {"word" : "stát", "verbs" : [ {"kind" : "Class1", "table" : [["a"]]} ]}
+    assert golden.compare(expected, {"word" : "stát", "verbs" : []}) == [ golden.Mismatch("stát", None, None, None, 1, 0) ]
+    actual = {"word" : "stát", "verbs" : [ {"kind" : "Class2", "table" : [["a"]]} ]}
+    assert golden.compare(expected, actual) == [ golden.Mismatch("stát", 0, None, None, "Class1", "Class2") ]
@@ -0,0 +1,113 @@
+# tests the pipeline instrumentation (counters, timers and histograms)
+
+import pytest
+import conjugator_utils as conjutils
+import instrumentation
+
+# globals/used by (almost) every test. DO NOT NEED TO BE RERUN EVERY TEST
+irregular_verbs = conjutils.get_irregular_verbs()
+prefixes = conjutils.get_prefixes()
+concrete_verbs = conjutils.get_concrete_verbs()
+
+def conjugate_verb(word : str, stats : instrumentation.PipelineStats) -> tuple:
+    return conjutils.conjugate_verb(word, irregular_verbs, prefixes, concrete_verbs, stats = stats)
+
+####### TESTS BEGIN #######
+
+# disabled instrumentation records nothing, but still conjugates
+def test_disabled():
+    stats = instrumentation.PipelineStats()
+    assert stats.timer() is stats.timer() # shared do-nothing timer
+    (verb, verb2) = conjugate_verb("studovat", stats)
+    assert verb.get_conjugation_at(0, 0) == "studuji/u"
+    assert stats.snapshot() == {"enabled": False, "words": 0, "kinds": {}}
+
+# stages are counted and grouped by the resulting kind
+def test_snapshot_grouped_by_kind():
+    stats = instrumentation.PipelineStats(enabled = True)
+    for word in ["studovat", "pracovat", "mít", "stát", "bét"]:
+        conjugate_verb(word, stats)
+    snapshot = stats.snapshot()
+    assert snapshot["words"] == 5
+    assert sorted(snapshot["kinds"]) == sorted(["Class2_ovat", "Class1", "Class4", instrumentation.NO_MATCH])
+
+    ovat = snapshot["kinds"]["Class2_ovat"]
+    assert ovat[instrumentation.TOTAL]["count"] == 2
+    for stage in ["find_verb_matches", "get_prefix", "determine_verb_class", "construct", "conjugate"]:
+        assert ovat[stage]["count"] == 2
+        assert ovat[stage]["total_ns"] >= ovat[stage]["max_ns"] >= 0
+    assert "disambiguate_verb" not in ovat # no irregular matches
+
+    # irregular verbs are disambiguated, not classified
+    mit = snapshot["kinds"]["Class1"]
+    assert mit["disambiguate_verb"]["count"] == 1
+    assert "determine_verb_class" not in mit
+
+    # unclassifiable words are never constructed... but still timed
+    none = snapshot["kinds"][instrumentation.NO_MATCH]
+    assert none["determine_verb_class"]["count"] == 1
+
+    stats.reset()
+    assert stats.snapshot()["words"] == 0
+
+# histograms account for every word
+def test_histogram():
+    stats = instrumentation.PipelineStats(enabled = True)
+    for word in ["dělat", "volat", "čekat"]:
+        conjugate_verb(word, stats)
+    histogram = stats.histogram("Class1_at")
+    assert len(histogram) == instrumentation.HISTOGRAM_BUCKETS
+    assert sum(count for (bound, count) in histogram) == 3
+    assert sum(count for (bound, count) in stats.histogram("Class1_at", "conjugate")) == 3
+    assert sum(count for (bound, count) in stats.histogram("Class2")) == 0
+    assert list(stats.histograms()) == ["Class1_at"]
+
+    # bucket boundaries
+    assert instrumentation.bucket_index(0) == 0
+    assert instrumentation.bucket_index(2 ** 10) == 1
+    assert instrumentation.bucket_index(2 ** 60) == instrumentation.HISTOGRAM_BUCKETS - 1
+
+# hooks get a span per stage with the word's attributes, even while the counters are disabled
+def test_hooks():
+    stats = instrumentation.PipelineStats()
+    spans = []
+    hook = lambda stage, start_ns, end_ns, attributes: spans.append((stage, start_ns, end_ns, dict(attributes)))
+    stats.add_hook(hook)
+    conjugate_verb("mít", stats)
+    assert [ span[0] for span in spans ] == ["find_verb_matches", "get_prefix", "disambiguate_verb", "construct", "conjugate",
+                                             instrumentation.TOTAL]
+    assert all(start_ns <= end_ns for (stage, start_ns, end_ns, attributes) in spans)
+    assert spans[0][1] == spans[-1][1] and spans[-2][2] == spans[-1][2] # the total covers every stage
+    assert spans[0][3] == {"word" : "mít", "root" : "mít", "irregular" : "mít", "cached" : False, "kind" : "Class1"}
+    assert stats.snapshot()["words"] == 0
+
+    spans.clear()
+    conjugate_verb("vystudovat", stats)
+    root = conjutils.get_prefix("vystudovat", prefixes)[1]
+    assert spans[0][3] == {"word" : "vystudovat", "root" : root, "cached" : False, "kind" : "Class2_ovat"}
+
+    # the irregular verb is the match actually used, such as the 2nd match of stát
+    spans.clear()
+    second = [("stát", 4, "stan", "stal", "staň"), ("ostát", 3, "stoj", "stál", "stůj")]
+    verb = conjutils.conjugate_verb("dostát", second, prefixes, concrete_verbs, stats = stats)[0]
+    assert (spans[0][3]["irregular"], verb.kind()) == ("ostát", "Class3")
+
+    # a failing hook is counted, it does not fail the conjugation
+    def failing(stage, start_ns, end_ns, attributes):
+        raise RuntimeError("tracer down")
+    stats.add_hook(failing)
+    assert conjugate_verb("studovat", stats)[0].kind() == "Class2_ovat"
+    assert stats.hook_errors == 6
+
+    # without hooks, disabled instrumentation is back to the shared do-nothing timer
+    stats.remove_hook(hook)
+    stats.remove_hook(failing)
+    assert stats.timer("mít") is instrumentation.NULL_TIMER
+
+# the slowest words are kept, slowest first
+def test_slowest_words():
+    slowest = instrumentation.SlowestWords(2)
+    for (word, ns) in [("a", 5), ("b", 30), ("c", 10), ("d", 20)]:
+        slowest("get_prefix", 0, 1000, {"word" : word})
+        slowest(instrumentation.TOTAL, 100, 100 + ns, {"word" : word})
+    assert slowest.words() == [(30, {"word" : "b"}), (20, {"word" : "d"})]
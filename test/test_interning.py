@@ -0,0 +1,39 @@
+# tests the interning layer
+
+import pytest
+import golden
+import interning
+from conjugator import Conjugator
+
+# globals/used by (almost) every test. DO NOT NEED TO BE RERUN EVERY TEST
+conjugator = Conjugator()
+words = ["studovat", "stát", "nestát", "být", "nebýt", "dělat"]
+records = golden.conjugate_records(conjugator, words)
+
+####### TESTS BEGIN #######
+
+# equal strings are pooled, the first one wins
+def test_intern():
+    interner = interning.Interner()
+    first = "".join(["stu", "dovat"])
+    second = "".join(["studo", "vat"])
+    assert interner.intern(first) is first
+    assert interner.intern(second) is first
+    assert (len(interner), interner.lookups, interner.hits) == (1, 2, 1)
+
+# interned records are equal to the originals and share their equal strings
+def test_intern_record():
+    interner = interning.Interner()
+    interned = [ interner.intern_record(record) for record in records ]
+    assert interned == records
+    (stat, stat2) = interned[1]["verbs"]
+    assert stat["table"][2][0] is stat2["table"][2][0] # budu stát
+    assert records[1]["verbs"][0]["table"][2][0] is not records[1]["verbs"][1]["table"][2][0]
+
+# interning never takes more memory
+def test_memory_report():
+    report = interning.memory_report(records)
+    assert report["verbs"] == len(words)
+    assert report["saved_bytes"] == report["bytes"] - report["interned_bytes"] > 0
+    assert report["saved_bytes_per_10k"] == report["saved_bytes"] * 10000 / len(words)
+    assert interning.memory_report([])["saved_bytes_per_10k"] == 0.0
@@ -0,0 +1,79 @@
+# tests the precomputed lexicon and its incremental rebuild
+
+import pytest
+import conjugator_utils as conjutils
+import data_bundle
+import golden
+import lexicon
+
+# globals/used by (almost) every test. DO NOT NEED TO BE RERUN EVERY TEST
+data = data_bundle.load_text(conjutils.DEFAULT_DATA_DIR)
+verbs = conjutils.get_verbs(conjutils.DEFAULT_DATA_DIR)
+words = lexicon.lexicon_words(verbs, data)
+built = lexicon.Lexicon.build(words, data)
+
+def edited_data(tmp_path, name, edit):
+    """Copy the data files to <tmp_path>, apply <edit> to the text of file <name> and load them."""
+    for source in data_bundle.SOURCE_FILES:
+        text = open(conjutils.DEFAULT_DATA_DIR + "/" + source, encoding = "utf-8").read()
+        (tmp_path / source).write_text(edit(text) if source == name else text, encoding = "utf-8")
+    return data_bundle.load_text(str(tmp_path))
+
+####### TESTS BEGIN #######
+
+# the lexicon holds the golden records of every word
+def test_build():
+    assert list(built.entries) == golden.golden_words()
+    assert list(built.entries.values()) == golden.read_golden()
+    assert built.version == 1
+
+# only the words depending on a changed irregular row, prefix pattern or concrete verb are affected
+def test_affected_words(tmp_path):
+    new = edited_data(tmp_path, "irregular.txt", lambda text: text.replace("chtít,2,chc,chtěl,chtěj", "chtít,2,chc,chtěl,chtej"))
+    assert lexicon.affected_words(words, data, new) == {"chtít", "nechtít", "zachtít"}
+    new = edited_data(tmp_path, "concrete.txt", lambda text: text.replace("nést\n", ""))
+    assert lexicon.affected_words(words, data, new) == {"nést", "nenést"}
+    new = edited_data(tmp_path, "prefix.txt", lambda text: text.replace("beze?\n", ""))
+    assert lexicon.affected_words(words, data, new) == { word for word in words if "bez" in word }
+    assert lexicon.affected_words(words, data, data) == set()
+
+# an incremental update gives the same lexicon as a full rebuild, as a new version
+def test_update(tmp_path):
+    lex = lexicon.Lexicon.build(words, data)
+    edits = [("irregular.txt", lambda text: text + "mlít,2,mel,mlel,mel\n"),
+             ("prefix.txt", lambda text: text.replace("beze?\n", "")),
+             ("concrete.txt", lambda text: text.replace("nést\n", ""))]
+    for (name, edit) in edits:
+        new = edited_data(tmp_path, name, edit)
+        version = lex.version
+        rebuilt = lex.update(verbs + ["xyzovat"], new)
+        assert len(rebuilt) < 20
+        assert lex.entries == lexicon.Lexicon.build(lexicon.lexicon_words(verbs + ["xyzovat"], new), new).entries
+        assert lex.version == version + 1
+
+    # nothing changed: nothing rebuilt, same version
+    version = lex.version
+    assert lex.update(verbs + ["xyzovat"], new) == set()
+    assert lex.version == version
+
+# the string pool only holds the strings of the current entries, however many updates replaced or dropped some
+def test_update_interner(tmp_path):
+    few = ["chtít", "dělat", "studovat"]
+    lex = lexicon.Lexicon.build(lexicon.lexicon_words(few, data), data)
+    new = edited_data(tmp_path, "irregular.txt", lambda text: text.replace("chtít,2,chc,chtěl,chtěj", "chtít,2,chc,chtěl,chtejx"))
+    for current in [new, data, new]:
+        lex.update(few, current)
+        assert len(lex.interner) == len(lexicon.Lexicon.build(lexicon.lexicon_words(few, current), current).interner)
+    lex.update(few[1:], new)
+    assert len(lex.interner) == len(lexicon.Lexicon.build(lexicon.lexicon_words(few[1:], new), new).interner)
+
+# artifacts round trip, corrupted artifacts are rejected
+def test_save_load(tmp_path):
+    path = str(tmp_path / "lexicon")
+    built.save(path)
+    lex = lexicon.Lexicon.load(path)
+    assert (lex.version, lex.entries, lex.data.checksum) == (built.version, built.entries, built.data.checksum)
+    raw = open(path, "rb").read()
+    open(path, "wb").write(raw[:-1] + bytes([raw[-1] ^ 1]))
+    with pytest.raises(lexicon.LexiconError):
+        lexicon.Lexicon.load(path)
@@ -0,0 +1,72 @@
+# tests the load generator: workloads, runs and reports
+
+import pytest
+import collections
+import threading
+import time
+import conjugator_utils as conjutils
+import loadgen
+import service
+
+# globals/used by (almost) every test. DO NOT NEED TO BE RERUN EVERY TEST
+words = conjutils.get_verbs()
+
+####### TESTS BEGIN #######
+
+# the workload is reproducible, skewed and mixes in unknown words and non-verbs
+def test_make_workload():
+    workload = loadgen.make_workload(words, 20000, seed = 1)
+    assert workload == loadgen.make_workload(words, 20000, seed = 1)
+    assert workload != loadgen.make_workload(words, 20000, seed = 2)
+    counts = collections.Counter(workload)
+    assert counts.most_common(1)[0][1] > 1000 # the top rank takes ~1/H(n) of the draws
+    known = set(words)
+    unknown = [ word for word in workload if word not in known ]
+    assert 0.08 * len(workload) < len(unknown) < 0.12 * len(workload)
+    assert any(word.endswith("t") for word in unknown) and any(not word.endswith("t") for word in unknown)
+
+    # without skew and generated inputs, every word is about as likely
+    uniform = loadgen.make_workload(words[:10], 10000, exponent = 0, unknown = 0, nonverbs = 0)
+    assert all(800 < count < 1200 for count in collections.Counter(uniform).values())
+
+# percentiles by nearest rank, and per interval reports
+def test_report():
+    assert loadgen.percentile(list(range(1, 101)), 0.99) == 99
+    assert loadgen.percentile([5], 0.5) == 5 and loadgen.percentile([], 0.5) == 0
+    samples = [ (int(0.5e9), 1000000), (int(0.9e9), 3000000), (int(2.5e9), 2000000) ]
+    (intervals, overall) = loadgen.report(0, samples, 1.0)
+    assert [ (summary["t"], summary["requests"]) for summary in intervals ] == [(0, 2), (1.0, 0), (2.0, 1)]
+    assert intervals[0]["throughput"] == 2 and intervals[2]["throughput"] == 2 # the last interval lasted 0.5 s
+    assert (intervals[0]["p50_ms"], intervals[0]["max_ms"]) == (1, 3)
+    assert overall["requests"] == 3 and overall["throughput"] == 3 / 2.5
+
+# the inputs completed in every interval are reported while the workload runs
+def test_run_progress():
+    summaries = []
+    slow = lambda word: time.sleep(0.01)
+    (start, samples, errors) = loadgen.run(slow, ["dělat"] * 30, concurrency = 1, interval = 0.1, progress = summaries.append)
+    assert len(summaries) >= 2
+    assert sum(summary["requests"] for summary in summaries) == len(samples) == 30
+    assert [ summary["t"] for summary in summaries ] == [ i * 0.1 for i in range(len(summaries)) ]
+
+# in-process and HTTP runs complete every input
+def test_run():
+    workload = loadgen.make_workload(words, 200)
+    (start, samples, errors) = loadgen.run(loadgen.InProcessTarget(), workload, concurrency = 2)
+    assert (len(samples), errors) == (200, 0)
+    assert all(end > start and latency > 0 for (end, latency) in samples)
+
+    server = service.make_server("127.0.0.1", 0)
+    threading.Thread(target = server.serve_forever, daemon = True).start()
+    try:
+        target = loadgen.HttpTarget("http://127.0.0.1:" + str(server.server_address[1]))
+        (start, samples, errors) = loadgen.run(target, workload + [" "], concurrency = 4)
+        assert (len(samples), errors) == (200, 1) # " " is a bad request
+        # the path of the URL is kept, a wrong one makes every request fail
+        assert loadgen.HttpTarget("http://127.0.0.1:8080/api/").path == "/api/conjugate"
+        assert loadgen.HttpTarget("http://127.0.0.1:8080/api/conjugate").path == "/api/conjugate"
+        target = loadgen.HttpTarget("http://127.0.0.1:" + str(server.server_address[1]) + "/api")
+        assert loadgen.run(target, workload[:5])[1:] == ([], 5)
+    finally:
+        server.shutdown()
+        server.server_close()
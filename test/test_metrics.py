@@ -0,0 +1,52 @@
+# tests the Prometheus text format of the metrics
+
+import pytest
+import instrumentation
+import metrics
+from cache import CacheStats
+from conjugator import Conjugator
+
+# globals/used by (almost) every test. DO NOT NEED TO BE RERUN EVERY TEST
+stats = instrumentation.PipelineStats(enabled = True)
+conjugator = Conjugator(stats = stats)
+for word in ("studovat", "dělat", "studovat", "studovan"):
+    conjugator.conjugate(word)
+
+def samples(text):
+    """Return sample line -> value of exposition <text>, skipping the comments."""
+    return dict(line.rsplit(" ", 1) for line in text.splitlines() if not line.startswith("#"))
+
+####### TESTS BEGIN #######
+
+# families are rendered with their help, type and labels, values as Prometheus expects them
+def test_render():
+    text = metrics.render([metrics.Family("requests_total", "counter", "Requests.", [("", {"path" : 'a"b'}, 3)]),
+                           metrics.Family("ratio", "gauge", "Ratio.", [("", {}, 0.5), ("_max", {}, 2.0)])])
+    assert text == ('# HELP requests_total Requests.\n# TYPE requests_total counter\nrequests_total{path="a\\"b"} 3\n'
+                    '# HELP ratio Ratio.\n# TYPE ratio gauge\nratio 0.5\nratio_max 2\n')
+
+# histogram buckets are cumulative, up to +Inf, and count every observation
+def test_histogram_samples():
+    result = metrics.histogram_samples({"kind" : "Být"}, [(1, 2), (2, 0), (float("inf"), 1)], 4.5)
+    assert result == [("_bucket", {"kind" : "Být", "le" : "1"}, 2), ("_bucket", {"kind" : "Být", "le" : "2"}, 2),
+                      ("_bucket", {"kind" : "Být", "le" : "+Inf"}, 3), ("_sum", {"kind" : "Být"}, 4.5),
+                      ("_count", {"kind" : "Být"}, 3)]
+
+# words per kind, no-match counts and a latency histogram per stage and kind
+def test_pipeline_families():
+    values = samples(metrics.render(metrics.pipeline_families(stats)))
+    assert values["conjugator_instrumentation_enabled"] == "1"
+    assert values['conjugator_words_total{kind="Class2_ovat"}'] == "2"
+    assert values["conjugator_no_match_total"] == "1"
+    assert values['conjugator_stage_seconds_count{kind="Class2_ovat",stage="total"}'] == "2"
+    assert values['conjugator_stage_seconds_bucket{kind="Class2_ovat",stage="conjugate",le="+Inf"}'] == "2"
+    assert float(values['conjugator_stage_seconds_sum{kind="Class2_ovat",stage="total"}']) > 0
+    assert metrics.pipeline_families(instrumentation.PipelineStats())[1].samples == []
+
+# cache counters and hit ratio
+def test_cache_families():
+    cache_stats = CacheStats()
+    (cache_stats.hits, cache_stats.misses, cache_stats.rejections) = (3, 1, 1)
+    values = samples(metrics.render(metrics.cache_families(cache_stats.as_dict(), prefix = "cache")))
+    assert values == {"cache_hits_total" : "3", "cache_misses_total" : "1", "cache_evictions_total" : "0",
+                      "cache_rejections_total" : "1", "cache_hit_ratio" : "0.75"}
@@ -0,0 +1,86 @@
+# tests the per-tenant overlays: lookup order, shared base indexes and per-layer caches
+
+import pytest
+import conjugator_utils as conjutils
+import engine
+import golden
+import overlay
+from conjugator import Conjugator
+
+# globals/used by (almost) every test. DO NOT NEED TO BE RERUN EVERY TEST
+conjugator = Conjugator()
+row = "kvorgat,2,kvorž,kvorgal,kvorži"
+
+def table(result):
+    return golden.record("", result)["verbs"]
+
+####### TESTS BEGIN #######
+
+# the irregular verbs of an overlay match, and win over those of the base
+def test_irregular():
+    tenant = conjugator.with_overlay(overlay.Overlay([row, ("brát", 2, "bral", "bral", "brej")]))
+    (verb, verb2) = tenant.conjugate("kvorgat")
+    assert verb.kind() == "Class2" and verb.get_table()[0][0] == "kvorži/u"
+    assert conjugator.conjugate("kvorgat")[0].kind() == "Class1_at" # the base is left untouched
+    assert tenant.conjugate("brát")[0].get_table()[0][0] == "brali/u"
+    assert conjugator.conjugate("brát")[0].get_table()[0][0] == "beru"
+
+# the concrete verbs of an overlay add to those of the base
+def test_concrete():
+    tenant = conjugator.with_overlay(overlay.Overlay(concrete_verbs = ["dělat"]))
+    assert tenant.state.classify("dělat").is_concrete and tenant.state.classify("nedělat").is_concrete
+    assert not conjugator.state.classify("dělat").is_concrete
+    assert tenant.state.classify("jít").is_concrete # from the base
+    assert table(tenant.conjugate("dělat")) != table(conjugator.conjugate("dělat"))
+
+# the base indexes are shared, never copied
+def test_shared_indexes():
+    tenant = conjugator.with_overlay(overlay.Overlay([row], ["kvorgat"]))
+    assert tenant.state.base is conjugator.state
+    assert tenant.state.irregular_index.base is conjugator.state.irregular_index
+    assert tenant.state.concrete_verbs.base is conjugator.state.concrete_verbs
+    assert tenant.state.prefixes is conjugator.state.prefixes
+
+# only the words an overlay affects are cached in the layer's cache, every other one in the shared cache
+def test_cache_scope():
+    base = Conjugator()
+    tenant = base.with_overlay(overlay.Overlay([row]))
+    tenant.conjugate_batch(["kvorgat", "vykvorgat", "nosit"])
+    assert set(word for (word, classification) in tenant.state.classifications.items()) == {"kvorgat", "vykvorgat"}
+    assert "nosit" in base.state.classifications and "kvorgat" not in base.state.classifications
+    assert tenant.state.cache_stats()["misses"] == 2
+    tenant.conjugate("kvorgat")
+    assert tenant.state.cache_stats()["hits"] == 1
+
+# a tenant conjugates every unaffected word of the golden corpus as the base does
+def test_golden():
+    tenant = conjugator.with_overlay(overlay.Overlay([row], ["kvorgat"]))
+    for record in golden.read_golden()[::7]:
+        assert golden.record(record["word"], tenant.conjugate(record["word"])) == record
+
+# malformed irregular verbs are refused
+def test_parse_irregular():
+    assert conjutils.parse_irregular(row + "\n") == ("kvorgat", 2, "kvorž", "kvorgal", "kvorži")
+    for bad in ["kvorgat,2,kvorž", "kvorgat,x,kvorž,kvorgal,kvorži", "kvorgat,7,kvorž,kvorgal,kvorži", ",2,a,b,c"]:
+        with pytest.raises(ValueError):
+            overlay.Overlay([bad])
+
+# entries cannot be added to a layered state, only to the shared one
+def test_add_entries():
+    tenant = conjugator.with_overlay(overlay.Overlay())
+    with pytest.raises(TypeError):
+        tenant.add_entries(concrete_verbs = ["nosit"])
+
+# entries added to the shared state after a layer cached a word are seen by the layer, as by a new one
+def test_add_entries_after_cache():
+    shared = Conjugator(engine.EngineState())
+    tenant = shared.with_overlay(overlay.Overlay([row]))
+    pipe = tenant.pipeline()
+    before = table(tenant.conjugate("kvorgat"))
+    pipe.conjugate("kvorgat")
+    shared.add_entries([], concrete_verbs = ["kvorgat"])
+    fresh = table(shared.with_overlay(overlay.Overlay([row])).conjugate("kvorgat"))
+    assert fresh != before
+    assert table(tenant.conjugate("kvorgat")) == fresh
+    assert table(pipe.conjugate("kvorgat")) == fresh
+    assert tenant.state.generation == shared.state.generation
@@ -0,0 +1,78 @@
+# tests the paradigm-compressed storage
+
+import pytest
+import golden
+import paradigm
+import verbs as v
+from conjugator import Conjugator
+
+# globals/used by (almost) every test. DO NOT NEED TO BE RERUN EVERY TEST
+conjugator = Conjugator()
+records = golden.read_golden()
+lexicon = paradigm.ParadigmLexicon.build([ record["word"] for record in records ], conjugator)
+
+####### TESTS BEGIN #######
+
+# every word of the golden corpus is reconstructed exactly
+def test_lexicon_golden():
+    assert len(lexicon) == len(records)
+    for record in records:
+        assert lexicon.record(record["word"]) == record
+
+# verbs conjugated alike share a paradigm, only their stems differ
+def test_shared_paradigm():
+    (studovat, ) = paradigm.unpack(lexicon.entries["studovat"])
+    (abdikovat, ) = paradigm.unpack(lexicon.entries["abdikovat"])
+    assert studovat[0] == abdikovat[0]
+    assert studovat[1] == ("studuj", "studoval", "studovat", "studuj")
+    assert lexicon.table.kind(studovat[0]) == "Class2_ovat"
+    assert len(lexicon.table) < 100
+    assert len(paradigm.unpack(lexicon.entries["stát"])) == 2
+
+# single cells are reconstructed on their own
+def test_form():
+    assert lexicon.form("studovat", v.Tense.PRESENT, v.Person.THIRD_PL) == "studují"
+    assert lexicon.form("studovat", v.Tense.FUTURE, v.Person.FIRST_SG) == "budu studovat"
+    assert lexicon.form("studovat", v.Tense.IMPERATIVE, v.Person.FIRST_SG) == ""
+    lex = paradigm.ParadigmLexicon()
+    lex.add("xyz", (None, None))
+    assert lex.form("xyz", v.Tense.PRESENT, v.Person.FIRST_SG) is None
+    assert lex.tables("xyz") == []
+
+# templates take the longest start of the natural stem, cells without any stem are literal
+def test_cell_template():
+    stems = ("studuj", "studoval", "studovat", "studuj")
+    template = paradigm.cell_template("budu studovat", stems, v.Tense.FUTURE)
+    assert template == paradigm.Template(2, 0, "budu ", "")
+    assert paradigm.render(template, ("nesuj", "nesl", "nést", "nes")) == "budu nést"
+    assert paradigm.cell_template("studujte", stems, v.Tense.IMPERATIVE) == paradigm.Template(3, 0, "", "te")
+    assert paradigm.cell_template("jsem", ("", "byl", "", "buď"), v.Tense.PRESENT) == paradigm.Template(paradigm.LITERAL, 0, "jsem", "")
+    assert paradigm.unpack(paradigm.pack([(3, stems), (4, stems)])) == [(3, stems), (4, stems)]
+    assert paradigm.unpack(paradigm.pack([])) == []
+
+# the compressed lexicon is an order of magnitude smaller than the full tables
+def test_size():
+    tables = { record["word"] : [ verb["table"] for verb in record["verbs"] ] for record in records }
+    assert paradigm.deep_size(tables) > 10 * paradigm.deep_size([lexicon.entries, lexicon.table.paradigms])
+
+# a compiled paradigm renders the same cells as its templates, braces included
+def test_compile_paradigm():
+    for (kind, templates) in lexicon.table.paradigms[:10]:
+        (text, fields) = paradigm.compile_paradigm(paradigm.Paradigm(kind, templates))
+        stems = ("a{b", "c}d", "ef", "gh")
+        cells = text.format(*[ stems[stem_idx][:len(stems[stem_idx]) - cut] for (stem_idx, cut) in fields ]).split("\0")
+        assert cells == [ paradigm.render(template, stems) for template in templates ]
+    literal = paradigm.Paradigm("X", (paradigm.Template(paradigm.LITERAL, 0, "{0}", ""),))
+    assert paradigm.compile_paradigm(literal) == ("{{0}}", [])
+
+# entries added at runtime update only the affected words of the lexicon, and add the new infinitives
+def test_lexicon_add_entries():
+    runtime = Conjugator()
+    words = [ record["word"] for record in records[:400] ] + ["dělat", "udělat"]
+    partial = paradigm.ParadigmLexicon.build(words, runtime)
+    before = { word : partial.entries[word] for word in words }
+    rebuilt = runtime.add_entries(["kvorgat,2,kvorž,kvorgal,kvorži"], concrete_verbs = ["dělat"], lexicon = partial)
+    assert {"kvorgat", "dělat"} <= rebuilt and "udělat" not in rebuilt
+    assert partial.record("kvorgat") == golden.record("kvorgat", runtime.conjugate("kvorgat"))
+    assert partial.record("dělat") == golden.record("dělat", runtime.conjugate("dělat")) != golden.record("dělat", conjugator.conjugate("dělat"))
+    assert all(partial.entries[word] == before[word] for word in words if word not in rebuilt)
@@ -0,0 +1,77 @@
+# tests the conjugation of word lists across worker processes
+
+import pytest
+import io
+import json
+import formatters
+import parallel
+import conjugator
+from conjugator import Conjugator
+
+# globals/used by (almost) every test. DO NOT NEED TO BE RERUN EVERY TEST
+words = ["studovat", "stát", "být", "studovan", "dělat", "jít", "nést", "mít", "pracovat", "zůstat", "bét"]
+
+def word_list(tmp_path, name, lines):
+    """Write <lines> to word list <name>, returning its path."""
+    path = tmp_path / name
+    path.write_text("\n".join(lines) + "\n", encoding = "utf-8")
+    return str(path)
+
+def serial(format_name, words):
+    """Return the output of the single process CLI for <words>."""
+    file = io.StringIO()
+    formatters.get_writer(format_name, file).write_all(Conjugator().conjugate_stream(words))
+    return file.getvalue()
+
+####### TESTS BEGIN #######
+
+# words are read lazily in chunks across files, blank lines skipped
+def test_read_chunks(tmp_path):
+    files = [word_list(tmp_path, "a.txt", ["studovat", "", " stát "]), word_list(tmp_path, "b.txt", ["být"])]
+    assert list(parallel.read_chunks(files, 2)) == [(0, ["studovat", "stát"]), (1, ["být"])]
+
+# items are put back in order, waiting as long as an earlier one is missing
+def test_reorder_buffer():
+    buffer = parallel.ReorderBuffer()
+    assert buffer.push(1, "b") == [] and buffer.push(2, "c") == []
+    assert buffer.push(0, "a") == ["a", "b", "c"]
+    assert buffer.push(3, "d") == ["d"]
+    assert (len(buffer), buffer.peak) == (0, 3)
+
+# ordered output is the same as the single process CLI's, unordered has the same lines
+def test_conjugate_files(tmp_path):
+    files = [word_list(tmp_path, "a.txt", words[:6]), word_list(tmp_path, "b.txt", words[6:])]
+    for format_name in ("jsonl", "csv"):
+        expected = serial(format_name, words)
+        ordered = io.StringIO()
+        assert parallel.conjugate_files(files, ordered, format_name, jobs = 2, ordered = True, chunk_size = 2) == len(words)
+        assert ordered.getvalue() == expected
+        unordered = io.StringIO()
+        assert parallel.conjugate_files(files, unordered, format_name, jobs = 2, chunk_size = 2) == len(words)
+        assert sorted(unordered.getvalue().splitlines()) == sorted(expected.splitlines())
+    assert ordered.getvalue().count("word,kind,tense") == 1 # a single header
+
+    # perfective conjugations
+    perfective = io.StringIO()
+    parallel.conjugate_files(files[:1], perfective, "jsonl", is_perfective = True, jobs = 2, ordered = True)
+    assert perfective.getvalue().splitlines()[4] == json.dumps(
+        formatters.to_record("dělat", Conjugator().conjugate("dělat", True)), ensure_ascii = False)
+
+# the rejected words are written to their own file, by the workers as by the single process CLI
+def test_rejects(tmp_path, capsys):
+    files = [word_list(tmp_path, "a.txt", words)]
+    expected = "studovan\tno-match\tnot-infinitive\nbét\tno-match\tno-verb-class\n"
+    rejects = io.StringIO()
+    parallel.conjugate_files(files, io.StringIO(), "jsonl", jobs = 2, ordered = True, chunk_size = 2, rejects = rejects)
+    assert rejects.getvalue() == expected
+    conjugator.main(["--format", "csv", "--rejects", str(tmp_path / "rejects.txt"), files[0]])
+    assert (tmp_path / "rejects.txt").read_text(encoding = "utf-8") == expected
+    assert capsys.readouterr().out == serial("csv", words)
+
+# negative job counts are refused by the CLI's argument parsing, before any worker is started
+def test_jobs_argument(capsys):
+    assert conjugator.job_count("0") == 0 and conjugator.job_count("3") == 3
+    for bad_jobs in ["-1", "two"]:
+        with pytest.raises(SystemExit):
+            conjugator.main(["--jobs", bad_jobs, "data/verbs.txt"])
+        assert "--jobs: expected a number of worker processes" in capsys.readouterr().err
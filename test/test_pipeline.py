@@ -0,0 +1,135 @@
+# tests the batch pipeline stages: equivalence with the Conjugator, replacing, caching, formatting and profiling
+
+import pytest
+import io
+import unicodedata
+import formatters
+import golden
+import pipeline
+from conjugator import Conjugator
+
+# globals/used by (almost) every test. DO NOT NEED TO BE RERUN EVERY TEST
+conjugator = Conjugator()
+records = golden.read_golden()
+words = [ record["word"] for record in records ]
+
+####### TESTS BEGIN #######
+
+# the default pipeline conjugates every word of the golden corpus as the Conjugator does, in batches
+def test_golden():
+    pipe = conjugator.pipeline()
+    results = []
+    for start in range(0, len(words), 500):
+        results += pipe.conjugate_batch(words[start:start + 500])
+    assert [ golden.record(word, result) for (word, result) in zip(words, results) ] == records
+    assert golden.record("studovat", pipe.conjugate("studovat")) == golden.record("studovat", conjugator.conjugate("studovat"))
+
+# words are stripped and composed before being classified
+def test_normalize():
+    decomposed = unicodedata.normalize("NFD", "  dělat\n")
+    (item,) = pipeline.default_pipeline(conjugator.state).run_words([decomposed])
+    assert item.text == decomposed and item.word == "dělat"
+    assert golden.record("dělat", item.result()) == golden.record("dělat", conjugator.conjugate("dělat"))
+
+# the uncached stages fill in every field, perfective verbs are constructed as such
+def test_stages():
+    state = conjugator.state
+    pipe = pipeline.Pipeline([pipeline.NormalizeStage(), pipeline.PrefixStage(state.prefixes),
+                              pipeline.IrregularMatchStage(state.irregular_index), pipeline.DisambiguateStage(),
+                              pipeline.ClassifyStage(state.concrete_verbs), pipeline.ConstructStage(), pipeline.ConjugateStage()])
+    (item, stat) = pipe.run_words(["vystudovat", "stát"], is_perfective = True)
+    assert item.root == "tudovat" and item.matches == [] and item.spec2 is None
+    assert item.verb._is_perfective and item.verb.get_table() == conjugator.conjugate("vystudovat", True)[0].get_table()
+    assert stat.matches and stat.verb2 is not None
+    assert [ verb.kind() for verb in stat.result() ] == [ verb.kind() for verb in conjugator.conjugate("stát") ]
+
+# a stage can be replaced by name, batches are handed to it whole
+def test_replace():
+    batches = []
+    class Upper:
+        name = "conjugate"
+        def run(self, items):
+            batches.append(len(items))
+            for item in items:
+                item.output = item.word.upper()
+    pipe = pipeline.default_pipeline(conjugator.state)
+    pipe.replace("conjugate", Upper())
+    assert [ item.output for item in pipe.run_words(["dělat", "nosit", "být"]) ] == ["DĚLAT", "NOSIT", "BÝT"]
+    assert batches == [3]
+    with pytest.raises(KeyError):
+        pipe.replace("missing", Upper())
+
+# a cached stage only runs on the words it has not seen, the others get the cached fields back
+def test_cached_stage():
+    seen = []
+    class Roots(pipeline.PrefixStage):
+        def run(self, items):
+            seen.append([ item.word for item in items ])
+            pipeline.PrefixStage.run(self, items)
+    cached = pipeline.CachedStage(Roots(conjugator.state.prefixes), ("root",), cache_policy = "lru", maxsize = 16)
+    pipe = pipeline.Pipeline([cached])
+    pipe.run_words(["vystudovat", "dělat"])
+    items = pipe.run_words(["dělat", "vystudovat", "nosit"])
+    assert seen == [["vystudovat", "dělat"], ["nosit"]]
+    assert [ item.root for item in items ] == ["dělat", "tudovat", "nosit"]
+    assert cached.cache.stats.hits == 2
+
+# the default pipeline shares the classification cache of its state
+def test_shared_cache():
+    c = Conjugator()
+    pipe = c.pipeline()
+    pipe.conjugate_batch(["nosit", "nosit"])
+    assert "nosit" in c.state.classifications
+    assert c.state.classify("nosit").spec.verb_class == pipe.run_words(["nosit"])[0].spec.verb_class
+
+# the format stage formats every word separately, as the writer of the format would
+def test_format():
+    batch = ["dělat", "bét", "stát"]
+    for format_name in formatters.WRITERS:
+        pipe = conjugator.pipeline(format_name)
+        expected = io.StringIO()
+        formatters.get_writer(format_name, expected).write_all(zip(batch, conjugator.conjugate_batch(batch)))
+        assert pipe["format"].header + "".join(item.output for item in pipe.run_words(batch)) == expected.getvalue()
+
+# every stage is profiled per batch and per word, nested stages included
+def test_profile():
+    pipe = pipeline.default_pipeline(Conjugator().state)
+    pipe.conjugate_batch(["dělat", "nosit"])
+    pipe.conjugate_batch(["dělat"])
+    profile = pipe.profile()
+    assert list(profile) == ["normalize", "classify", "get_prefix", "find_verb_matches", "disambiguate_verb",
+                             "determine_verb_class", "construct", "conjugate"]
+    assert (profile["normalize"]["calls"], profile["normalize"]["words"]) == (2, 3)
+    assert (profile["get_prefix"]["calls"], profile["get_prefix"]["words"]) == (1, 2) # the second batch was cached
+    assert profile["conjugate"]["total_ns"] > 0
+    pipe.reset_profile()
+    assert pipe.profile() == {}
+
+# a word making a stage raise is isolated: the rest of the batch is conjugated, the failed word is not cached
+def test_error_isolation():
+    class Broken(pipeline.ClassifyStage):
+        def run(self, items):
+            if any(item.word == "dělat" for item in items):
+                raise ValueError("broken")
+            pipeline.ClassifyStage.run(self, items)
+    c = Conjugator()
+    pipe = c.pipeline()
+    pipe["classify"].stage.replace("determine_verb_class", Broken(c.state.concrete_verbs))
+    results = pipe.conjugate_results(["nosit", "dělat", "stát", "bét"])
+    assert [ (result.status, result.reason) for result in results ] == [
+        ("ok", None), ("error", "ValueError"), ("ambiguous", "two-conjugations"), ("no-match", "no-verb-class")]
+    assert results[0].verb.get_table() == conjugator.conjugate("nosit")[0].get_table()
+    assert "dělat" not in c.state.classifications and "nosit" in c.state.classifications
+    assert pipe.profile()["construct"]["words"] == 3
+
+# the default pipeline caches through its state, so that nothing classified before entries are added is cached
+def test_cached_stage_generation():
+    c = Conjugator()
+    pipe = c.pipeline()
+    class Racing(pipeline.ClassifyStage):
+        def run(self, items):
+            pipeline.ClassifyStage.run(self, items)
+            c.state.add_entries(concrete_verbs = ["nosit"]) # lands while the batch is being classified
+    pipe["classify"].stage.replace("determine_verb_class", Racing(c.state.concrete_verbs))
+    assert not pipe.run_words(["nosit"])[0].is_concrete
+    assert "nosit" not in c.state.classifications
@@ -0,0 +1,130 @@
+# tests the hot reload of the data files: swapping, warming, failures and the background thread
+
+import pytest
+import os
+import threading
+import time
+import conjugator_utils as conjutils
+import data_bundle
+import engine
+import golden
+import reload
+from conjugator import Conjugator
+
+# globals/used by (almost) every test. DO NOT NEED TO BE RERUN EVERY TEST
+irregular_row = "kvorgat,2,kvorž,kvorgal,kvorži\n"
+
+def copy_data(directory, monkeypatch):
+    """Copy the shipped text files to <directory> and use them as the data directory."""
+    for name in data_bundle.SOURCE_FILES:
+        (directory / name).write_text(open(conjutils.DEFAULT_DATA_DIR + "/" + name, encoding = "utf-8").read(), encoding = "utf-8")
+    monkeypatch.delenv("VERB_DATA_BUNDLE", raising = False)
+    monkeypatch.setenv("VERB_DATA_DIR", str(directory))
+
+def add_irregular(directory):
+    """Add irregular_row to irregular.txt in <directory>, changing its size (and so its signature)."""
+    path = directory / "irregular.txt"
+    path.write_text(irregular_row + path.read_text(encoding = "utf-8"), encoding = "utf-8")
+
+####### TESTS BEGIN #######
+
+# entries added at runtime survive a reload, those added to the replaced state are forwarded to the new one
+def test_reload_keeps_additions(tmp_path, monkeypatch):
+    copy_data(tmp_path, monkeypatch)
+    conjugator = Conjugator(engine.EngineState(reload.load_source()))
+    conjugator.add_entries([irregular_row.strip()], concrete_verbs = ["nosit"])
+    old_state = conjugator.state
+    add_irregular(tmp_path) # the same irregular verb is now in the files too
+    reloader = reload.Reloader(conjugator, interval = None)
+    assert reloader.reload()
+    assert conjugator.state.classify("nosit").is_concrete
+    assert [ verb[0] for verb in conjugator.state.irregular_index.verbs ].count("kvorgat") == 1 # not added twice
+    old_state.add_entries(concrete_verbs = ["prosit"]) # as by a request still holding the old state
+    assert conjugator.state.classify("prosit").is_concrete
+
+# a reload swaps in a state built from the edited files, its cache warmed with the words of the old one
+def test_reload(tmp_path, monkeypatch):
+    copy_data(tmp_path, monkeypatch)
+    conjugator = Conjugator(engine.EngineState(reload.load_source()))
+    before = golden.record("kvorgat", conjugator.conjugate("kvorgat"))
+    conjugator.conjugate("dělat")
+    reloader = reload.Reloader(conjugator, interval = None)
+    old_state = conjugator.state
+    assert not reloader.check() and not reloader.reload() # same data: nothing to swap
+    assert conjugator.state is old_state and reloader.generation == 0
+
+    add_irregular(tmp_path)
+    assert reloader.check()
+    assert conjugator.state is not old_state and reloader.generation == 1
+    assert "kvorgat" in conjugator.state.classifications and "dělat" in conjugator.state.classifications
+    after = golden.record("kvorgat", conjugator.conjugate("kvorgat"))
+    assert after != before
+    assert after == golden.record("kvorgat", Conjugator(engine.EngineState(data_bundle.load_text(str(tmp_path)))).conjugate("kvorgat"))
+    assert golden.record("dělat", conjugator.conjugate("dělat")) == golden.record("dělat", Conjugator().conjugate("dělat"))
+    assert not reloader.check() # already reloaded
+
+# files that cannot be loaded keep the live state, the failure is counted by the background thread
+def test_failure(tmp_path, monkeypatch):
+    copy_data(tmp_path, monkeypatch)
+    conjugator = Conjugator(engine.EngineState(reload.load_source()))
+    reloader = reload.Reloader(conjugator, interval = 0.01)
+    old_state = conjugator.state
+    (tmp_path / "prefix.txt").unlink()
+    with pytest.raises(OSError):
+        reloader.reload()
+    reloader.start()
+    try:
+        reloader.request_reload()
+        deadline = time.monotonic() + 5
+        while reloader.failures == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        reloader.stop()
+    assert reloader.failures >= 1 and isinstance(reloader.last_error, OSError)
+    assert conjugator.state is old_state
+
+# the background thread picks up edits by polling, conjugations in flight are never interrupted
+def test_polling(tmp_path, monkeypatch):
+    copy_data(tmp_path, monkeypatch)
+    conjugator = Conjugator(engine.EngineState(reload.load_source()))
+    expected = golden.record("dělat", conjugator.conjugate("dělat"))
+    reloader = reload.Reloader(conjugator, interval = 0.01)
+    reloader.start()
+    stop = threading.Event()
+    errors = []
+    def hammer():
+        while not stop.is_set():
+            if golden.record("dělat", conjugator.conjugate("dělat")) != expected:
+                errors.append("changed")
+    thread = threading.Thread(target = hammer)
+    thread.start()
+    try:
+        add_irregular(tmp_path)
+        deadline = time.monotonic() + 5
+        while reloader.generation == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        stop.set()
+        thread.join()
+        reloader.stop()
+    assert reloader.generation == 1 and errors == []
+
+# SIGHUP has the background thread reload at once
+@pytest.mark.skipif(not hasattr(reload.signal, "SIGHUP"), reason = "no SIGHUP on this platform")
+def test_signal(tmp_path, monkeypatch):
+    copy_data(tmp_path, monkeypatch)
+    conjugator = Conjugator(engine.EngineState(reload.load_source()))
+    reloader = reload.Reloader(conjugator, interval = None)
+    previous = reload.signal.getsignal(reload.signal.SIGHUP)
+    reloader.install_signal()
+    reloader.start()
+    try:
+        add_irregular(tmp_path)
+        os.kill(os.getpid(), reload.signal.SIGHUP)
+        deadline = time.monotonic() + 5
+        while reloader.generation == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        reloader.stop()
+        reload.signal.signal(reload.signal.SIGHUP, previous)
+    assert reloader.generation == 1
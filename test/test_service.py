@@ -0,0 +1,151 @@
+# tests the HTTP front end
+
+import pytest
+import json
+import threading
+import urllib.error
+import urllib.request
+import instrumentation
+import reload
+import service
+from conjugator import Conjugator
+
+# globals/used by (almost) every test. DO NOT NEED TO BE RERUN EVERY TEST
+stats = instrumentation.PipelineStats(enabled = True)
+server = service.make_server("127.0.0.1", 0, service.ConjugationService(Conjugator(stats = stats)))
+threading.Thread(target = server.serve_forever, daemon = True).start()
+url = "http://127.0.0.1:" + str(server.server_address[1])
+
+def get(path):
+    """GET <path>, returning the status and the decoded JSON body."""
+    try:
+        response = urllib.request.urlopen(url + path)
+    except urllib.error.HTTPError as error:
+        response = error
+    return (response.status if hasattr(response, "status") else response.code, json.loads(response.read().decode("utf-8")))
+
+####### TESTS BEGIN #######
+
+# words are conjugated into their JSON record
+def test_conjugate():
+    (status, record) = get("/conjugate?word=studovat")
+    assert status == 200
+    assert record["word"] == "studovat"
+    assert record["verbs"][0]["kind"] == "Class2_ovat"
+    assert record["verbs"][0]["table"][0][0] == "studuji/u"
+    (status, record) = get("/conjugate?word=d%C4%9Blat&perfective=1")
+    assert record["verbs"][0]["table"] == Conjugator().conjugate("dělat", True)[0].get_table()
+    assert get("/conjugate?word=studovan") == (200, {"word" : "studovan", "verbs" : []})
+
+# bad requests
+def test_errors():
+    assert get("/conjugate")[0] == 400
+    assert get("/conjugate?word=%20")[0] == 400
+    assert get("/other")[0] == 404
+
+# simultaneous identical requests share a single conjugation
+def test_single_flight():
+    flights = server.service.flights
+    (calls, shared) = (flights.calls, flights.shared)
+    stats.reset()
+    original = server.service.batcher.function
+    release = threading.Event()
+    def slow_render(keys):
+        release.wait(5)
+        return original(keys)
+    server.service.batcher.function = slow_render
+    results = []
+    threads = [ threading.Thread(target = lambda: results.append(get("/conjugate?word=b%C3%BDt"))) for i in range(20) ]
+    try:
+        for thread in threads:
+            thread.start()
+        while flights.calls + flights.shared < calls + shared + 20:
+            threading.Event().wait(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+    finally:
+        server.service.batcher.function = original
+    assert len(results) == 20 and all(result == results[0] for result in results)
+    assert results[0][1]["verbs"][0]["kind"] == "Být"
+    assert flights.calls == calls + 1
+    assert stats.snapshot()["kinds"]["Být"]["total"]["count"] == 1
+
+# the metrics count the requests and include the pipeline and the cache
+def test_metrics():
+    get("/conjugate?word=studovat")
+    get("/conjugate?word=xyz")
+    get("/other")
+    response = urllib.request.urlopen(url + "/metrics")
+    assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+    lines = response.read().decode("utf-8").splitlines()
+    values = dict(line.rsplit(" ", 1) for line in lines if not line.startswith("#"))
+    assert int(values['conjugator_requests_total{path="/conjugate",status="200"}']) >= 1
+    assert int(values['conjugator_requests_total{path="other",status="404"}']) >= 1
+    assert int(values['conjugator_request_seconds_count{path="/conjugate"}']) >= 1
+    assert values["conjugator_requests_in_flight"] == "1" # this one
+    assert values["conjugator_conjugations_in_flight"] == "0"
+    assert "conjugator_classification_cache_hits_total" in values
+    assert "# TYPE conjugator_stage_seconds histogram" in lines
+    assert int(values['conjugator_rejected_words_total{status="no-match",reason="not-infinitive"}']) >= 1
+    assert "conjugator_data_generation" not in values
+
+# the data reloads are reported once the service has a reloader
+def test_reload_metrics():
+    reloading = service.ConjugationService(Conjugator())
+    reloading.reloader = reload.Reloader(reloading.conjugator, interval = None)
+    values = dict(line.rsplit(" ", 1) for line in reloading.metrics_text().splitlines() if not line.startswith("#"))
+    assert (values["conjugator_data_generation"], values["conjugator_data_reload_failures_total"]) == ("0", "0")
+    reloading.close()
+
+# a request the conjugator raises on is answered 500 and counted as such
+def test_server_error(capsys):
+    broken = Conjugator()
+    def raising(words, is_perfective = False):
+        raise RuntimeError("broken")
+    broken.conjugate_batch = raising
+    failing = service.make_server("127.0.0.1", 0, service.ConjugationService(broken))
+    threading.Thread(target = failing.serve_forever, daemon = True).start()
+    try:
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen("http://127.0.0.1:" + str(failing.server_address[1]) + "/conjugate?word=nosit")
+        assert error.value.code == 500
+        assert json.loads(error.value.read().decode("utf-8")) == {"error" : "internal error"}
+        while ("/conjugate", 500) not in failing.service.requests: # counted once the response is sent
+            threading.Event().wait(0.01)
+        assert "RuntimeError: broken" in capsys.readouterr().err
+    finally:
+        failing.shutdown()
+        failing.server_close()
+        failing.service.close()
+
+# a saturated service answers 503 at once instead of queueing
+def test_overloaded():
+    saturated = service.ConjugationService(Conjugator(), max_batch = 1, window = 0, max_queue = 1)
+    release = threading.Event()
+    original = saturated.batcher.function
+    saturated.batcher.function = lambda keys: release.wait(5) and original(keys)
+    overloaded = service.make_server("127.0.0.1", 0, saturated)
+    threading.Thread(target = overloaded.serve_forever, daemon = True).start()
+    base = "http://127.0.0.1:" + str(overloaded.server_address[1])
+    results = []
+    threads = [ threading.Thread(target = lambda word = word: results.append(urllib.request.urlopen(base + "/conjugate?word=" + word).status))
+                for word in ("studovat", "pracovat") ] # one being conjugated, one waiting
+    try:
+        for thread in threads:
+            thread.start()
+            while saturated.batcher.batches + saturated.batcher.depth() < threads.index(thread) + 1:
+                threading.Event().wait(0.01)
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(base + "/conjugate?word=nosit")
+        assert error.value.code == 503 and error.value.headers["Retry-After"] == "1"
+        text = urllib.request.urlopen(base + "/metrics").read().decode("utf-8")
+        assert "conjugator_batch_queue_depth 1" in text and "conjugator_overloaded_total 1" in text
+    finally:
+        release.set()
+        for thread in threads:
+            thread.join()
+        overloaded.shutdown()
+        overloaded.server_close()
+        saturated.close()
+    assert results == [200, 200]
@@ -0,0 +1,60 @@
+# tests the coalescing of concurrent identical calls
+
+import pytest
+import threading
+import time
+from singleflight import SingleFlight
+
+####### TESTS BEGIN #######
+
+# 100 simultaneous calls for the same key do the work once and share the result
+def test_do_coalesces():
+    flights = SingleFlight()
+    calls = []
+    barrier = threading.Barrier(100)
+    results = []
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return "Být"
+    def request():
+        barrier.wait()
+        results.append(flights.do(("být", False), slow))
+    threads = [ threading.Thread(target = request) for i in range(100) ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results == ["Být"] * 100
+    assert (flights.calls, flights.shared) == (1, 99)
+
+# calls that are not in flight at the same time are not coalesced, nothing is cached
+def test_do_sequential():
+    flights = SingleFlight()
+    assert flights.do("a", lambda: 1) == 1
+    assert flights.do("a", lambda: 2) == 2
+    assert flights.do("b", lambda: 3) == 3
+    assert (flights.calls, flights.shared) == (3, 0)
+
+# the exception of a call is raised in every caller sharing it, and the key is released
+def test_do_error():
+    flights = SingleFlight()
+    started = threading.Event()
+    errors = []
+    def failing():
+        started.set()
+        time.sleep(0.1)
+        raise ValueError("bad verb")
+    def request():
+        try:
+            flights.do("x", failing)
+        except ValueError as error:
+            errors.append(str(error))
+    leader = threading.Thread(target = request)
+    leader.start()
+    started.wait()
+    request()
+    leader.join()
+    assert errors == ["bad verb", "bad verb"]
+    assert flights.do("x", lambda: "ok") == "ok"
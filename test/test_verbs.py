@@ -1310,4 +1310,34 @@ def test_class4_cluster():
     expected_stems = ["zv","ber", "per", "der", "ser", "štv", "šl", "rž", "řv", "žer", "lž", "rv", "stel", "cp"]
     for i in range(len(infinitives)):
         assert v.Class4_cluster(infinitives[i], "át").present_stem == expected_stems[i]
-        assert v.Class4_cluster(infinitives[i], "at").present_stem == expected_stems[i]
\ No newline at end of file
+        assert v.Class4_cluster(infinitives[i], "at").present_stem == expected_stems[i]
+
+# tests that single conjugations are correct on their own, including the class-specific corrections
+def test_conjugate_at():
+    verbs = [v.Byt("nebýt"), v.Class2_ityt("chtít", "ít"), v.Class4_nout("tisknout", "nout"),
+             v.Class4_rit("třít", "řít"), v.Class3_cluster("ctít", "ít"), v.Class4_cluster("brát", "át"),
+             v.Class3_itet("prosit", "it"), v.Class1_at("dělat", "at")]
+    for verb in verbs:
+        forms = [[verb.conjugate_at(tense, person) for person in range(len(v.Person))] for tense in range(len(v.Tense))]
+        assert verb._conjugation_table is None # never allocated
+        verb.conjugate()
+        assert forms == verb.get_table()
+    assert verbs[0].conjugate_at(len(v.Tense), 0) == ""
+
+# tests that conjugating one tense does not write the corrections of another
+def test_conjugate_tense_only():
+    a = v.Class4_nout("tisknout", "nout")
+    a.conjugate(v.Tense.PRESENT)
+    assert a.get_conjugation_at(v.Tense.PRESENT, v.Person.FIRST_SG) == "tisknu"
+    assert a.get_conjugation_at(v.Tense.IMPERATIVE, v.Person.FIRST_PL) == ""
+    a.conjugate(v.Tense.IMPERATIVE)
+    assert a.get_conjugation_at(v.Tense.IMPERATIVE, v.Person.FIRST_PL) == "tiskněme"
+
+# tests that the imperative stem of -it/-et/-ět verbs is only worked out when needed
+def test_class3_itet_lazy_imperative_stem():
+    a = v.Class3_itet("prosit", "it")
+    assert a.conjugate_at(v.Tense.PAST, v.Person.FIRST_SG) == "prosil/a jsem"
+    assert a._imperative_stem is None
+    assert a.conjugate_at(v.Tense.IMPERATIVE, v.Person.SECOND_SG) == "pros"
+    assert a._imperative_stem == "pros"
+    assert v.Class3_itet("slzet", "et").imperative_stem == "slzej"
@@ -0,0 +1,49 @@
+# tests the compact paradigm wire format
+
+import pytest
+import io
+import formatters
+import golden
+import paradigm
+import wire
+from conjugator import Conjugator
+
+# globals/used by (almost) every test. DO NOT NEED TO BE RERUN EVERY TEST
+conjugator = Conjugator()
+records = golden.read_golden()
+words = [ record["word"] for record in records ]
+results = [ (word, conjugator.conjugate(word)) for word in words ]
+
+####### TESTS BEGIN #######
+
+# every word of the golden corpus is decoded exactly, in a fraction of the size of JSON lines
+def test_round_trip():
+    text = wire.encode(results)
+    assert wire.decode(text) == records
+    assert wire.decode(io.StringIO(text)) == records
+    lines = text.splitlines()
+    assert lines[0].startswith('["p",0,') and lines[-1].startswith('["w",')
+    jsonl = io.StringIO()
+    formatters.get_writer("jsonl", jsonl).write_all(results)
+    assert len(text.encode("utf-8")) * 5 < len(jsonl.getvalue().encode("utf-8"))
+
+# words of the precomputed paradigm lexicon are sent as stored
+def test_encode_lexicon():
+    lexicon = paradigm.ParadigmLexicon.build(words[:200], conjugator)
+    assert wire.decode(wire.encode_lexicon(lexicon, words[:200])) == records[:200]
+
+# the streaming writer defines every paradigm before its first use, independently written chunks can be concatenated
+def test_writer_chunks():
+    chunks = []
+    for start in range(0, 600, 200):
+        file = io.StringIO()
+        formatters.get_writer("paradigm", file).write_all(results[start:start + 200])
+        chunks.append(file.getvalue())
+    assert wire.decode("".join(reversed(chunks))) == records[400:600] + records[200:400] + records[:200]
+    assert wire.decode('["w","studovan"]\n') == [{"word" : "studovan", "verbs" : []}]
+
+# anything else is rejected
+def test_errors():
+    for text in ('["w","studovat",[0,"a","b","c","d"]]', '{"word":"x"}', "not json", '["x"]', '["p",0]'):
+        with pytest.raises(wire.WireError):
+            wire.decode(text)
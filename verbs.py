@@ -104,6 +104,8 @@ class Verb:
 	Methods:
 		conjugate(self, tense_idx : int = len(Tense), person_idx : int = len(Person))
 			conjugate a verb
+		conjugate_at(self, tense_idx : int, person_idx : int) -> str
+			conjugate a single form without filling the conjugation table
 		get_conjugation_at(self, tense_idx : int, person_idx : int) -> str
 			get specified conjugation
 		clear_table(self)
@@ -170,6 +172,10 @@ class Verb:
 			future_stem = self.infinitive[2:]
 			self._is_negative = True
 
+		# per-verb copies: the class-level mappings are shared by every verb of the class (and any thread)
+		self._tense_to_ending = list(self._tense_to_ending)
+		self._tense_to_auxiliary = list(self._tense_to_auxiliary)
+
 		self._is_perfective = is_perfective
 		if is_perfective: # overrides default future conjugation
 			# future tense will use present endings, and thus have an 'empty' auxiliary
@@ -193,23 +199,43 @@ class Verb:
 		
 		self._stems = [ self.present_stem, self.past_stem, future_stem, self.imperative_stem, self.past_stem ]
 
-		# conjugation table
-		self._conjugation_table = [["" for person in range(len(Person))] for tense in range(len(Tense))]
+		# conjugation table, only allocated once something is conjugated (see _table)
+		self._conjugation_table = None
+
+	def _table(self) -> list:
+		"""Return the conjugation table, allocating it on first use."""
+		if self._conjugation_table is None:
+			self._conjugation_table = [["" for person in range(len(Person))] for tense in range(len(Tense))]
+		return self._conjugation_table
+
+	def _is_imperative_plural(self, tense : int, person : int) -> bool:
+		"""Determine if the indices are of the 1st or 2nd person plural imperative."""
+		return tense == Tense.IMPERATIVE and (person == Person.FIRST_PL or person == Person.SECOND_PL)
+
+	def _get_stem(self, tense : int) -> str:
+		"""Return the stem used to conjugate <tense>."""
+		return self._stems[tense]
 
 	def _get_conjugation(self, tense : int, person : int) -> str:
-		"""Return a fully constructed conjugation for given tense and person indices."""
+		"""
+		Return a fully constructed conjugation for given tense and person indices.
+
+		Derived classes with irregular conjugations extend this to correct them,
+		so that a single conjugation is always right on its own.
+		"""
 		auxiliary = (self._tense_to_auxiliary[tense])[person]
 		ending = (self._tense_to_ending[tense])[person]
 		conjugation = ""
 		space = " " if auxiliary != "" else "" # so no space AFTER
 		if not is_none_value(tense, person):
 			# future tense: future auxiliary + infinitive if there is no override
-			conjugation = self._stems[tense] + ending + space + auxiliary
+			stem = self._get_stem(tense)
+			conjugation = stem + ending + space + auxiliary
 			if tense == Tense.FUTURE and not self._is_perfective:
-				space = "" if self._stems[tense] == "" else space # so no space AFTER
-				conjugation = auxiliary + space + self._stems[tense] + ending
+				space = "" if stem == "" else space # so no space AFTER
+				conjugation = auxiliary + space + stem + ending
 				if self._is_concrete:
-					conjugation = get_motion_prefix(self.infinitive) + self._stems[tense] + ending
+					conjugation = get_motion_prefix(self.infinitive) + stem + ending
 				if self._is_negative:
 					conjugation = "ne" + conjugation
 		return conjugation
@@ -227,24 +253,31 @@ class Verb:
 		tense_range = range(tense_idx, tense_idx + 1) if tense_idx != len(Tense) else range(len(Tense))
 		person_range = range(person_idx, person_idx + 1) if person_idx != len(Person) else range(len(Person))
 
+		table = self._table()
 		for tense in tense_range:
 			for person in person_range:
-				self._conjugation_table[tense][person] = self._get_conjugation(tense, person)
+				table[tense][person] = self._get_conjugation(tense, person)
+
+	def conjugate_at(self, tense_idx : int, person_idx : int) -> str:
+		"""Return the conjugation at the specified indices, without filling (or allocating) the conjugation table."""
+		valid_cond = (tense_idx >= 0 and tense_idx < len(Tense)) and (person_idx >= 0 and person_idx < len(Person))
+		return self._get_conjugation(tense_idx, person_idx) if valid_cond else ""
 
 	def get_conjugation_at(self, tense_idx : int, person_idx : int) -> str:
 		"""Return a conjugation at the specified indices."""
 		valid_cond = (tense_idx >= 0 and tense_idx < len(Tense)) and (person_idx >= 0 and person_idx < len(Person))
-		return self._conjugation_table[tense_idx][person_idx] if valid_cond else ""
+		return self._table()[tense_idx][person_idx] if valid_cond else ""
 	
 	def clear_table(self):
 		"""Clear the conjugation table."""
+		table = self._table()
 		for tense in range(len(Tense)):
 			for person in range(len(Person)):
-				self._conjugation_table[tense][person] = ""
+				table[tense][person] = ""
 
 	def get_table(self) -> list:
 		"""Retrieve the conjugation table as a 2-dimensional string list."""
-		return self._conjugation_table
+		return self._table()
 	
 	def kind(self) -> str:
 		"""Return type of class as string"""
@@ -278,15 +311,15 @@ class Byt(Verb):
 		# update the endings for it to be to this class
 		self._tense_to_auxiliary[Tense.PRESENT] = self._present_endings
 	
-	def conjugate(self, tense_idx = len(Tense), person_idx = len(Person)):
-		"""Extends Verb's conjugate method by updating some present-tense endings."""
-		super().conjugate(tense_idx, person_idx)
+	def _get_conjugation(self, tense : int, person : int) -> str:
+		"""Extends Verb's _get_conjugation by updating the present-tense conjugations."""
+		if tense != Tense.PRESENT:
+			return super()._get_conjugation(tense, person)
 
-		# update the present tense with the present endings since there is no present stem
+		# the present tense is just the present endings since there is no present stem
 		negation_prefix = "ne" if self._is_negative == True else ""
-		for person in range(len(Person)):
-				ending = "ní" if  self._is_negative and person == Person.THIRD_SG else self._present_endings[person]
-				self._conjugation_table[Tense.PRESENT][person] = negation_prefix + ending
+		ending = "ní" if  self._is_negative and person == Person.THIRD_SG else self._present_endings[person]
+		return negation_prefix + ending
 
 	def kind(self) -> str:
 		"""Return type of class as string"""
@@ -354,25 +387,21 @@ class Class2(Verb):
 		# update endings
 		self._tense_to_ending[Tense.PRESENT] = self._present_endings
 
-	def _apply_chtit_correction(self, tense_idx : int, person_idx :int):
-		"""Overwrites chtít conjugations in the present tense for the 3rd person plural and 1st person singular."""
-		if ((tense_idx == Tense.PRESENT or tense_idx == len(Tense))):
-			if (person_idx == Person.FIRST_SG or person_idx == len(Person)):
-				entry = self._conjugation_table[Tense.PRESENT][Person.FIRST_SG]
-				entry = entry[:-8] + "chci"
-				self._conjugation_table[Tense.PRESENT][Person.FIRST_SG] = entry
-			if (person_idx == Person.THIRD_PL or person_idx == len(Person)):
-				entry = self._conjugation_table[Tense.PRESENT][Person.THIRD_PL]
-				entry = entry[:-6] + "chtějí"
-				self._conjugation_table[Tense.PRESENT][Person.THIRD_PL] = entry
-		return
+	def _apply_chtit_correction(self, person_idx : int, entry : str) -> str:
+		"""Corrects chtít present tense conjugation <entry> for the 3rd person plural and 1st person singular."""
+		if person_idx == Person.FIRST_SG:
+			entry = entry[:-8] + "chci"
+		elif person_idx == Person.THIRD_PL:
+			entry = entry[:-6] + "chtějí"
+		return entry
 		
-	def conjugate(self, tense_idx : int = len(Tense), person_idx : int = len(Person)):
-		"""Extension of Verb's conjugate but modifies a few conjugations afterwards."""
+	def _get_conjugation(self, tense : int, person : int) -> str:
+		"""Extension of Verb's _get_conjugation but modifies a few conjugations afterwards."""
 		# if verb is chtít, ALWAYS overwrite/correct it
-		super().conjugate(tense_idx, person_idx)
-		if re.search("chtít$", self.infinitive):
-			self._apply_chtit_correction(tense_idx, person_idx)
+		conjugation = super()._get_conjugation(tense, person)
+		if tense == Tense.PRESENT and re.search("chtít$", self.infinitive):
+			conjugation = self._apply_chtit_correction(person, conjugation)
+		return conjugation
 
 	def kind(self) -> str:
 		"""Return type of class as string"""
@@ -463,10 +492,9 @@ class Class3_itet(Class3):
 		self.present_stem = not_ending
 		self.past_stem = not_ending + self._thematic_vowel + "l"
 		self.stem = not_ending[:-1]+ vutils.get_soft_consonant(not_ending[-1])
-		self.imperative_stem = self.stem
 
-		# update the imperative stem, there are many edge cases!
-		self._update_imperative_stem()
+		# the imperative stem has many edge cases! only worked out once it is needed (see imperative_stem)
+		self._imperative_stem = None
 
 # 		#self._passive_stem = self._stem[:-1] if _thematic_vowel == "i" else (self._stem + _thematic_vowel + "n")
 # 		#if _thematic_vowel == "i":
@@ -484,7 +512,24 @@ class Class3_itet(Class3):
 		future_stem = self.infinitive[2:] if self.infinitive[:2] == "ne" else self.infinitive
 		if self._is_concrete:
 			future_stem = self.present_stem[2:] if self._is_negative else self.present_stem # without the ne-
-		self._stems = [self.present_stem, self.past_stem, future_stem, self.imperative_stem, self.past_stem ]
+		self._stems = [self.present_stem, self.past_stem, future_stem, self._imperative_stem, self.past_stem ]
+
+	@property
+	def imperative_stem(self) -> str:
+		"""The imperative stem, updated according to edge cases (see _update_imperative_stem) on first use."""
+		if self._imperative_stem is None:
+			self._imperative_stem = self.stem
+			self._update_imperative_stem()
+			self._stems[Tense.IMPERATIVE] = self._imperative_stem
+		return self._imperative_stem
+
+	@imperative_stem.setter
+	def imperative_stem(self, stem : str):
+		self._imperative_stem = stem
+
+	def _get_stem(self, tense : int) -> str:
+		"""Extends Verb's _get_stem by working out the imperative stem only when needed."""
+		return self.imperative_stem if tense == Tense.IMPERATIVE else self._stems[tense]
 
 	def _update_imperative_stem(self):
 		"""Updates the imperative stem according to edge cases."""
@@ -550,14 +595,13 @@ class Class4(Verb):
 		self.class_num = 4
 
 	# some irregular verbs require this
-	def conjugate(self, tense_idx : int = len(Tense), person_idx : int = len(Person)):
-		"""Extends Verb's conjugate but updates with vowel changes to the imperative plural endings."""
-		super().conjugate(tense_idx, person_idx)
-
+	def _get_conjugation(self, tense : int, person : int) -> str:
+		"""Extends Verb's _get_conjugation but updates with vowel changes to the imperative plural endings."""
 		# apply imperative corrections if stem is -ni
-		if self.imperative_stem[-2:] == "ni" or self.imperative_stem[-2:] == "mi":
-			self._conjugation_table[Tense.IMPERATIVE][Person.FIRST_PL] = self.imperative_stem[:-1] + "ěme"
-			self._conjugation_table[Tense.IMPERATIVE][Person.SECOND_PL] = self.imperative_stem[:-1] + "ěte"
+		if self._is_imperative_plural(tense, person) and \
+			(self.imperative_stem[-2:] == "ni" or self.imperative_stem[-2:] == "mi"):
+			return self.imperative_stem[:-1] + "ě" + self._imperative_endings[person]
+		return super()._get_conjugation(tense, person)
 
 	def kind(self) -> str:
 		"""Return type of class as string"""
@@ -590,15 +634,7 @@ class Class4_nout(Class4):
 		self._stems = [self.present_stem, self.past_stem, future_stem, self.imperative_stem, self.past_stem ]
 
 		#self._passive_stem = self._stem + "nut"
-
-	def conjugate(self, tense_idx : int = len(Tense), person_idx : int = len(Person)):
-		"""Extends Verb's conjugate but updates with vowel changes to the imperative plural endings."""
-		super().conjugate(tense_idx, person_idx)
-
-		# apply imperative corrections if stem is -ni
-		if self.imperative_stem[-2:] == "ni":
-			self._conjugation_table[Tense.IMPERATIVE][Person.FIRST_PL] = self.imperative_stem[:-1] + "ěme"
-			self._conjugation_table[Tense.IMPERATIVE][Person.SECOND_PL] = self.imperative_stem[:-1] + "ěte"
+		# the imperative corrections of -ni stems are inherited from Class4
 
 	def kind(self) -> str:
 		"""Return type of class as string"""
@@ -715,13 +751,12 @@ class Class4_rit(Class4):
 			future_stem = self.present_stem[2:] if self._is_negative else self.present_stem # without the ne-
 		self._stems = [self.present_stem, self.past_stem, future_stem, self.imperative_stem, self.past_stem ]
 
-	def conjugate(self, tense_idx : int = len(Tense), person_idx : int = len(Person)):
-		"""Extends Verb's conjugate but updates with vowel changes to the imperative plural endings."""
-		super().conjugate(tense_idx, person_idx)
-
+	def _get_conjugation(self, tense : int, person : int) -> str:
+		"""Extends Verb's _get_conjugation but updates with vowel changes to the imperative plural endings."""
 		# apply imperative corrections, always ending in -i
-		self._conjugation_table[Tense.IMPERATIVE][Person.FIRST_PL] = self.imperative_stem[:-1] + "eme"
-		self._conjugation_table[Tense.IMPERATIVE][Person.SECOND_PL] = self.imperative_stem[:-1] + "ete"
+		if self._is_imperative_plural(tense, person):
+			return self.imperative_stem[:-1] + "e" + self._imperative_endings[person]
+		return super()._get_conjugation(tense, person)
 
 	def kind(self) -> str:
 		"""Return type of class as string"""
@@ -814,16 +849,13 @@ class Class3_cluster(Class3):
 			future_stem = self.present_stem[2:] if self._is_negative else self.present_stem # without the ne-
 		self._stems = [self.present_stem, self.past_stem, future_stem, self.imperative_stem, self.past_stem ]
 
-	def conjugate(self, tense_idx : int = len(Tense), person_idx : int = len(Person)):
-		"""Extends Verb's conjugate but updates with vowel changes to the imperative plural endings."""
-		super().conjugate(tense_idx, person_idx)
-
+	def _get_conjugation(self, tense : int, person : int) -> str:
+		"""Extends Verb's _get_conjugation but updates with vowel changes to the imperative plural endings."""
 		# apply imperative corrections, stem always ending in i.
-		imperative_plural_vowel = "ě" if re.search("[dtvn]$", self.stem) else "e"
-		self._conjugation_table[Tense.IMPERATIVE][Person.FIRST_PL] = self.imperative_stem[:-1] \
-																	+ imperative_plural_vowel + "me"
-		self._conjugation_table[Tense.IMPERATIVE][Person.SECOND_PL] = self.imperative_stem[:-1] \
-																	+ imperative_plural_vowel + "te"
+		if self._is_imperative_plural(tense, person):
+			imperative_plural_vowel = "ě" if re.search("[dtvn]$", self.stem) else "e"
+			return self.imperative_stem[:-1] + imperative_plural_vowel + self._imperative_endings[person]
+		return super()._get_conjugation(tense, person)
 
 	def kind(self) -> str:
 		"""Return type of class as string"""
@@ -892,17 +924,13 @@ class Class4_cluster(Class4):
 			future_stem = self.present_stem[2:] if self._is_negative else self.present_stem # without the ne-
 		self._stems = [self.present_stem, self.past_stem, future_stem, self.imperative_stem, self.past_stem ]
 
-	def conjugate(self, tense_idx : int = len(Tense), person_idx : int = len(Person)):
-		"""Extends Verb's conjugate but updates with vowel changes to the imperative plural endings."""
-		super().conjugate(tense_idx, person_idx)
-
+	def _get_conjugation(self, tense : int, person : int) -> str:
+		"""Extends Class4's _get_conjugation but updates with vowel changes to the imperative plural endings."""
 		# apply imperative corrections if stem is -i
-		if self.imperative_stem[-1] == "i":
+		if self._is_imperative_plural(tense, person) and self.imperative_stem[-1] == "i":
 			imperative_plural_vowel = "ě" if re.search("[dtvnpb]$", self.stem) else "e"
-			self._conjugation_table[Tense.IMPERATIVE][Person.FIRST_PL] = self.imperative_stem[:-1] \
-																		+ imperative_plural_vowel + "me"
-			self._conjugation_table[Tense.IMPERATIVE][Person.SECOND_PL] = self.imperative_stem[:-1] \
-																		+ imperative_plural_vowel + "te"
+			return self.imperative_stem[:-1] + imperative_plural_vowel + self._imperative_endings[person]
+		return super()._get_conjugation(tense, person)
 
 	def kind(self) -> str:
 		"""Return type of class as string"""
@@ -0,0 +1,114 @@
+""""
+Wire format
+
+Provides the encoder and decoder of the compact paradigm wire format, for bulk transfers of
+conjugations: instead of repeating 30 cells per conjugation, mostly the same endings and
+auxiliaries, the templates of every paradigm are sent once (see paradigm) and each
+conjugation is sent as its paradigm id and four stems. A stream is made of JSON lines:
+
+	["p", id, kind, [[stem_idx, cut, before, after], ...]]	defines paradigm <id> for the lines after it
+	["w", word, [id, present, past, future, imperative], ...]	a word and each of its conjugations (none without a match)
+
+encode() sends every paradigm first, as a header. The streaming formatters.ParadigmWriter defines
+each paradigm just before its first use, so that chunks written independently (such as those of
+parallel workers) can be concatenated: a paradigm line simply (re)defines its id.
+
+	text = wire.encode(results) # results: (word, (verb, verb2)) such as Conjugator.conjugate_stream() yields
+	records = wire.decode(text) # [{"word": str, "verbs": [{"kind": str, "table": list}]}] as formatters.to_record
+"""
+
+import paradigm
+import verbs as v
+import json
+
+# the cells of every tense, within the cells of a conjugation (tense major, as in Verb.get_table())
+_ROWS = tuple(slice(tense * len(v.Person), (tense + 1) * len(v.Person)) for tense in range(len(v.Tense)))
+
+class WireError(Exception):
+	"""Raised on lines that do not belong to the wire format."""
+
+def _line(fields : list) -> str:
+	"""Encode the <fields> of a line, without any insignificant whitespace."""
+	return json.dumps(fields, ensure_ascii = False, separators = (",", ":"))
+
+def encode(results) -> str:
+	"""
+	Encode every (word, (verb, verb2)) of <results> into the wire format, with a header defining every paradigm.
+
+	Return:
+		str --> the encoded stream, one JSON line per paradigm and per word.
+	"""
+	table = paradigm.ParadigmTable()
+	words = [ _line(["w", word] + [ [paradigm_id, *stems] for (paradigm_id, stems) in (table.compress(verb) for verb in result if verb) ])
+			  for (word, result) in results ]
+	header = [ _line(["p", paradigm_id, kind, templates])
+			   for (paradigm_id, (kind, templates)) in enumerate(table.paradigms) ]
+	return "\n".join(header + words) + "\n"
+
+def encode_lexicon(lexicon : paradigm.ParadigmLexicon, words : list) -> str:
+	"""
+	Encode <words> of the precomputed paradigm <lexicon> into the wire format, with a header defining its paradigms.
+
+	The lexicon already holds every word as paradigm ids and stems, so nothing is conjugated or compressed.
+
+	Raises:
+		KeyError --> a word is not in <lexicon>.
+	"""
+	header = [ _line(["p", paradigm_id, kind, templates]) for (paradigm_id, (kind, templates)) in enumerate(lexicon.table.paradigms) ]
+	lines = [ _line(["w", word] + [ [paradigm_id, *stems] for (paradigm_id, stems) in paradigm.unpack(lexicon.entries[word]) ])
+			  for word in words ]
+	return "\n".join(header + lines) + "\n"
+
+class Decoder:
+	"""
+	Decodes a wire format stream line by line.
+
+	Attributes:
+		paradigms : dict --> paradigm id -> paradigm.Paradigm, as last defined
+
+	Methods:
+		feed(self, line : str) -> dict
+			decode a line, getting the record of a word (None for a paradigm line)
+	"""
+	def __init__(self):
+		self.paradigms = {}
+		self._compiled = {} # paradigm id -> paradigm.compile_paradigm()
+
+	def feed(self, line : str) -> dict:
+		"""
+		Decode <line>.
+
+		Return:
+			dict --> the record of the word, {"word": str, "verbs": [{"kind": str, "table": list}]},
+					 None for paradigm (and blank) lines.
+		Raises:
+			WireError --> <line> is not a line of the wire format, or uses a paradigm not defined before it.
+		"""
+		if not line.strip():
+			return None
+		try:
+			fields = json.loads(line)
+			if fields[0] == "p":
+				(paradigm_id, kind, templates) = fields[1:]
+				self.paradigms[paradigm_id] = paradigm.Paradigm(kind, tuple(paradigm.Template(*template) for template in templates))
+				self._compiled[paradigm_id] = paradigm.compile_paradigm(self.paradigms[paradigm_id])
+				return None
+			if fields[0] == "w":
+				return {"word" : fields[1], "verbs" : [ self._expand(conjugation[0], tuple(conjugation[1:])) for conjugation in fields[2:] ]}
+		except (ValueError, TypeError, IndexError, KeyError) as error:
+			raise WireError("malformed line: " + line.strip()[:80]) from error
+		raise WireError("unknown line: " + line.strip()[:80])
+
+	def _expand(self, paradigm_id : int, stems : tuple) -> dict:
+		"""Reconstruct the kind and table of a conjugation of paradigm <paradigm_id> with <stems>."""
+		if paradigm_id not in self.paradigms:
+			raise WireError("paradigm " + str(paradigm_id) + " used before it was defined")
+		(text, fields) = self._compiled[paradigm_id]
+		cells = text.format(*[ stems[stem_idx][:len(stems[stem_idx]) - cut] for (stem_idx, cut) in fields ]).split("\0")
+		return {"kind" : self.paradigms[paradigm_id].kind, "table" : [ cells[row] for row in _ROWS ]}
+
+def decode(text) -> list:
+	"""Decode a wire format stream, a str or any iterable of lines (such as an open file), into the records of its words."""
+	decoder = Decoder()
+	lines = text.splitlines() if isinstance(text, str) else text
+	return [ record for record in map(decoder.feed, lines) if record is not None ]